@@ -1,167 +1,249 @@
-from datetime import datetime
-import os
+"""Scrape the CERF allocations of every emergency with their project details."""
+
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
 
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
+
+from src.utils.http_cache import HTTP_OK, HttpCache
+from src.utils.http_utils import build_session
 
-os.makedirs("./data/cerf/", exist_ok=True)
+OUTPUT_DIR = Path("./data/cerf/")
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 BASE_URL = "https://cerf.un.org/what-we-do/allocation/all/emergency/"
 DETAILS_BASE_URL = "https://cerf.un.org/what-we-do/allocation/"
-
-def fetch_emergency_list():
+OUTPUT_CSV = OUTPUT_DIR / "cerf_emergency_data_dynamic_web_scrape.csv"
+
+REQUEST_TIMEOUT = 30
+MAX_WORKERS = 8  # concurrent project detail page loads
+EMERGENCY_WORKERS = 2  # concurrent emergency pages
+ALLOCATION_COLUMNS = 12  # cells of a complete allocation table row
+CACHE_DIR = "./data/cerf/.http_cache/"
+# Project detail pages of past allocations practically never change, so they
+# are served from the cache for this long before being revalidated.
+DETAILS_MAX_AGE = timedelta(days=30)
+MISSING_DETAILS = {
+    "groups_targeted": "N/A",
+    "number_of_people_targeted": "N/A",
+    "implementation_dates": "N/A",
+}
+
+SESSION = build_session(pool_size=MAX_WORKERS + EMERGENCY_WORKERS)
+CACHE = HttpCache(CACHE_DIR, max_age=DETAILS_MAX_AGE)
+
+
+def fetch_emergency_list() -> list[dict]:
+    """Return the CERF emergencies, or an empty list if the request fails."""
     cerf_url = "https://cerf.un.org/fundingByEmergency/all"
-    response = requests.get(cerf_url)
-    if response.status_code == 200:
+    response = SESSION.get(cerf_url, timeout=REQUEST_TIMEOUT)
+    if response.status_code == HTTP_OK:
         return response.json()
-    print(f"Error fetching CERF emergency list: {response.status_code}")
+    logging.error("Error fetching CERF emergency list: %s", response.status_code)
     return []
 
-def clean_text(cell):
+
+def clean_text(cell: Tag) -> str:
+    """Return the text of a table cell without surrounding whitespace."""
     return cell.get_text(separator=" ").strip()
 
-def clean_approved_amount(amount):
-    """Remove 'US$' and commas from approved_amount field and return as a number string"""
+
+def clean_approved_amount(amount: str) -> str:
+    """Remove 'US$' and commas from an approved amount, leaving the number."""
     return amount.replace("US$", "").replace("US $", "").replace(",", "").strip()
 
-def clean_date_format(date_text):
-    """Reformat date from 'DD MMM YYYY' to 'DD/MM/YYYY'"""
+
+def clean_date_format(date_text: str) -> str:
+    """Reformat a date from 'DD MMM YYYY' to 'DD/MM/YYYY'."""
     try:
-        return datetime.strptime(date_text, "%d %b %Y").strftime("%d/%m/%Y")
+        return (
+            datetime.strptime(date_text, "%d %b %Y")  # noqa: DTZ007
+            .date()
+            .strftime("%d/%m/%Y")
+        )
     except ValueError:
         return date_text  # Keep as-is if it doesn't match expected format
 
-def fetch_project_details(allocation_code, project_code, year, emergency_id):
-    """Dynamically build the link for each project and scrape additional details.
+
+def _next_div_text(soup: BeautifulSoup, label: str) -> str:
+    """Return the text of the div following a label div, or ``N/A``."""
+    label_element = soup.find("div", string=label)
+    return label_element.find_next("div").text.strip() if label_element else "N/A"
+
+
+def fetch_project_details(
+    allocation_code: str,
+    project_code: str,
+    year: str,
+    emergency_id: str,
+) -> dict:
+    """Build the link of a project and scrape its additional details.
+
+    Failed requests give ``N/A`` details, so one missing page does not lose
+    the allocations of the whole emergency.
     """
-    details_url = f"{DETAILS_BASE_URL}{year}/emergency/{emergency_id}/{allocation_code}/{project_code}"
-    response = requests.get(details_url)
-
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        # Scrape the 'Group(s) of people targeted' if available
-        groups_targeted_element = soup.find("div", string="Group(s) of people targeted")
-        groups_targeted = groups_targeted_element.find_next("div").text.strip() if groups_targeted_element else "N/A"
-
-        # Scrape the 'Number of people targeted' if available
-        number_of_people_element = soup.find("div", string="Number of people targeted")
-        number_of_people = number_of_people_element.find_next("div").text.strip() if number_of_people_element else "N/A"
-
-        # Scrape the 'Implementation dates' if available
-        implementation_dates_element = soup.find("div", string="Implementation dates")
-        if implementation_dates_element:
-            implementation_dates = implementation_dates_element.find_next("div").text.strip()
-            implementation_dates = implementation_dates.replace("\n", " | ").replace("Project start:", "Start:").replace("Project end:", "End:")
-        else:
-            implementation_dates = "N/A"
-
-        return {
-            "groups_targeted": groups_targeted,
-            "number_of_people_targeted": number_of_people,
-            "implementation_dates": implementation_dates,
-        }
-
-    print(f"Error fetching project details from {details_url}: {response.status_code}")
+    details_url = (
+        f"{DETAILS_BASE_URL}{year}/emergency/{emergency_id}/"
+        f"{allocation_code}/{project_code}"
+    )
+    try:
+        status_code, content = CACHE.fetch(
+            SESSION,
+            details_url,
+            timeout=REQUEST_TIMEOUT,
+        )
+    except requests.RequestException:
+        logging.exception("Error fetching project details from %s", details_url)
+        return dict(MISSING_DETAILS)
+
+    if status_code != HTTP_OK:
+        logging.error(
+            "Error fetching project details from %s: %s",
+            details_url,
+            status_code,
+        )
+        return dict(MISSING_DETAILS)
+
+    soup = BeautifulSoup(content, "html.parser")
+    implementation_dates = (
+        _next_div_text(soup, "Implementation dates")
+        .replace("\n", " | ")
+        .replace("Project start:", "Start:")
+        .replace("Project end:", "End:")
+    )
+    return {
+        "groups_targeted": _next_div_text(soup, "Group(s) of people targeted"),
+        "number_of_people_targeted": _next_div_text(soup, "Number of people targeted"),
+        "implementation_dates": implementation_dates,
+    }
+
+
+def parse_allocation_row(link_id: str, cells: list[Tag]) -> dict:
+    """Return the fields of one row of an emergency allocation table."""
     return {
-        "groups_targeted": "N/A",
-        "number_of_people_targeted": "N/A",
-        "implementation_dates": "N/A",
+        "link_id": link_id,
+        "allocation_code": clean_text(cells[0]),
+        "allocation": clean_text(cells[1]),
+        "emergency_type": clean_text(cells[2]),
+        "agency": clean_text(cells[3]),
+        "country": clean_text(cells[4]),
+        "project_code": clean_text(cells[5]),
+        "project_description": clean_text(cells[6]),
+        "window": clean_text(cells[7]).replace("Window:", "").strip(),
+        "sector": clean_text(cells[8]).replace("Sector:", "").strip(),
+        "approved_amount": clean_approved_amount(clean_text(cells[9])),
+        "approval_date": clean_date_format(
+            clean_text(cells[10]).replace("Approval date:", "").strip(),
+        ),
+        "disbursement_date": clean_date_format(
+            clean_text(cells[11]).replace("Disbursement date:", "").strip(),
+        ),
     }
 
-def fetch_emergency_details(link_id):
+
+def fetch_emergency_details(
+    link_id: str,
+    executor: Executor | None = None,
+) -> list[dict]:
+    """Scrape the allocation table of an emergency and its project details.
+
+    Project detail pages are fetched through ``executor`` when given, so the
+    pages of all rows load concurrently; otherwise they are fetched serially.
+    """
     url = f"{BASE_URL}{link_id}"
-    response = requests.get(url)
-
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        year_range_element = soup.find("div", {"class": "field--name-field-year"})
-        year_range = year_range_element.text.strip() if year_range_element else "Unknown"
-
-        total_amount_element = soup.find("div", {"class": "field--name-field-total-amount"})
-        total_amount = total_amount_element.text.strip() if total_amount_element else "Unknown"
-
-        table = soup.find("table")
-
-        table_data = []
-
-        if table:
-            rows = table.find_all("tr")
-
-            for row in rows[1:]:
-                cells = row.find_all("td")
-
-                # Skip summary or total rows
-                if any(cell.has_attr("colspan") for cell in cells):
-                    continue
-
-                if len(cells) >= 8:
-                    try:
-                        allocation_code = clean_text(cells[0])
-                        allocation = clean_text(cells[1])
-                        emergency_type = clean_text(cells[2])
-                        agency = clean_text(cells[3])
-                        country = clean_text(cells[4])
-                        project_code = clean_text(cells[5])
-                        project_description = clean_text(cells[6])
-                        window = clean_text(cells[7]).replace("Window:", "").strip()
-                        sector = clean_text(cells[8]).replace("Sector:", "").strip()
-                        approved_amount = clean_approved_amount(clean_text(cells[9]))
-                        approval_date = clean_date_format(clean_text(cells[10]).replace("Approval date:", "").strip())
-                        disbursement_date = clean_date_format(clean_text(cells[11]).replace("Disbursement date:", "").strip())
-
-                        # Fetch additional project details dynamically
-                        project_details = fetch_project_details(allocation_code, project_code, year_range.split("-")[0], link_id)
-
-                        table_data.append({
-                            "link_id": link_id,
-                            "allocation_code": allocation_code,
-                            "allocation": allocation,
-                            "emergency_type": emergency_type,
-                            "agency": agency,
-                            "country": country,
-                            "project_code": project_code,
-                            "project_description": project_description,
-                            "window": window,
-                            "sector": sector,
-                            "approved_amount": approved_amount,
-                            "approval_date": approval_date,
-                            "disbursement_date": disbursement_date,
-                            "groups_targeted": project_details["groups_targeted"],
-                            "number_of_people_targeted": project_details["number_of_people_targeted"],
-                            "implementation_dates": project_details["implementation_dates"],
-                        })
-                    except IndexError as e:
-                        print(f"Error processing row: {cells} - {e}")
-                        continue
-
-        return table_data
-    print(f"Error fetching data for link ID {link_id}: {response.status_code}")
-    return []
+    # Allocation tables grow when new allocations are approved, so they are
+    # always revalidated.
+    status_code, content = CACHE.fetch(
+        SESSION,
+        url,
+        timeout=REQUEST_TIMEOUT,
+        max_age=timedelta(0),
+    )
+    if status_code != HTTP_OK:
+        logging.error("Error fetching data for link ID %s: %s", link_id, status_code)
+        return []
+
+    soup = BeautifulSoup(content, "html.parser")
+    year_range_element = soup.find("div", {"class": "field--name-field-year"})
+    year_range = year_range_element.text.strip() if year_range_element else "Unknown"
+
+    table_data = []
+    table = soup.find("table")
+    if table:
+        for row in table.find_all("tr")[1:]:
+            cells = row.find_all("td")
+            # Skip summary or total rows, and rows missing cells
+            if any(cell.has_attr("colspan") for cell in cells):
+                continue
+            if len(cells) < ALLOCATION_COLUMNS:
+                logging.warning("Skipping incomplete row of link ID %s", link_id)
+                continue
+            table_data.append(parse_allocation_row(link_id, cells))
+
+    # Fetch additional project details dynamically
+    year = year_range.split("-")[0]
+    detail_args = [
+        (row["allocation_code"], row["project_code"], year, link_id)
+        for row in table_data
+    ]
+    if executor is not None:
+        project_details = executor.map(
+            lambda args: fetch_project_details(*args),
+            detail_args,
+        )
+    else:
+        project_details = (fetch_project_details(*args) for args in detail_args)
+    for row, details in zip(table_data, project_details, strict=True):
+        row.update(details)
+
+    return table_data
+
+
+def fetch_emergency(emergency: dict, executor: Executor | None = None) -> list[dict]:
+    """Scrape an emergency, logging network errors instead of raising them.
+
+    An emergency that cannot be fetched gives no rows, so the others are still
+    collected when the emergencies are scraped concurrently.
+    """
+    logging.info(
+        "Fetching data for link ID %s (%s)...",
+        emergency["link_id"],
+        emergency["name"],
+    )
+    try:
+        return fetch_emergency_details(emergency["link_id"], executor)
+    except requests.RequestException:
+        logging.exception("Error fetching data for link ID %s", emergency["link_id"])
+        return []
 
-def main():
-    emergency_list = fetch_emergency_list()
 
+def main() -> None:
+    """Scrape all CERF emergencies and save their allocations as CSV."""
+    emergency_list = fetch_emergency_list()
     if not emergency_list:
-        print("No emergency data found.")
+        logging.warning("No emergency data found.")
         return
 
     all_table_data = []
+    with (
+        ThreadPoolExecutor(max_workers=MAX_WORKERS) as details_executor,
+        ThreadPoolExecutor(max_workers=EMERGENCY_WORKERS) as emergency_executor,
+    ):
+        for table_data in emergency_executor.map(
+            lambda emergency: fetch_emergency(emergency, details_executor),
+            emergency_list,
+        ):
+            all_table_data.extend(table_data)
 
-    for emergency in emergency_list:
-        link_id = emergency["link_id"]
-        name = emergency["name"]
-        print(f"Fetching data for link ID {link_id} ({name})...")
-        table_data = fetch_emergency_details(link_id)
-        all_table_data.extend(table_data)
-
-    df = pd.DataFrame(all_table_data)
-    output_csv = "./data/cerf/cerf_emergency_data_dynamic_web_scrape.csv"
-    df.to_csv(output_csv, index=False)
+    logging.info("Project detail cache: %s", CACHE.stats)
+    pd.DataFrame(all_table_data).to_csv(OUTPUT_CSV, index=False)
+    logging.info("Data saved to %s", OUTPUT_CSV)
 
-    print(f"Data saved to {output_csv}")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     main()
@@ -4,12 +4,13 @@ import json
 from pathlib import Path
 
 import pandas as pd
-import pycountry
 
 from src.data_consolidation.dictionary import (
     CERF_MAPPING,
 )
 from src.utils.azure_blob_utils import read_blob_to_dataframe
+from src.utils.country_resolver import get_country_resolver
+from src.utils.intermediate_io import write_intermediate
 from src.utils.util import (
     change_data_type,
     map_and_drop_columns,
@@ -30,13 +31,10 @@ def main() -> None:
 
     cleaned1_df = map_and_drop_columns(cerf_df_raw, CERF_MAPPING)
 
-    def get_iso3_code(country_name: str) -> None:
-        try:
-            return pycountry.countries.lookup(country_name).alpha_3
-        except LookupError:
-            return None
-
-    cleaned1_df["Country_Code"] = cleaned1_df["Country"].apply(get_iso3_code)
+    cleaned1_df["Country_Code"] = get_country_resolver().resolve_column(
+        cleaned1_df["Country"],
+        fuzzy=False,
+    )
     cleaned2_df = change_data_type(cleaned1_df, cerf_schema)
     cleaned2_df["Date"] = pd.to_datetime(
         cleaned2_df["Date"],
@@ -49,9 +47,7 @@ def main() -> None:
     remaining_columns = [col for col in cleaned2_df.columns if col not in schema_order]
     final_columns_order = ordered_columns + remaining_columns
     cleaned2_df = cleaned2_df[final_columns_order]
-    Path("./data_mid_1/cerf/").mkdir(parents=True, exist_ok=True)
-    output_file_path = "./data_mid_1/cerf/cerf_mid1.csv"
-    cleaned2_df.to_csv(output_file_path, index=False)
+    write_intermediate(cleaned2_df, "./data_mid_1/cerf/cerf_mid1")
 
 
 if __name__ == "__main__":
@@ -1,18 +1,27 @@
-"""Disaster Charter activations scraper
+"""Disaster Charter activations scraper.
+
 • Loops 2025→2000 through the JSON filter API
 • Visits each legacy detail page (/web/guest/activations/-/article/<slug>)
 • Extracts full table (type, location, timezone …)
 • Writes CSV identical to the October-2024 format
+• Appends rows as they are scraped and checkpoints finished slugs, so an
+  interrupted crawl resumes where it stopped
+• Sorts the CSV by activation ID once the crawl ends
 """
 
 import csv
-import os
+import importlib.util
+import json
+import logging
 import re
-import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
+
+from src.utils.http_utils import RateLimiter, build_session
 
 # ----------------------------------------------------------------------
 # CONFIG
@@ -23,11 +32,23 @@ BASE_SITE = "https://disasterscharter.org"
 YEAR_FROM = 2000
 YEAR_TO   = 2025          # inclusive
 HEADERS   = {"User-Agent": "Mozilla/5.0"}
-SLEEP_SEC = 0.35          # polite delay between page hits
+WORKERS   = 3             # concurrent detail page fetches
+RATE      = 3.0           # polite request rate (requests / second)
+BURST     = 3             # requests allowed back to back
+
+OUT_DIR    = Path("./data/disaster-charter/")
+CSV_PATH   = OUT_DIR / "disaster_activations_web_scrape_2000_2025.csv"
+STATE_PATH = OUT_DIR / ".crawl_state.jsonl"   # one finished slug per line
+OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-OUT_DIR   = "./data/disaster-charter/"
-CSV_PATH  = os.path.join(OUT_DIR, "disaster_activations_web_scrape_2000_2025.csv")
-os.makedirs(OUT_DIR, exist_ok=True)
+HEADER = [
+    "Year","Month","Date","Disaster","Formatted Date","Details Link",
+    "Type of Event","Location of Event","Date of Activation","Time of Activation",
+    "Timezone","Charter Requestor","Activation ID","Project Management","Value Adding",
+]
+
+SESSION      = build_session(pool_size=WORKERS, headers=HEADERS)
+RATE_LIMITER = RateLimiter(RATE, burst=BURST)
 
 # ----------------------------------------------------------------------
 # LABEL MAPPING & DETAIL SCRAPER
@@ -45,103 +66,215 @@ LABEL_PATTERNS = {
     "value_adding"       : r"value adding",
 }
 
-def scrape_detail_page(slug: str) -> dict:
-    """Slug e.g. 'flood-in-nigeria-activation-963-'
-    Fetches /web/guest/activations/-/article/<slug>
+# One pattern for all labels: the name of the matching group tells which label
+# a cell holds, so the page is walked once instead of once per label.
+LABEL_REGEX = re.compile(
+    "(?:" + "|".join(f"(?P<{k}>{rgx})" for k, rgx in LABEL_PATTERNS.items()) + r"):?$",
+    re.IGNORECASE,
+)
+
+# lxml builds the tree several times faster than the pure-Python html.parser
+PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+def parse_detail_page(html: bytes | str, parser: str = PARSER) -> dict:
+    """Extract the LABEL_PATTERNS fields from an activation detail page.
+
+    The document is walked once, recording the first cell of each label.
     """
-    url = f"{BASE_SITE}/web/guest/activations/-/article/{slug}"
-    resp = requests.get(url, headers=HEADERS, timeout=25)
-    if resp.status_code != 200:
-        print("  ⚠️  detail page 404:", slug)
-        return {k: "N/A" for k in LABEL_PATTERNS}
+    soup = BeautifulSoup(html, parser)
 
-    soup = BeautifulSoup(resp.content, "html.parser")
+    labels = {}
+    for tag in soup.find_all(name=True):
+        text = tag.string
+        if not text:
+            continue
+        match = LABEL_REGEX.search(text.strip())
+        if match and match.lastgroup not in labels:
+            labels[match.lastgroup] = tag
+            if len(labels) == len(LABEL_PATTERNS):
+                break
 
-    def pull(regex: str) -> str:
-        pat = re.compile(regex + r":?$", re.IGNORECASE)
-        lbl = soup.find(lambda tag: tag.string and pat.search(tag.string.strip()))
-        if not lbl:
+    def value_of(lbl: Tag | None) -> str:
+        if lbl is None:
             return "N/A"
         val_cell = lbl.find_next("td") if lbl.name == "th" else lbl.find_next()
         return val_cell.get_text(strip=True) if val_cell else "N/A"
 
-    return {k: pull(rgx) for k, rgx in LABEL_PATTERNS.items()}
+    return {k: value_of(labels.get(k)) for k in LABEL_PATTERNS}
+
+def scrape_detail_page(slug: str) -> dict:
+    """Fetch and parse /web/guest/activations/-/article/<slug>.
+
+    Slug e.g. 'flood-in-nigeria-activation-963-'. A failed response raises
+    ``requests.HTTPError`` so the slug is not checkpointed and is retried by
+    the next run.
+    """
+    url = f"{BASE_SITE}/web/guest/activations/-/article/{slug}"
+    RATE_LIMITER.acquire(url)
+    resp = SESSION.get(url, timeout=25)
+    resp.raise_for_status()
+
+    return parse_detail_page(resp.content)
 
 # ----------------------------------------------------------------------
-# MAIN COLLECTION LOOP
+# CHECKPOINT STATE
 # ----------------------------------------------------------------------
 
-def collect_rows():
-    rows = []
-
-    # ▶︎ reverse order: newest year first
-    for yr in range(YEAR_TO, YEAR_FROM - 1, -1):
-        print(f"• Year {yr}")
-        params = {
-            "from": f"{yr}-01-01 00:00:00",
-            "to"  : f"{yr}-12-31 23:59:59",
-        }
-        try:
-            data = requests.get(BASE_API, headers=HEADERS, params=params, timeout=25).json()
-            acts = data.get("activations", [])
-        except Exception as e:
-            print("  ↳ API error:", e)
-            continue
+def truncate_torn_line(path: Path) -> None:
+    """Cut a partial last line left by a crash, so appends start on a new line."""
+    with path.open("r+b") as fh:
+        content = fh.read()
+        if content and not content.endswith(b"\n"):
+            fh.truncate(content.rfind(b"\n") + 1)
 
-        for act in acts:
-            slug = act.get("slug", "")
-            if not slug:
-                continue
+def load_done_slugs() -> set:
+    """Return the slugs already scraped.
 
-            ts = act.get("dateAsTimestamp")
-            if ts:
-                dt  = datetime.utcfromtimestamp(ts / 1000)
-                year, month = dt.year, dt.strftime("%B")
-                date_str    = dt.strftime("%Y-%m-%d")
-                pretty_date = dt.strftime("%d %A")          # ▶︎ 16 Wednesday
-            else:
-                year = month = date_str = pretty_date = "N/A"
-
-            title     = act.get("title", "N/A")
-            page_link = f"{BASE_SITE}/web/guest/activations/-/article/{slug}"
-
-            details = scrape_detail_page(slug)
-            time.sleep(SLEEP_SEC)
-
-            rows.append([
-                year, month, date_str, title, pretty_date, page_link,
-                details["type_of_event"],
-                details["location_of_event"],
-                details["date_of_activation"],
-                details["time_of_activation"],
-                details["timezone"],
-                details["charter_requestor"],
-                details["activation_id"],
-                details["project_management"],
-                details["value_adding"],
-            ])
-
-    return rows
+    These are the slugs checkpointed in STATE_PATH plus those whose row made
+    it into CSV_PATH before the checkpoint was written. A torn last line of
+    STATE_PATH is removed first.
+    """
+    done = set()
+    if STATE_PATH.exists():
+        truncate_torn_line(STATE_PATH)
+        with STATE_PATH.open(encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    done.add(json.loads(line)["slug"])
+                except (json.JSONDecodeError, KeyError):  # noqa: PERF203
+                    continue          # corrupt line, its slug is rescraped
+    if CSV_PATH.exists():
+        with CSV_PATH.open(newline="", encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                link = row.get("Details Link") or ""
+                done.add(link.rsplit("/", 1)[-1])
+    done.discard("")
+    return done
 
 # ----------------------------------------------------------------------
-# CSV WRITER
+# MAIN COLLECTION LOOP
 # ----------------------------------------------------------------------
 
-def save_csv(rows):
-    header = [
-        "Year","Month","Date","Disaster","Formatted Date","Details Link",
-        "Type of Event","Location of Event","Date of Activation","Time of Activation",
-        "Timezone","Charter Requestor","Activation ID","Project Management","Value Adding",
+def list_activations(yr: int) -> list:
+    """Return the activations of a year from the JSON filter API."""
+    params = {
+        "from": f"{yr}-01-01 00:00:00",
+        "to"  : f"{yr}-12-31 23:59:59",
+    }
+    RATE_LIMITER.acquire(BASE_API)
+    data = SESSION.get(BASE_API, params=params, timeout=25).json()
+    return data.get("activations", [])
+
+def build_row(act: dict, details: dict) -> list:
+    """Return the CSV row of an activation and its detail page fields."""
+    slug = act["slug"]
+    ts = act.get("dateAsTimestamp")
+    if ts:
+        dt  = datetime.fromtimestamp(ts / 1000, tz=timezone.utc)
+        year, month = dt.year, dt.strftime("%B")
+        date_str    = dt.strftime("%Y-%m-%d")
+        pretty_date = dt.strftime("%d %A")          # ▶︎ 16 Wednesday
+    else:
+        year = month = date_str = pretty_date = "N/A"
+
+    title     = act.get("title", "N/A")
+    page_link = f"{BASE_SITE}/web/guest/activations/-/article/{slug}"
+
+    return [
+        year, month, date_str, title, pretty_date, page_link,
+        details["type_of_event"],
+        details["location_of_event"],
+        details["date_of_activation"],
+        details["time_of_activation"],
+        details["timezone"],
+        details["charter_requestor"],
+        details["activation_id"],
+        details["project_management"],
+        details["value_adding"],
     ]
-    with open(CSV_PATH, "w", newline="", encoding="utf-8") as fh:
-        csv.writer(fh).writerows([header] + rows)
-    print(f"✅  Saved {len(rows)} rows → {CSV_PATH}")
+
+def activation_sort_key(row: list) -> tuple:
+    """Order rows newest activation first, rows without an ID last."""
+    activation_id = row[HEADER.index("Activation ID")]
+    if activation_id.isdigit():
+        return (0, -int(activation_id), row[HEADER.index("Details Link")])
+    return (1, 0, row[HEADER.index("Details Link")])
+
+def sort_csv_rows() -> None:
+    """Rewrite CSV_PATH sorted by activation ID.
+
+    Rows are appended in completion order, which changes from run to run.
+    """
+    with CSV_PATH.open(newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        header = next(reader)
+        rows = sorted(reader, key=activation_sort_key)
+    tmp_path = CSV_PATH.with_suffix(".tmp")
+    with tmp_path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(header)
+        writer.writerows(rows)
+    tmp_path.replace(CSV_PATH)
+
+def collect_rows() -> int:
+    """Crawl all years, writing each scraped row as soon as it is parsed.
+
+    Each row is appended to CSV_PATH and its slug to STATE_PATH straight away.
+    Slugs finished by a previous run are skipped. Once the crawl ends, the
+    CSV is sorted by activation ID. Returns the number of rows written by this
+    run.
+    """
+    done = load_done_slugs()
+    if done:
+        logging.info("Resuming: %d activations already scraped", len(done))
+    written = 0
+
+    with CSV_PATH.open("a", newline="", encoding="utf-8") as csv_fh, \
+         STATE_PATH.open("a", encoding="utf-8") as state_fh, \
+         ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        writer = csv.writer(csv_fh)
+        if csv_fh.tell() == 0:
+            writer.writerow(HEADER)
+
+        # ▶︎ reverse order: newest year first
+        for yr in range(YEAR_TO, YEAR_FROM - 1, -1):
+            logging.info("Year %d", yr)
+            try:
+                acts = list_activations(yr)
+            except requests.RequestException:
+                logging.exception("API error for %d", yr)
+                continue
+
+            todo = [act for act in acts if act.get("slug") and act["slug"] not in done]
+            futures = {
+                pool.submit(scrape_detail_page, act["slug"]): act for act in todo
+            }
+            for fut in as_completed(futures):
+                act = futures[fut]
+                try:
+                    details = fut.result()
+                except requests.RequestException:
+                    logging.exception(
+                        "Detail page error (retried next run): %s",
+                        act["slug"],
+                    )
+                    continue
+
+                writer.writerow(build_row(act, details))
+                csv_fh.flush()
+                state_fh.write(json.dumps({"slug": act["slug"]}) + "\n")
+                state_fh.flush()
+                done.add(act["slug"])
+                written += 1
+
+    sort_csv_rows()
+    return written
 
 # ----------------------------------------------------------------------
 # RUN
 # ----------------------------------------------------------------------
 
 if __name__ == "__main__":
-    rows = collect_rows()
-    if rows:
-        save_csv(rows)
+    logging.basicConfig(level=logging.INFO)
+    written = collect_rows()
+    logging.info("Saved %d new rows to %s", written, CSV_PATH)
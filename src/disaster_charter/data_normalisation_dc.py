@@ -10,6 +10,7 @@ from src.data_consolidation.dictionary import (
     DISASTER_CHARTER_MAPPING,
 )
 from src.utils.azure_blob_utils import read_blob_to_dataframe
+from src.utils.intermediate_io import write_intermediate
 from src.utils.util import (
     change_data_type,
     map_and_drop_columns,
@@ -112,9 +113,10 @@ def main() -> None:
             remove_float_suffix,
         )
 
-    Path("./data_mid_1/disaster_charter/").mkdir(parents=True, exist_ok=True)
-    output_file_path = "./data_mid_1/disaster_charter/disaster_charter_mid1.csv"
-    cleaned2_df.to_csv(output_file_path, index=False)
+    write_intermediate(
+        cleaned2_df,
+        "./data_mid_1/disaster_charter/disaster_charter_mid1",
+    )
 
 
 if __name__ == "__main__":
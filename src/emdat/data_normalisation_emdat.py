@@ -8,7 +8,9 @@ import pandas as pd
 
 from src.data_consolidation.dictionary import EMDAT_MAPPING
 from src.utils.azure_blob_utils import read_blob_to_dataframe
+from src.utils.intermediate_io import write_intermediate
 from src.utils.util import (
+    change_data_type,
     map_and_drop_columns,
     normalize_event_type,
 )
@@ -22,70 +24,6 @@ SCHEMA_PATH_EMDAT = "./src/emdat/emdat_schema.json"
 EVENT_CODE_CSV = "./static_data/event_code_table.csv"
 
 
-def safe_cast_to_int(
-    column: pd.Series,
-) -> pd.Series:
-    """Safely cast a pandas Series to integers.
-
-    This function converts each element in the
-    given pandas Series to an integer if it is a valid integer or float
-    and not null. If the element cannot be converted,
-    it is replaced with pandas' NA value.
-
-    Args:
-        column (pd.Series): The input pandas Series to be cast to integers.
-
-    Returns:
-        pd.Series: A pandas Series with elements cast to integers or NA values.
-    """
-    return column.apply(
-        lambda x: int(x)
-        if pd.notna(x) and isinstance(x, int | float) and x == int(x)
-        else pd.NA,
-    ).astype("Int64")
-
-
-def safe_change_data_type(
-    cleaned1_data: pd.DataFrame,
-    json_schema: dict,
-) -> pd.DataFrame:
-    """Safely changes the dt of columns in a DF based on a given JSON schema.
-
-    Args:
-        cleaned1_data (pd.DataFrame): The DF with data to be type-casted.
-        json_schema (dict): The JSON schema defining
-        the desired data types for each column.
-
-    Returns:
-        pd.DataFrame: The DataFrame with columns type-casted
-        according to the JSON schema.
-    """
-    for column, properties in json_schema["properties"].items():
-        if column in cleaned1_data.columns:
-            column_type = properties.get("type")
-            if "array" in column_type:
-                cleaned1_data[column] = cleaned1_data[column].apply(
-                    lambda x: ",".join(map(str, x))
-                    if isinstance(x, list)
-                    else (str(x) if pd.notna(x) else ""),
-                )
-            elif "string" in column_type:
-                cleaned1_data[column] = cleaned1_data[column].astype(str)
-            elif "number" in column_type:
-                cleaned1_data[column] = pd.to_numeric(
-                    cleaned1_data[column],
-                    errors="coerce",
-                )
-            elif "integer" in column_type:
-                cleaned1_data[column] = safe_cast_to_int(cleaned1_data[column])
-            elif "null" in column_type:
-                cleaned1_data[column] = cleaned1_data[column].where(
-                    cleaned1_data[column].notna(),
-                    None,
-                )
-    return cleaned1_data
-
-
 def create_start_date(
     df: pd.DataFrame,
     year_col: str,
@@ -134,7 +72,7 @@ def main() -> None:
         month_col="Month",
         day_col="Day",
     )
-    cleaned2_df = safe_change_data_type(cleaned1_df, emdat_schema)
+    cleaned2_df = change_data_type(cleaned1_df, emdat_schema)
     cleaned2_df["Date"] = pd.to_datetime(cleaned2_df["Date"], errors="coerce")
     cleaned2_df = normalize_event_type(cleaned2_df, EVENT_CODE_CSV)
     schema_order = list(emdat_schema["properties"].keys())
@@ -143,9 +81,7 @@ def main() -> None:
     final_columns_order = ordered_columns + remaining_columns
     cleaned2_df = cleaned2_df[final_columns_order]
 
-    Path("./data_mid_1/emdat/").mkdir(parents=True, exist_ok=True)
-    output_file_path = "./data_mid_1/emdat/emdat_mid1.csv"
-    cleaned2_df.to_csv(output_file_path, index=False)
+    write_intermediate(cleaned2_df, "./data_mid_1/emdat/emdat_mid1")
 
 
 if __name__ == "__main__":
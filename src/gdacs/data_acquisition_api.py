@@ -1,23 +1,73 @@
 """GDACS Data Acquisition Script."""
 
+import argparse
+import json
 import logging
 import pathlib
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta, timezone
+from types import TracebackType
 
 import pandas as pd
 import requests
 
+from src.utils.batch_accumulator import BatchAccumulator, PartitionedCsvWriter
+from src.utils.http_utils import RateLimiter, build_session
+
 SEARCH_URL = "https://www.gdacs.org/gdacsapi/api/events/geteventlist/SEARCH"
 OUTPUT_DIR = "./data/gdacs/"
+SYNC_STATE_DIR = "./data/gdacs/.sync/"
 pathlib.Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
 
+START_DATE = datetime(2000, 1, 1, tzinfo=timezone.utc)
+END_DATE = datetime(2025, 5, 28, tzinfo=timezone.utc)
+WINDOW_INTERVAL = timedelta(days=30)
+MIN_WINDOW_INTERVAL = timedelta(days=1)
+MAX_WINDOW_INTERVAL = timedelta(days=365)
+# Windows are resized so that each request returns about this many events.
+TARGET_EVENTS_PER_WINDOW = 50
+# A response with at least this many events is assumed to have been cut off by
+# the API and its window is bisected.
+TRUNCATION_LIMIT = 100
+EVENT_TYPES = ["EQ", "TS", "TC", "FL", "VO", "DR", "WF"]
+
+REQUEST_TIMEOUT = 10
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 5.0
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+# GDACS keeps updating events (alert level, end date, affected countries) for a
+# while after they start, so delta runs re-fetch this much history.
+DELTA_LOOKBACK = timedelta(days=30)
+
 
 def fetch_events(
     start_date: datetime,
     end_date: datetime,
     event_type: str,
+    session: requests.Session | None = None,
+    rate_limiter: RateLimiter | None = None,
 ) -> list[dict]:
-    """Fetch GDACS events of a specific type within a date range."""
+    """Fetch GDACS events of a specific type within a date range.
+
+    Args:
+        start_date (datetime): The start of the window.
+        end_date (datetime): The end of the window.
+        event_type (str): The GDACS event type code, e.g. 'EQ'.
+        session (requests.Session | None): An optional session to reuse
+        connections across calls.
+        rate_limiter (RateLimiter | None): An optional limiter that paces
+        requests to the GDACS host.
+
+    Returns:
+        list[dict]: The events found in the window.
+
+    Raises:
+        requests.RequestException: If the request fails or the response is not
+        valid JSON, so that a failed window is not mistaken for an empty one.
+    """
     params = {
         "fromDate": start_date.strftime("%Y-%m-%d"),
         "toDate": end_date.strftime("%Y-%m-%d"),
@@ -32,9 +82,12 @@ def fetch_events(
         params["fromDate"],
         params["toDate"],
     )
+    http = session if session is not None else requests
     response = None
     try:
-        response = requests.get(SEARCH_URL, params=params, timeout=10)
+        if rate_limiter is not None:
+            rate_limiter.acquire(SEARCH_URL)
+        response = http.get(SEARCH_URL, params=params, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
 
         if not response.text.strip():
@@ -79,7 +132,7 @@ def fetch_events(
             params["toDate"],
             response.text[:200] if response is not None else "No response",
         )
-        return []
+        raise
 
     except requests.RequestException:
         logging.exception(
@@ -88,54 +141,574 @@ def fetch_events(
             params["fromDate"],
             params["toDate"],
         )
-        return []
+        raise
 
 
-def main() -> None:
-    """Main function to fetch GDACS events and save them to CSV files."""
-    start_date = datetime(2000, 1, 1, tzinfo=timezone.utc)
-    end_date = datetime(2025, 5, 28, tzinfo=timezone.utc)
-    interval = timedelta(days=30)
-    event_types = ["EQ", "TS", "TC", "FL", "VO", "DR", "WF"]
+class IncompleteLaneError(Exception):
+    """A lane stopped at a window that could not be fetched.
+
+    Attributes:
+        events (list[dict]): The events of the windows fetched before it.
+        resume_date (datetime): The start of the failed window, from which the
+        lane has to be fetched again.
+    """
+
+    def __init__(self, events: list[dict], resume_date: datetime) -> None:
+        """Initialise the error.
+
+        Args:
+            events (list[dict]): The events fetched before the failure.
+            resume_date (datetime): The start of the failed window.
+        """
+        super().__init__(f"Lane incomplete from {resume_date.isoformat()}")
+        self.events = events
+        self.resume_date = resume_date
+
+
+def iter_year_lanes(
+    start_date: datetime,
+    end_date: datetime,
+) -> Iterator[tuple[datetime, datetime]]:
+    """Yield calendar-year ``(from, to)`` ranges covering a date range.
+
+    Args:
+        start_date (datetime): The start of the range.
+        end_date (datetime): The end of the range.
 
-    all_data = pd.DataFrame()
+    Yields:
+        tuple[datetime, datetime]: The bounds of the next year.
+    """
     current_date = start_date
+    while current_date < end_date:
+        next_year = current_date.replace(
+            year=current_date.year + 1,
+            month=1,
+            day=1,
+            hour=0,
+            minute=0,
+            second=0,
+            microsecond=0,
+        )
+        next_date = min(next_year, end_date)
+        yield current_date, next_date
+        current_date = next_date
+
+
+class WindowPlanner:
+    """Size GDACS request windows from the result count of the previous one.
+
+    Dense periods (e.g. flood seasons) get narrower windows and sparse years get
+    wider ones, so that each request returns roughly ``target_events`` events.
+    A window whose response reaches ``truncation_limit`` events is assumed to
+    be incomplete and is bisected.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        initial_interval: timedelta = WINDOW_INTERVAL,
+        min_interval: timedelta = MIN_WINDOW_INTERVAL,
+        max_interval: timedelta = MAX_WINDOW_INTERVAL,
+        target_events: int = TARGET_EVENTS_PER_WINDOW,
+        truncation_limit: int = TRUNCATION_LIMIT,
+        max_growth: float = 2.0,
+    ) -> None:
+        """Initialise the planner.
+
+        Args:
+            initial_interval (timedelta): The length of the first window.
+            min_interval (timedelta): The shortest window, which is never bisected.
+            max_interval (timedelta): The longest window.
+            target_events (int): The number of events aimed for per window.
+            truncation_limit (int): The event count from which a response is
+            considered truncated.
+            max_growth (float): The largest factor a window may grow or shrink
+            by from one window to the next.
+        """
+        self.initial_interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_events = target_events
+        self.truncation_limit = truncation_limit
+        self.max_growth = max_growth
+
+    def is_truncated(self, count: int) -> bool:
+        """Return whether a response of ``count`` events is likely truncated."""
+        return count >= self.truncation_limit
+
+    def can_bisect(self, start_date: datetime, end_date: datetime) -> bool:
+        """Return whether a window is long enough to be split in two."""
+        return end_date - start_date >= 2 * self.min_interval
+
+    def next_interval(self, interval: timedelta, count: int) -> timedelta:
+        """Return the length of the window following one of ``count`` events.
+
+        Args:
+            interval (timedelta): The length of the previous window.
+            count (int): The number of events the previous window returned.
+
+        Returns:
+            timedelta: The length of the next window.
+        """
+        if count:
+            scale = self.target_events / count
+            scale = max(1 / self.max_growth, min(self.max_growth, scale))
+        else:
+            scale = self.max_growth
+        return max(self.min_interval, min(self.max_interval, interval * scale))
+
+
+def fetch_bisecting(  # noqa: PLR0913
+    start_date: datetime,
+    end_date: datetime,
+    event_type: str,
+    planner: WindowPlanner,
+    session: requests.Session | None = None,
+    rate_limiter: RateLimiter | None = None,
+) -> list[dict]:
+    """Fetch a window, splitting it in two while the response looks truncated.
+
+    Args:
+        start_date (datetime): The start of the window.
+        end_date (datetime): The end of the window.
+        event_type (str): The GDACS event type code, e.g. 'EQ'.
+        planner (WindowPlanner): The planner deciding when to bisect.
+        session (requests.Session | None): An optional session to reuse.
+        rate_limiter (RateLimiter | None): An optional request rate limiter.
+
+    Returns:
+        list[dict]: The events found in the window.
+    """
+    events = fetch_events(start_date, end_date, event_type, session, rate_limiter)
+    if not planner.is_truncated(len(events)):
+        return events
+    if not planner.can_bisect(start_date, end_date):
+        logging.warning(
+            "%d %s events from %s to %s may be truncated",
+            len(events),
+            event_type,
+            start_date.date(),
+            end_date.date(),
+        )
+        return events
+
+    middle_date = start_date + (end_date - start_date) / 2
+    logging.info(
+        "Bisecting %s window %s to %s (%d events)",
+        event_type,
+        start_date.date(),
+        end_date.date(),
+        len(events),
+    )
+    halves = fetch_bisecting(
+        start_date,
+        middle_date,
+        event_type,
+        planner,
+        session,
+        rate_limiter,
+    ) + fetch_bisecting(
+        middle_date,
+        end_date,
+        event_type,
+        planner,
+        session,
+        rate_limiter,
+    )
+    # Events overlapping the split date are returned by both halves.
+    unique_events = {}
+    for event in halves:
+        unique_events.setdefault(event["event_id"], event)
+    return list(unique_events.values())
+
+
+def fetch_adaptive(  # noqa: PLR0913
+    start_date: datetime,
+    end_date: datetime,
+    event_type: str,
+    planner: WindowPlanner,
+    session: requests.Session | None = None,
+    rate_limiter: RateLimiter | None = None,
+) -> list[dict]:
+    """Fetch all events of a date range with adaptively sized windows.
+
+    Args:
+        start_date (datetime): The start of the range.
+        end_date (datetime): The end of the range.
+        event_type (str): The GDACS event type code, e.g. 'EQ'.
+        planner (WindowPlanner): The planner sizing the windows.
+        session (requests.Session | None): An optional session to reuse.
+        rate_limiter (RateLimiter | None): An optional request rate limiter.
 
+    Returns:
+        list[dict]: The events found in the range.
+
+    Raises:
+        IncompleteLaneError: If a window could not be fetched. The windows
+        after it are not fetched, and a failed window does not widen the next.
+    """
+    events = []
+    interval = planner.initial_interval
+    current_date = start_date
     while current_date < end_date:
         next_date = min(current_date + interval, end_date)
         try:
-            for event_type in event_types:
-                events = fetch_events(current_date, next_date, event_type)
+            window_events = fetch_bisecting(
+                current_date,
+                next_date,
+                event_type,
+                planner,
+                session,
+                rate_limiter,
+            )
+        except requests.RequestException as error:
+            raise IncompleteLaneError(events, current_date) from error
+        events.extend(window_events)
+        interval = planner.next_interval(next_date - current_date, len(window_events))
+        current_date = next_date
+    return events
+
+
+def add_year_column(events_df: pd.DataFrame) -> pd.DataFrame:
+    """Add the ``year`` column used to partition GDACS events into files.
+
+    Args:
+        events_df (pd.DataFrame): The events with a ``from_date`` column.
+
+    Returns:
+        pd.DataFrame: The events with an added nullable integer ``year`` column.
+    """
+    events_df["year"] = pd.to_datetime(
+        events_df["from_date"],
+        errors="coerce",
+    ).dt.year.astype("Int64")
+    return events_df
+
+
+class YearlyCsvWriter:
+    """Stream GDACS events into ``gdacs_events_{year}.csv`` files.
+
+    Events are appended to the file of their start year as soon as they are
+    written, so only the batch currently being written is held in memory.
+    Files are truncated the first time they are touched in a run.
+    """
+
+    def __init__(self, output_dir: str) -> None:
+        """Initialise the writer.
+
+        Args:
+            output_dir (str): The directory the yearly CSV files are written to.
+        """
+        self.partitions = PartitionedCsvWriter(output_dir, "gdacs_events_{}.csv")
+        self.seen_event_ids: dict[str, set] = {}
+
+    def __enter__(self) -> "YearlyCsvWriter":
+        """Return the writer for use as a context manager."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Log a summary of the files written."""
+        for year, count in sorted(self.partitions.counts.items()):
+            logging.info(
+                "Saved %d events to %s",
+                count,
+                self.partitions.path_for(year),
+            )
+
+    @property
+    def total(self) -> int:
+        """The number of events written so far."""
+        return sum(self.partitions.counts.values())
+
+    def write(self, events: list[dict]) -> None:
+        """Append a batch of events to the matching yearly files.
+
+        Args:
+            events (list[dict]): The events returned by ``fetch_events``.
+        """
+        events_df = add_year_column(pd.DataFrame(events))
+        for event_type, event_ids in events_df.groupby("event_type")["event_id"]:
+            self.seen_event_ids.setdefault(event_type, set()).update(event_ids.tolist())
+        self.partitions.write(events_df, "year")
+
+
+def harvest(
+    tasks: Iterable[tuple[datetime, datetime, str]],
+    writer: YearlyCsvWriter | BatchAccumulator,
+    planner: WindowPlanner | None = None,
+    max_workers: int = MAX_WORKERS,
+    requests_per_second: float = REQUESTS_PER_SECOND,
+) -> dict[str, datetime]:
+    """Fetch GDACS date ranges concurrently and stream the results to ``writer``.
+
+    Each task is a lane fetched by ``fetch_adaptive``, which walks the range
+    with windows sized by ``planner``. At most ``2 * max_workers`` lanes are in
+    flight at any time, so memory stays bounded regardless of the length of
+    the date range.
+
+    Args:
+        tasks (Iterable[tuple[datetime, datetime, str]]): The
+        ``(from, to, event_type)`` ranges to fetch.
+        writer (YearlyCsvWriter | BatchAccumulator): The writer receiving each
+        completed range.
+        planner (WindowPlanner | None): The planner sizing the request windows.
+        Defaults to a ``WindowPlanner`` with the module settings.
+        max_workers (int): The number of concurrent requests.
+        requests_per_second (float): The request rate allowed to the GDACS host.
+
+    Returns:
+        dict[str, datetime]: For each event type with a failed range, the
+        earliest date from which its events could not be fetched.
+    """
+    planner = planner or WindowPlanner()
+    failures: dict[str, datetime] = {}
+
+    def record_failure(event_type: str, failed_date: datetime) -> None:
+        failures[event_type] = min(failures.get(event_type, failed_date), failed_date)
+
+    session = build_session(
+        pool_size=max_workers,
+        retries=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+    )
+    rate_limiter = RateLimiter(requests_per_second, burst=max_workers)
+    task_iter = iter(tasks)
+    pending: dict[Future, tuple[datetime, datetime, str]] = {}
+
+    with session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def submit_next() -> None:
+            for task in task_iter:
+                future = executor.submit(
+                    fetch_adaptive,
+                    *task,
+                    planner,
+                    session,
+                    rate_limiter,
+                )
+                pending[future] = task
+                if len(pending) >= 2 * max_workers:
+                    return
+
+        submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                start_date, end_date, event_type = pending.pop(future)
+                try:
+                    events = future.result()
+                except IncompleteLaneError as error:
+                    logging.warning(
+                        "Fetching %s events stopped at %s, to be retried",
+                        event_type,
+                        error.resume_date.date(),
+                    )
+                    events = error.events
+                    record_failure(event_type, error.resume_date)
+                except Exception:
+                    logging.exception(
+                        "Unexpected error occurred while processing %s events "
+                        "from %s to %s",
+                        event_type,
+                        start_date.date(),
+                        end_date.date(),
+                    )
+                    record_failure(event_type, start_date)
+                    continue
                 if events:
-                    events_df = pd.DataFrame(events)
-                    all_data = pd.concat([all_data, events_df], ignore_index=True)
+                    writer.write(events)
                 else:
                     logging.info(
                         "No events found for %s from %s to %s",
                         event_type,
-                        current_date.date(),
-                        next_date.date(),
+                        start_date.date(),
+                        end_date.date(),
                     )
-        except Exception:
-            logging.exception(
-                "Unexpected error occurred while processing events from %s to %s",
-                current_date.date(),
-                next_date.date(),
-            )
-        current_date = next_date
+            submit_next()
+    return failures
+
+
+def sync_state_path(event_type: str) -> pathlib.Path:
+    """Return the path of the sync state file of an event type.
+
+    Args:
+        event_type (str): The GDACS event type code, e.g. 'EQ'.
 
-    if not all_data.empty:
-        all_data["year"] = pd.to_datetime(
-            all_data["from_date"],
-            errors="coerce",
-        ).dt.year
-        for year, group in all_data.groupby("year"):
-            output_file = pathlib.Path(OUTPUT_DIR) / f"gdacs_events_{year}.csv"
-            group.to_csv(output_file, index=False)
-            logging.info("Saved %d events to %s", len(group), output_file)
+    Returns:
+        pathlib.Path: The path of the JSON state file.
+    """
+    return pathlib.Path(SYNC_STATE_DIR) / f"{event_type}.json"
+
+
+def load_sync_state(event_type: str) -> dict:
+    """Load the sync state of an event type.
+
+    The state records the ``to_date`` of the last fetched window and the IDs of
+    the events already downloaded.
+
+    Args:
+        event_type (str): The GDACS event type code, e.g. 'EQ'.
+
+    Returns:
+        dict: The state, or an empty dict if the event type was never synced.
+    """
+    state_file = sync_state_path(event_type)
+    if not state_file.exists():
+        return {}
+    with state_file.open() as fh:
+        return json.load(fh)
+
+
+def save_sync_state(
+    event_type: str,
+    last_to_date: datetime,
+    seen_event_ids: set,
+) -> None:
+    """Persist the sync state of an event type.
+
+    Args:
+        event_type (str): The GDACS event type code, e.g. 'EQ'.
+        last_to_date (datetime): The date up to which all windows were
+        fetched.
+        seen_event_ids (set): The IDs of all events downloaded so far.
+    """
+    state_file = sync_state_path(event_type)
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = state_file.with_suffix(".tmp")
+    with tmp_file.open("w") as fh:
+        json.dump(
+            {
+                "last_to_date": last_to_date.isoformat(),
+                "seen_event_ids": sorted(seen_event_ids, key=str),
+            },
+            fh,
+        )
+    tmp_file.replace(state_file)
+
+
+def merge_into_yearly_csvs(events_df: pd.DataFrame, output_dir: str) -> list[int]:
+    """Merge events into the existing ``gdacs_events_{year}.csv`` files.
+
+    Events already present in a file are replaced by their fresh version. Only
+    the years that received events are rewritten.
+
+    Args:
+        events_df (pd.DataFrame): The freshly fetched events.
+        output_dir (str): The directory holding the yearly CSV files.
+
+    Returns:
+        list[int]: The years whose files were rewritten.
+    """
+    events_df = add_year_column(events_df)
+    years = []
+    for year, group in events_df.groupby("year"):
+        output_file = pathlib.Path(output_dir) / f"gdacs_events_{year}.csv"
+        merged = group
+        if output_file.exists():
+            existing = pd.read_csv(output_file)
+            merged = pd.concat([existing, group], ignore_index=True)
+        merged = merged.drop_duplicates(
+            subset=["event_id", "event_type"],
+            keep="last",
+        )
+        merged.to_csv(output_file, index=False)
+        logging.info("Saved %d events to %s", len(merged), output_file)
+        years.append(year)
+    return years
+
+
+def sync(end_date: datetime | None = None) -> None:
+    """Fetch only the windows changed since the last run and merge them.
+
+    Each event type resumes from its recorded ``last_to_date`` minus
+    ``DELTA_LOOKBACK``. Event types that were never synced are fetched from
+    ``START_DATE``. A failed window keeps ``last_to_date`` at its start, but
+    never before the recorded one, so failing runs do not move it back by the
+    lookback.
+
+    Args:
+        end_date (datetime | None): The end of the sync range. Defaults to now.
+    """
+    end_date = end_date or datetime.now(tz=timezone.utc)
+    states = {event_type: load_sync_state(event_type) for event_type in EVENT_TYPES}
+
+    tasks = []
+    synced_until = {}
+    for event_type, state in states.items():
+        since = START_DATE
+        if state.get("last_to_date"):
+            synced_until[event_type] = datetime.fromisoformat(state["last_to_date"])
+            since = max(START_DATE, synced_until[event_type] - DELTA_LOOKBACK)
+        tasks.extend(
+            (lane_start, lane_end, event_type)
+            for lane_start, lane_end in iter_year_lanes(since, end_date)
+        )
+    logging.info("Delta sync: %d ranges to fetch", len(tasks))
+
+    accumulator = BatchAccumulator()
+    failures = harvest(tasks, accumulator)
+
+    if len(accumulator):
+        events_df = accumulator.to_frame()
+        years = merge_into_yearly_csvs(events_df, OUTPUT_DIR)
+        logging.info("Rewrote years: %s", ", ".join(map(str, years)))
     else:
+        events_df = pd.DataFrame(columns=["event_type", "event_id"])
+        logging.info("No new events found.")
+
+    for event_type, state in states.items():
+        seen_event_ids = set(state.get("seen_event_ids", []))
+        fetched_ids = set(
+            events_df.loc[events_df["event_type"] == event_type, "event_id"].tolist(),
+        )
+        logging.info(
+            "%s: %d new, %d updated events",
+            event_type,
+            len(fetched_ids - seen_event_ids),
+            len(fetched_ids & seen_event_ids),
+        )
+        # A failed window keeps the mark before it, so the next run refetches it.
+        last_to_date = failures.get(event_type, end_date)
+        if event_type in synced_until:
+            last_to_date = max(last_to_date, synced_until[event_type])
+        save_sync_state(event_type, last_to_date, seen_event_ids | fetched_ids)
+
+
+def main() -> None:
+    """Main function to fetch GDACS events and save them to CSV files."""
+    tasks = (
+        (lane_start, lane_end, event_type)
+        for lane_start, lane_end in iter_year_lanes(START_DATE, END_DATE)
+        for event_type in EVENT_TYPES
+    )
+
+    with YearlyCsvWriter(OUTPUT_DIR) as writer:
+        failures = harvest(tasks, writer)
+
+    if not writer.total:
         logging.info("No data found.")
 
+    for event_type in EVENT_TYPES:
+        save_sync_state(
+            event_type,
+            failures.get(event_type, END_DATE),
+            writer.seen_event_ids.get(event_type, set()),
+        )
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Only fetch windows changed since the last run and merge them.",
+    )
+    args = parser.parse_args()
+    if args.delta:
+        sync()
+    else:
+        main()
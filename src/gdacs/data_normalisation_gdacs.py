@@ -1,15 +1,15 @@
 """Gdacs data normalisation script."""
 
-import ast
 import json
 import re
 from pathlib import Path
 
 import pandas as pd
-import pycountry
 
 from src.data_consolidation.dictionary import GDACS_MAPPING
 from src.utils.azure_blob_utils import combine_csvs_from_blob_dir
+from src.utils.country_resolver import get_country_resolver
+from src.utils.intermediate_io import write_intermediate
 from src.utils.util import (
     change_data_type,
     map_and_drop_columns,
@@ -17,7 +17,12 @@ from src.utils.util import (
 )
 
 EVENT_CODE_CSV = "./static_data/event_code_table.csv"
-COORDINATE_PAIR_LENGTH = 2
+COORDINATE_PAIR_PATTERN = re.compile(
+    r"^\s*\[\s*(?P<lon>[^,\[\]\s]+)\s*,\s*(?P<lat>[^,\[\]\s]+)\s*\]\s*$",
+)
+EVENT_NAME_COUNTRY_PATTERN = re.compile(r"\bin\s+([A-Za-z0-9\s\(\)-]+)$")
+COUNTRY_CODE_PATTERN = re.compile(r"\(([^)]*)\)")
+TRAILING_PARENTHESES_PATTERN = re.compile(r"\s*\([^)]*\)$")
 SCHEMA_PATH_GDACS = "./src/gdacs/gdacs_schema.json"
 
 
@@ -41,6 +46,9 @@ def split_coordinates(
 ) -> pd.DataFrame:
     """Splits a DataFrame column containing coordinate pairs.
 
+    The pairs are ``[lon, lat]`` lists, or their string form as read back from
+    CSV. Cells that are not a pair of numbers give missing coordinates.
+
     Args:
         df (pd.DataFrame): The input DataFrame containing the coordinates.
         coord_col (str): The name of the column with coordinate pairs.
@@ -54,25 +62,13 @@ def split_coordinates(
         pd.DataFrame: The DataFrame with added latitude and longitude columns.
     """
     if coord_col in df.columns:
-        df[coord_col] = df[coord_col].apply(
-            lambda x: ast.literal_eval(x)
-            if isinstance(x, str) and x.startswith("[")
-            else x,
-        )
-        df[lat_col] = df[coord_col].apply(
-            lambda x: x[1]
-            if isinstance(x, list) and len(x) == COORDINATE_PAIR_LENGTH
-            else None,
-        )
-        df[lon_col] = df[coord_col].apply(
-            lambda x: x[0]
-            if isinstance(x, list) and len(x) == COORDINATE_PAIR_LENGTH
-            else None,
-        )
+        pairs = df[coord_col].astype("string").str.extract(COORDINATE_PAIR_PATTERN)
+        df[lat_col] = pd.to_numeric(pairs["lat"], errors="coerce")
+        df[lon_col] = pd.to_numeric(pairs["lon"], errors="coerce")
     return df
 
 
-def enrich_country_data(df: pd.DataFrame) -> pd.DataFrame:  # noqa: C901
+def enrich_country_data(df: pd.DataFrame) -> pd.DataFrame:
     """Enriches the given DataFrame with country data.
 
     This function performs the following operations:
@@ -88,53 +84,34 @@ def enrich_country_data(df: pd.DataFrame) -> pd.DataFrame:  # noqa: C901
         'Country' and 'Country_Code' columns.
     """
     if "Country" in df.columns and "Event_Name" in df.columns:
-
-        def extract_country_from_event_name(row: str) -> str:
-            if pd.isna(row["Country"]) and isinstance(row["Event_Name"], str):
-                match = re.search(r"\bin\s+([A-Za-z0-9\s\(\)-]+)$", row["Event_Name"])
-                if match:
-                    return match.group(1).strip()
-            return row["Country"]
-
-        df["Country"] = df.apply(extract_country_from_event_name, axis=1)
+        from_event_name = (
+            df["Event_Name"]
+            .astype("string")
+            .str.extract(EVENT_NAME_COUNTRY_PATTERN)[0]
+            .str.strip()
+        )
+        df["Country"] = df["Country"].where(df["Country"].notna(), from_event_name)
 
     if "Country" in df.columns and "Country_Code" in df.columns:
+        from_country = (
+            df["Country"].astype("string").str.extract(COUNTRY_CODE_PATTERN)[0]
+        ).str.strip()
+        df["Country_Code"] = df["Country_Code"].where(
+            df["Country_Code"].notna(),
+            from_country,
+        )
+        df["Country"] = df["Country"].str.replace(
+            TRAILING_PARENTHESES_PATTERN,
+            "",
+            regex=True,
+        )
 
-        def maybe_extract_country_code(row: str) -> str:
-            if pd.isna(row["Country_Code"]) and isinstance(row["Country"], str):
-                match = re.search(r"\(([^)]*)\)", row["Country"])
-                if match:
-                    return match.group(1).strip()
-            return row["Country_Code"]
-
-        df["Country_Code"] = df.apply(maybe_extract_country_code, axis=1)
-        df["Country"] = df["Country"].str.replace(r"\s*\([^)]*\)$", "", regex=True)
-
-    def get_iso3_from_country_name(country_name: str) -> None:
-        """Convert a country name to its ISO 3166-1 alpha-3 country code.
-
-        Args:
-            country_name (str): The name of the country to convert.
-
-        Returns:
-            str or None: The ISO 3166-1 alpha-3 country code if found, otherwise None.
-        """
-        if country_name and isinstance(country_name, str):
-            try:
-                matches = pycountry.countries.search_fuzzy(country_name)
-                if matches:
-                    return matches[0].alpha_3
-            except LookupError:
-                return None
-        return None
-
-    if "Country" in df.columns and "Country_Code" in df.columns:
-        df["Country_Code"] = df.apply(
-            lambda row: row["Country_Code"]
-            if pd.notna(row["Country_Code"])
-            else get_iso3_from_country_name(row["Country"]),
-            axis=1,
+        missing = df["Country_Code"].isna().to_numpy()
+        country_codes = df["Country_Code"].astype(object)
+        country_codes[missing] = (
+            get_country_resolver().resolve_column(df["Country"][missing]).to_numpy()
         )
+        df["Country_Code"] = country_codes
 
     return df
 
@@ -171,9 +148,7 @@ def main() -> None:
     ]
     final_columns_order = ordered_columns + remaining_columns
     cleaned2_gdacs_df = cleaned2_gdacs_df[final_columns_order]
-    Path("./data_mid_1/gdacs/").mkdir(parents=True, exist_ok=True)
-    output_file_path = "./data_mid_1/gdacs/gdacs_mid1.csv"
-    cleaned2_gdacs_df.to_csv(output_file_path, index=False)
+    write_intermediate(cleaned2_gdacs_df, "./data_mid_1/gdacs/gdacs_mid1")
 
 
 if __name__ == "__main__":
@@ -1,10 +1,17 @@
-"""Data acquisition script for Glide Number using Selenium and BeautifulSoup."""
+"""Data acquisition script for Glide Number using Selenium and a streaming parser."""
 
+import argparse
+import logging
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, timezone
+from html.parser import HTMLParser
 from pathlib import Path
 
 import pandas as pd
-from bs4 import BeautifulSoup
+import pyarrow as pa
+import pyarrow.parquet as pq
 from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.firefox.service import Service as FirefoxService
@@ -23,83 +30,369 @@ PROFILE_PATH = (
 Path("./data/glide/").mkdir(parents=True, exist_ok=True)
 CSV_OUTPUT = "./data/glide/glide_events.csv"
 
-def scrape_with_selenium() -> str:
-    """Use Selenium to interact with the Glide Number website and return the rendered.
+DATA_TABLE_ATTRS = {
+    "cellspacing": "1",
+    "cellpadding": "1",
+    "border": "1",
+    "width": "100%",
+}
+CHUNK_ROWS = 10_000
+FEED_SIZE = 1 << 20
 
-    HTML as a string.
-    """
+# Year-by-year acquisition
+CHUNKS_DIR = "./data/glide/chunks/"
+YEAR_FROM = 1930
+MAX_ATTEMPTS = 3
+CHUNK_TIMEOUT = 120
+# Names of the (year, month, day) fields of the report form's date filter
+DATE_FIELDS = (
+    ("fromyear", "frommonth", "fromday"),
+    ("toyear", "tomonth", "today"),
+)
+
+def create_driver() -> webdriver.Firefox:
+    """Start a Firefox session using the persistent Selenium profile."""
     options = FirefoxOptions()
     options.headless = False # type: ignore[attr-defined]
     options.add_argument("-profile")
     options.add_argument(PROFILE_PATH)
 
     service = FirefoxService(GECKODRIVER_PATH)
-    driver = webdriver.Firefox(service=service, options=options)
+    return webdriver.Firefox(service=service, options=options)
 
-    try:
-        driver.get(URL)
 
-        WebDriverWait(driver, 20).until(
-            ec.presence_of_element_located((By.NAME, "variables")),
-        )
+def set_date_fields(
+    driver: webdriver.Firefox,
+    date_range: tuple[date, date],
+) -> None:
+    """Fill the date filter of the report form.
+
+    Raises:
+        ValueError: If a field of ``DATE_FIELDS`` is missing from the form or
+            does not take its value, since the report would then silently
+            cover the whole catalogue.
+    """
+    missing = [
+        name
+        for fields in DATE_FIELDS
+        for name in fields
+        if not driver.find_elements(By.NAME, name)
+    ]
+    if missing:
+        error_message = f"GLIDE report form has no date fields {missing}"
+        raise ValueError(error_message)
+
+    for fields, day in zip(DATE_FIELDS, date_range, strict=True):
+        for name, value in zip(fields, (day.year, day.month, day.day), strict=True):
+            field = driver.find_element(By.NAME, name)
+            driver.execute_script(
+                "arguments[0].value = arguments[1];",
+                field,
+                str(value),
+            )
+            if field.get_attribute("value") != str(value):
+                error_message = f"GLIDE report field {name} rejected value {value}"
+                raise ValueError(error_message)
+
+
+def request_report(
+    driver: webdriver.Firefox,
+    date_range: tuple[date, date] | None = None,
+    timeout: int = 60,
+) -> str:
+    """Submit the report form and return the rendered results page.
+
+    Args:
+        driver: The browser session to use.
+        date_range: The first and last event dates to report. ``None`` requests
+            the whole catalogue.
+        timeout: Seconds to wait for the results table.
+
+    Raises:
+        ValueError: If the date filter cannot be set, see ``set_date_fields``.
+    """
+    driver.get(URL)
+
+    WebDriverWait(driver, 20).until(
+        ec.presence_of_element_located((By.NAME, "variables")),
+    )
+
+    variables_field = driver.find_element(By.NAME, "variables")
+    for option in variables_field.find_elements(By.TAG_NAME, "option"):
+        driver.execute_script("arguments[0].selected = true;", option)
 
-        variables_field = driver.find_element(By.NAME, "variables")
-        for option in variables_field.find_elements(By.TAG_NAME, "option"):
-            driver.execute_script("arguments[0].selected = true;", option)
+    if date_range is not None:
+        set_date_fields(driver, date_range)
 
-        unlimited_checkbox = driver.find_element(By.NAME, "unlimited")
-        if not unlimited_checkbox.is_selected():
-            unlimited_checkbox.click()
+    unlimited_checkbox = driver.find_element(By.NAME, "unlimited")
+    if not unlimited_checkbox.is_selected():
+        unlimited_checkbox.click()
 
-        continue_button = driver.find_element(By.NAME, "continueReport")
-        continue_button.click()
+    continue_button = driver.find_element(By.NAME, "continueReport")
+    continue_button.click()
 
-        WebDriverWait(driver, 60).until(
-            ec.presence_of_element_located(
-                (
-                    By.XPATH,
-                    "//table[@border='1' and @width='100%']//tr",
-                ),
+    WebDriverWait(driver, timeout).until(
+        ec.presence_of_element_located(
+            (
+                By.XPATH,
+                "//table[@border='1' and @width='100%']//tr",
             ),
-        )
+        ),
+    )
 
-        return driver.page_source
+    return driver.page_source
+
+
+def scrape_with_selenium() -> str:
+    """Use Selenium to interact with the Glide Number website and return the rendered.
 
+    HTML as a string.
+    """
+    driver = create_driver()
+    try:
+        return request_report(driver)
     finally:
         driver.quit()
 
-def parse_html_to_dataframe(html: str) -> pd.DataFrame:
-    """Parse the rendered HTML using BS and return the data as a DataFrame."""
-    soup = BeautifulSoup(html, "html.parser")
-
-    data_table = soup.find(
-        "table",
-        {
-            "cellspacing": "1",
-            "cellpadding": "1",
-            "border": "1",
-            "width": "100%",
-        },
-    )
-    if not data_table:
-        return pd.DataFrame()
 
-    headers = [th.text.strip() for th in data_table.find_all("th")] # type: ignore[attr-defined]
+def scrape_by_year(
+    years: Iterable[int],
+    chunks_dir: str = CHUNKS_DIR,
+    max_attempts: int = MAX_ATTEMPTS,
+) -> list[int]:
+    """Scrape the report one year at a time in a single browser session.
+
+    Each year is written to ``glide_events_{year}.csv`` in ``chunks_dir`` as soon
+    as it arrives. Years that fail are retried, alone, in up to
+    ``max_attempts`` passes; the browser is restarted if it crashed.
+
+    Returns:
+        The years that still failed after the last attempt.
+    """
+    Path(chunks_dir).mkdir(parents=True, exist_ok=True)
+    pending = list(years)
+    driver = create_driver()
+    try:
+        for attempt in range(1, max_attempts + 1):
+            failed = []
+            for year in pending:
+                chunk_path = Path(chunks_dir) / f"glide_events_{year}.csv"
+                tmp_path = chunk_path.with_suffix(".tmp")
+                try:
+                    html = request_report(
+                        driver,
+                        (date(year, 1, 1), date(year, 12, 31)),
+                        timeout=CHUNK_TIMEOUT,
+                    )
+                    rows = parse_html_to_file(iter_html_chunks(html), str(tmp_path))
+                except WebDriverException:
+                    logging.exception(
+                        "GLIDE year %d failed (attempt %d)",
+                        year,
+                        attempt,
+                    )
+                    failed.append(year)
+                    try:
+                        driver.current_url  # noqa: B018
+                    except WebDriverException:
+                        driver.quit()
+                        driver = create_driver()
+                    continue
+                if rows:
+                    tmp_path.replace(chunk_path)
+                else:
+                    # Drop the chunk of an earlier run, so it is not combined.
+                    chunk_path.unlink(missing_ok=True)
+                    tmp_path.unlink(missing_ok=True)
+                logging.info("GLIDE year %d: %d events", year, rows)
+            pending = failed
+            if not pending:
+                break
+    finally:
+        driver.quit()
+    return pending
+
+
+def combine_year_chunks(chunks_dir: str, output_file: str) -> int:
+    """Concatenate the yearly chunk files into ``output_file``, oldest first."""
+    total = 0
+    chunk_files = sorted(Path(chunks_dir).glob("glide_events_*.csv"))
+    for chunk_file in chunk_files:
+        chunk_df = pd.read_csv(chunk_file, dtype=str, keep_default_na=False)
+        chunk_df.to_csv(
+            output_file,
+            mode="a" if total else "w",
+            header=not total,
+            index=False,
+        )
+        total += len(chunk_df)
+    return total
+
+
+class GlideTableParser(HTMLParser):
+    """Event-based parser extracting the GLIDE results table row by row.
+
+    Only the current row is kept while parsing; completed rows are queued in
+    ``rows`` until the caller drains them, so the document is never built into
+    a tree.
+    """
+
+    def __init__(self) -> None:
+        """Initialise the parser."""
+        super().__init__(convert_charrefs=True)
+        self.headers: list[str] = []
+        self.rows: list[list[str]] = []
+        self._table_depth = 0
+        self._row_index = -1
+        self._cells: list[str] | None = None
+        self._text: list[str] | None = None
+        self._in_header = False
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        """Track the data table, its rows and cells."""
+        if tag == "table":
+            if self._table_depth:
+                self._table_depth += 1
+            elif all(dict(attrs).get(k) == v for k, v in DATA_TABLE_ATTRS.items()):
+                self._table_depth = 1
+            return
+        if not self._table_depth:
+            return
+        if tag == "tr":
+            self._end_row()
+            self._row_index += 1
+            self._cells = []
+        elif tag in ("td", "th"):
+            self._end_cell()
+            self._text = []
+            self._in_header = tag == "th"
+
+    def handle_endtag(self, tag: str) -> None:
+        """Close cells, rows and the data table."""
+        if not self._table_depth:
+            return
+        if tag == "table":
+            self._table_depth -= 1
+            if not self._table_depth:
+                self._end_row()
+        elif tag == "tr":
+            self._end_row()
+        elif tag in ("td", "th"):
+            self._end_cell()
+
+    def handle_data(self, data: str) -> None:
+        """Collect the text of the current cell."""
+        if self._text is not None:
+            self._text.append(data)
+
+    def _end_cell(self) -> None:
+        if self._text is None:
+            return
+        text = "".join(self._text).strip()
+        if self._in_header:
+            self.headers.append(text)
+        elif self._cells is not None:
+            self._cells.append(text)
+        self._text = None
 
-    rows = []
-    for tr in data_table.find_all("tr")[1:]: # type: ignore[union-attr]
-        cells = [td.text.strip() for td in tr.find_all("td")] # type: ignore[attr-defined]
-        # Filter out rows like "Hits:0"
-        if len(cells) == len(headers) and not any("Hits:" in cell for cell in cells):
-            rows.append(cells)
+    def _end_row(self) -> None:
+        self._end_cell()
+        cells, self._cells = self._cells, None
+        # The first row holds the headers; filter out rows like "Hits:0"
+        if (
+            cells is not None
+            and self._row_index > 0
+            and len(cells) == len(self.headers)
+            and not any("Hits:" in cell for cell in cells)
+        ):
+            self.rows.append(cells)
 
-    return pd.DataFrame(rows, columns=headers)
+
+def iter_html_chunks(html: str, size: int = FEED_SIZE) -> Iterator[str]:
+    """Split an HTML string into slices to feed an incremental parser."""
+    for start in range(0, len(html), size):
+        yield html[start : start + size]
+
+
+def iter_table_chunks(
+    html_chunks: Iterable[str],
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """Stream the GLIDE results table as DataFrames of ``chunk_rows`` rows."""
+    parser = GlideTableParser()
+    for html_chunk in html_chunks:
+        parser.feed(html_chunk)
+        while len(parser.rows) >= chunk_rows:
+            rows, parser.rows = parser.rows[:chunk_rows], parser.rows[chunk_rows:]
+            yield pd.DataFrame(rows, columns=parser.headers)
+    parser.close()
+    if parser.rows:
+        yield pd.DataFrame(parser.rows, columns=parser.headers)
+
+
+def parse_html_to_file(
+    html_chunks: Iterable[str],
+    output_path: str,
+    chunk_rows: int = CHUNK_ROWS,
+) -> int:
+    """Stream the GLIDE results table to CSV, or to Parquet for ``.parquet`` paths.
+
+    Nothing is written when the table has no rows. Returns the number of rows.
+    """
+    total = 0
+    parquet_writer = None
+    try:
+        for chunk in iter_table_chunks(html_chunks, chunk_rows):
+            if output_path.endswith(".parquet"):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(output_path, table.schema)
+                parquet_writer.write_table(table)
+            else:
+                chunk.to_csv(
+                    output_path,
+                    mode="a" if total else "w",
+                    header=not total,
+                    index=False,
+                )
+            total += len(chunk)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+    return total
+
+
+def parse_html_to_dataframe(html: str) -> pd.DataFrame:
+    """Parse the rendered HTML and return the data as a DataFrame."""
+    chunks = list(iter_table_chunks(iter_html_chunks(html)))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
 
 if __name__ == "__main__":
-    rendered_html = scrape_with_selenium()
-    data_df = parse_html_to_dataframe(rendered_html)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--unlimited",
+        action="store_true",
+        help="Request the whole catalogue as one page instead of year by year.",
+    )
+    parser.add_argument(
+        "--since",
+        type=int,
+        default=YEAR_FROM,
+        help="First year to request; chunks of earlier years are kept as they are.",
+    )
+    args = parser.parse_args()
 
-    if not data_df.empty:
-        data_df.to_csv(CSV_OUTPUT, index=False)
+    if args.unlimited:
+        rendered_html = scrape_with_selenium()
+        parse_html_to_file(iter_html_chunks(rendered_html), CSV_OUTPUT)
     else:
-        pass
+        failed_years = scrape_by_year(
+            range(args.since, datetime.now(tz=timezone.utc).year + 1),
+        )
+        if failed_years:
+            # A partial combine would silently drop the events of these years.
+            logging.error("GLIDE years still failing: %s", failed_years)
+            raise SystemExit(1)
+        combine_year_chunks(CHUNKS_DIR, CSV_OUTPUT)
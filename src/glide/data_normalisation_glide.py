@@ -10,6 +10,7 @@ import pandas as pd
 
 from src.data_consolidation.dictionary import GLIDE_MAPPING
 from src.utils.azure_blob_utils import read_blob_to_dataframe
+from src.utils.intermediate_io import write_intermediate
 from src.utils.util import (
     change_data_type,
     map_and_drop_columns,
@@ -45,9 +46,7 @@ def main() -> None:
     final_columns_order = ordered_columns + remaining_columns
     cleaned2_glide_df = cleaned2_glide_df[final_columns_order]
 
-    Path("./data_mid_1/glide").mkdir(parents=True, exist_ok=True)
-    output_file_path = "./data_mid_1/glide/glide_mid1.csv"
-    cleaned2_glide_df.to_csv(output_file_path, index=False)
+    write_intermediate(cleaned2_glide_df, "./data_mid_1/glide/glide_mid1")
 
 
 if __name__ == "__main__":
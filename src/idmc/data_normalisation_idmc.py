@@ -2,13 +2,15 @@
 
 import json
 import logging
-import sys
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 import pandas as pd
 
 from src.data_consolidation.dictionary import IDMC_MAPPING
-from src.utils.azure_blob_utils import read_blob_to_json
+from src.utils.azure_blob_utils import iter_blob_chunks
+from src.utils.intermediate_io import IntermediateWriter
+from src.utils.json_stream import iter_json_array
 from src.utils.util import (
     change_data_type,
     map_and_drop_columns,
@@ -17,43 +19,107 @@ from src.utils.util import (
 
 SCHEMA_PATH_IDMC = "./src/idmc/idmc_schema.json"
 EVENT_CODE_CSV = "./static_data/event_code_table.csv"
+BATCH_SIZE = 50_000
+
+
+def get_field(record: dict, field: str) -> object:
+    """Return a field of an IDU record, following dotted paths into nested objects.
+
+    Args:
+        record (dict): The IDU record.
+        field (str): The field name, e.g. 'iso3' or 'event.name'.
+
+    Returns:
+        object: The field value, or None if it is missing.
+    """
+    value = record
+    for key in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def iter_idu_batches(
+    chunks: Iterable[bytes],
+    fields: list[str],
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Stream the IDU JSON dump as DataFrames holding only the given fields.
+
+    Args:
+        chunks (Iterable[bytes]): The raw bytes of the IDU JSON array.
+        fields (list[str]): The fields to keep.
+        batch_size (int): The number of records per DataFrame.
+
+    Yields:
+        pd.DataFrame: The next batch of records, one column per field.
+    """
+    columns: dict[str, list] = {field: [] for field in fields}
+    rows = 0
+    for record in iter_json_array(chunks):
+        for field in fields:
+            columns[field].append(get_field(record, field))
+        rows += 1
+        if rows == batch_size:
+            yield pd.DataFrame(columns)
+            columns = {field: [] for field in fields}
+            rows = 0
+    if rows:
+        yield pd.DataFrame(columns)
+
+
+def replace_semicolons(df: pd.DataFrame) -> pd.DataFrame:
+    """Replace ';' with '-' in all string values of a DataFrame.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to clean.
+
+    Returns:
+        pd.DataFrame: The DataFrame with non-string values left untouched.
+    """
+    for column in df.select_dtypes(include="object").columns:
+        try:
+            replaced = df[column].str.replace(";", "-", regex=False)
+        except AttributeError:
+            continue
+        df[column] = replaced.where(replaced.notna(), df[column])
+    return df
 
 
 def main() -> None:
     """Normalise IDMC data and save to CSV file."""
     blob_name = "disaster-impact/raw/idmc_idu/idus_all.json"
 
-    try:
-        data = read_blob_to_json(blob_name)
-    except Exception as e:
-        error_message = f"Error reading blob: {e}"
-        logging.exception(error_message)
-        sys.exit()
-
-    idmc_df_raw = pd.json_normalize(data)
-    idmc_df_raw = idmc_df_raw.apply(
-        lambda row: row.map(
-            lambda x: x.replace(";", "-") if isinstance(x, str) else x,
-        ),
-        axis=1,
-    )
-
     with Path(SCHEMA_PATH_IDMC).open() as schema_idmc:
         idmc_schema = json.load(schema_idmc)
 
-    cleaned1_df = map_and_drop_columns(idmc_df_raw, IDMC_MAPPING)
-    cleaned2_df = change_data_type(cleaned1_df, idmc_schema)
-    cleaned2_df["Date"] = pd.to_datetime(cleaned2_df["Date"], errors="coerce")
-    cleaned2_df = normalize_event_type(cleaned2_df, EVENT_CODE_CSV)
+    writer = IntermediateWriter("./data_mid_1/idmc_idu/idus_mid1")
+    fields = [field for field in IDMC_MAPPING.values() if field]
     schema_order = list(idmc_schema["properties"].keys())
-    ordered_columns = [col for col in schema_order if col in cleaned2_df.columns]
-    remaining_columns = [col for col in cleaned2_df.columns if col not in schema_order]
-    final_columns_order = ordered_columns + remaining_columns
-    cleaned2_df = cleaned2_df[final_columns_order]
-
-    Path("./data_mid_1/idmc_idu").mkdir(parents=True, exist_ok=True)
-    output_file_path = "./data_mid_1/idmc_idu/idus_mid1.csv"
-    cleaned2_df.to_csv(output_file_path, index=False)
+
+    try:
+        for idmc_df_raw in iter_idu_batches(iter_blob_chunks(blob_name), fields):
+            idmc_df_raw = replace_semicolons(idmc_df_raw)  # noqa: PLW2901
+
+            cleaned1_df = map_and_drop_columns(idmc_df_raw, IDMC_MAPPING)
+            cleaned2_df = change_data_type(cleaned1_df, idmc_schema)
+            cleaned2_df["Date"] = pd.to_datetime(cleaned2_df["Date"], errors="coerce")
+            cleaned2_df = normalize_event_type(cleaned2_df, EVENT_CODE_CSV)
+            ordered_columns = [
+                col for col in schema_order if col in cleaned2_df.columns
+            ]
+            remaining_columns = [
+                col for col in cleaned2_df.columns if col not in schema_order
+            ]
+            final_columns_order = ordered_columns + remaining_columns
+            cleaned2_df = cleaned2_df[final_columns_order]
+
+            writer.write(cleaned2_df)
+    except Exception:
+        logging.exception("Error normalising blob %s, output removed.", blob_name)
+        writer.discard()
+        raise
 
 
 if __name__ == "__main__":
@@ -11,6 +11,7 @@ import pandas as pd
 
 from src.data_consolidation.dictionary import IFRC_EME_MAPPING
 from src.utils.azure_blob_utils import read_blob_to_dataframe
+from src.utils.intermediate_io import write_intermediate
 from src.utils.util import (
     change_data_type,
     map_and_drop_columns,
@@ -63,9 +64,7 @@ def main() -> None:
     final_columns_order = ordered_columns + remaining_columns
     cleaned2_df = cleaned2_df[final_columns_order]
 
-    Path("./data_mid_1/ifrc_eme").mkdir(parents=True, exist_ok=True)
-    output_file_path = "./data_mid_1/ifrc_eme/ifrc_eme_mid1.csv"
-    cleaned2_df.to_csv(output_file_path, index=False)
+    write_intermediate(cleaned2_df, "./data_mid_1/ifrc_eme/ifrc_eme_mid1")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,468 @@
+"""Consolidate the data_prep tables of all sources into one unified table.
+
+Each source is described by a registered ``SourceAdapter``. In the default
+``sequential`` mode the engine seeds the combined events with the first source
+and matches every following source to them with ``add_new_source``. In the
+``graph`` mode the records of all sources are linked in one pass and grouped
+into connected components, independently of the source order. The result is
+written in the layout of the unified schema.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.unified.matching import (
+    add_new_source,
+    connected_components,
+    link_within_blocks,
+)
+from src.utils.intermediate_io import read_intermediate, write_intermediate
+from src.utils.splitter import OUTPUT_DIR as PREP_DIR
+from src.utils.util import STRING_DTYPE, compile_schema
+
+UNIFIED_SCHEMA_PATH = "./src/unified/unified_json_schema/unified_schema.json"
+UNIFIED_OUTPUT = "./data_out/unified/disaster_impact_unified"
+DATE_TOLERANCE_DAYS = 7
+CONSOLIDATION_MODES = ("sequential", "graph")
+# Match columns are written to the unified field of the same name otherwise.
+MATCH_FIELDS = {"Event_Code": "Event_Type"}
+SCALAR_DTYPES = {"string": STRING_DTYPE, "number": "Float64", "integer": "Int64"}
+
+
+class SourceAdapter:
+    """Describe how the prep table of a source takes part in consolidation."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        name: str,
+        *,
+        id_column: str = "Source_Event_IDs",
+        match_columns: tuple[str, ...] = ("Event_Code", "Country_Code"),
+        date_column: str = "Date",
+        end_date_column: str | None = None,
+        tolerance_days: int = DATE_TOLERANCE_DAYS,
+    ) -> None:
+        """Initialise the adapter.
+
+        Args:
+            name (str): The source name, as used for its ``<name>_prep`` table.
+            id_column (str): The column with the source event IDs.
+            match_columns (tuple[str, ...]): The columns that must be equal
+            for two events to match, besides the date.
+            date_column (str): The event date column.
+            end_date_column (str | None): The event end date column, used
+            when the source seeds the combined events.
+            tolerance_days (int): How many days apart the dates of matching
+            events may be.
+        """
+        self.name = name
+        self.id_column = id_column
+        self.match_columns = list(match_columns)
+        self.date_column = date_column
+        self.end_date_column = end_date_column
+        self.tolerance_days = tolerance_days
+
+    @property
+    def source_id(self) -> str:
+        """The column holding the event IDs of the source once combined."""
+        return f"{self.name}_id"
+
+    @property
+    def row_key(self) -> str:
+        """The column identifying each row of the source once combined."""
+        return f"{self.name}_row"
+
+    def load(
+        self,
+        prep_dir: str | Path = PREP_DIR,
+        *,
+        seed: bool = False,
+    ) -> pd.DataFrame:
+        """Read the prep table of the source with typed matching columns.
+
+        Args:
+            prep_dir (str | Path): The directory of the prep tables.
+            seed (bool): Whether the source seeds the combined events, in
+            which case the dates are returned as ``initial_date`` and
+            ``end_date`` rather than ``event_date``.
+
+        Returns:
+            pd.DataFrame: The row keys, event IDs, match columns and dates.
+        """
+        columns = [self.id_column, *self.match_columns, self.date_column]
+        if seed and self.end_date_column:
+            columns.append(self.end_date_column)
+        prep_df = read_intermediate(Path(prep_dir) / f"{self.name}_prep", columns)
+
+        source_df = pd.DataFrame(
+            {
+                self.row_key: range(len(prep_df)),
+                self.source_id: prep_df[self.id_column].astype(STRING_DTYPE),
+            },
+        )
+        for column in self.match_columns:
+            source_df[column] = prep_df[column].astype(STRING_DTYPE)
+        dates = _to_datetime(prep_df[self.date_column])
+        if not seed:
+            source_df["event_date"] = dates
+            return source_df
+
+        end_dates = dates
+        if self.end_date_column:
+            end_dates = _to_datetime(prep_df[self.end_date_column]).fillna(dates)
+        source_df["initial_date"] = dates
+        source_df["end_date"] = end_dates
+        return source_df.rename_axis("unique_id").reset_index()
+
+
+def _to_datetime(dates: pd.Series) -> pd.Series:
+    """Parse dates to timezone-naive UTC timestamps, NaT if invalid."""
+    return pd.to_datetime(dates, errors="coerce", utc=True).dt.tz_localize(None)
+
+
+SOURCE_ADAPTERS: dict[str, SourceAdapter] = {}
+
+
+def register_adapter(adapter: SourceAdapter) -> SourceAdapter:
+    """Register the adapter of a source, replacing any previous one.
+
+    Sources are consolidated in registration order.
+
+    Args:
+        adapter (SourceAdapter): The adapter to register.
+
+    Returns:
+        SourceAdapter: The registered adapter.
+    """
+    SOURCE_ADAPTERS[adapter.name] = adapter
+    return adapter
+
+
+register_adapter(SourceAdapter("gdacs", end_date_column="End_Date"))
+register_adapter(SourceAdapter("glide"))
+register_adapter(SourceAdapter("cerf", tolerance_days=14))
+register_adapter(SourceAdapter("disaster_charter"))
+register_adapter(SourceAdapter("emdat"))
+register_adapter(SourceAdapter("idmc"))
+register_adapter(SourceAdapter("ifrc"))
+
+
+def consolidate(
+    adapters: list[SourceAdapter] | None = None,
+    prep_dir: str | Path = PREP_DIR,
+    *,
+    mode: str = "sequential",
+) -> pd.DataFrame:
+    """Combine the events of all sources.
+
+    Args:
+        adapters (list[SourceAdapter] | None): The sources. In the sequential
+        mode, the first one seeds the combined events. All registered
+        adapters if None.
+        prep_dir (str | Path): The directory of the prep tables.
+        mode (str): ``sequential`` to match the sources in turn, or ``graph``
+        to cluster the records of all sources at once.
+
+    Returns:
+        pd.DataFrame: One row per combined event, with the match columns, the
+        ``initial_date`` and ``end_date`` of the event, and the ``<name>_id``
+        of each source that reported it. In the graph mode, the IDs are lists
+        as several records of a source can join one event.
+
+    Raises:
+        ValueError: If the mode is not supported.
+    """
+    adapters = list(SOURCE_ADAPTERS.values()) if adapters is None else adapters
+    if mode not in CONSOLIDATION_MODES:
+        error_message = (
+            f"Unsupported consolidation mode '{mode}'. "
+            f"Expected one of {list(CONSOLIDATION_MODES)}."
+        )
+        raise ValueError(error_message)
+    if mode == "graph":
+        return cluster_sources(adapters, prep_dir)
+
+    seed, *others = adapters
+
+    start = time.perf_counter()
+    disaster_df = seed.load(prep_dir, seed=True)
+    logging.info("Seeded %d events from %s.", len(disaster_df), seed.name)
+
+    for adapter in others:
+        round_start = time.perf_counter()
+        source_df = adapter.load(prep_dir)
+        disaster_df = add_new_source(
+            disaster_df,
+            source_df,
+            adapter.row_key,
+            adapter.match_columns,
+            "event_date",
+            adapter.tolerance_days,
+        )
+        logging.info(
+            "Matched %d %s events in %.3fs, %d combined events.",
+            len(source_df),
+            adapter.name,
+            time.perf_counter() - round_start,
+            len(disaster_df),
+        )
+
+    logging.info("Consolidated in %.3fs.", time.perf_counter() - start)
+    row_keys = [adapter.row_key for adapter in adapters]
+    return disaster_df.drop(columns=row_keys, errors="ignore")
+
+
+def cluster_sources(
+    adapters: list[SourceAdapter],
+    prep_dir: str | Path = PREP_DIR,
+) -> pd.DataFrame:
+    """Cluster the records of all sources into events.
+
+    Records of different sources with the same match keys and dates within
+    the larger of their tolerances are linked, and each connected component
+    of the links becomes one event. The clusters do not depend on the order
+    of the sources.
+
+    Args:
+        adapters (list[SourceAdapter]): The sources, all matching on the
+        same columns.
+        prep_dir (str | Path): The directory of the prep tables.
+
+    Returns:
+        pd.DataFrame: One row per event, as returned by ``consolidate``.
+
+    Raises:
+        ValueError: If the sources do not share their match columns.
+    """
+    match_columns = adapters[0].match_columns
+    mismatched = [
+        adapter.name for adapter in adapters if adapter.match_columns != match_columns
+    ]
+    if mismatched:
+        error_message = (
+            f"Graph consolidation needs the same match columns for all sources, "
+            f"but {mismatched} do not match on {match_columns}."
+        )
+        raise ValueError(error_message)
+
+    start = time.perf_counter()
+    records = pd.concat(
+        [
+            adapter.load(prep_dir, seed=True)
+            .drop(columns=["unique_id", adapter.row_key])
+            .rename(columns={adapter.source_id: "record_id"})
+            .assign(source=adapter.name, tolerance_days=adapter.tolerance_days)
+            for adapter in adapters
+        ],
+        ignore_index=True,
+    )
+    left, right = link_within_blocks(
+        records,
+        match_columns,
+        "initial_date",
+        "end_date",
+        "tolerance_days",
+        "source",
+    )
+    records["cluster"] = pd.factorize(
+        connected_components(len(records), left, right),
+    )[0]
+
+    clusters = records.groupby("cluster", sort=True)
+    disaster_df = clusters[match_columns].first()
+    disaster_df["initial_date"] = clusters["initial_date"].min()
+    end_date = clusters["end_date"].max()
+    disaster_df["end_date"] = end_date.fillna(disaster_df["initial_date"])
+    reported = records.dropna(subset=["record_id"]).drop_duplicates(
+        ["cluster", "source", "record_id"],
+    )
+    for adapter in adapters:
+        source_ids = reported.loc[reported["source"] == adapter.name]
+        ids_by_cluster = source_ids.groupby("cluster")["record_id"].agg(list)
+        disaster_df[adapter.source_id] = ids_by_cluster
+    disaster_df = disaster_df.rename_axis("unique_id").reset_index()
+
+    logging.info(
+        "Clustered %d records into %d events with %d links in %.3fs.",
+        len(records),
+        len(disaster_df),
+        len(left),
+        time.perf_counter() - start,
+    )
+    return disaster_df
+
+
+def to_unified_table(
+    disaster_df: pd.DataFrame,
+    adapters: list[SourceAdapter],
+    json_schema: dict,
+) -> pd.DataFrame:
+    """Lay out combined events as rows of the unified schema.
+
+    The match columns of the adapters fill the unified fields named in
+    ``MATCH_FIELDS``, or else the fields of the same name, if any.
+
+    Args:
+        disaster_df (pd.DataFrame): The output of ``consolidate``.
+        adapters (list[SourceAdapter]): The consolidated sources.
+        json_schema (dict): The unified JSON schema.
+
+    Returns:
+        pd.DataFrame: The unified table, with the schema columns in order.
+    """
+    id_columns = {
+        adapter.source_id: adapter.name
+        for adapter in adapters
+        if adapter.source_id in disaster_df.columns
+    }
+    reported = (
+        disaster_df[list(id_columns)]
+        .rename(columns=id_columns)
+        .reset_index(drop=True)
+        .melt(ignore_index=False, var_name="source", value_name="event_id")
+        .dropna(subset=["event_id"])
+    )
+    rows = range(len(disaster_df))
+    # Graph consolidation gives lists of IDs per source.
+    reported_ids = reported.explode("event_id")
+    event_ids = reported_ids["event_id"].groupby(level=0).agg(list).reindex(rows)
+    sources = reported["source"].groupby(level=0).agg(list).reindex(rows)
+    match_columns = [
+        column
+        for column in dict.fromkeys(
+            column for adapter in adapters for column in adapter.match_columns
+        )
+        if column in disaster_df.columns
+    ]
+
+    initial_date = disaster_df["initial_date"].reset_index(drop=True)
+    unified_df = pd.DataFrame(
+        {
+            "Disaster_Impact_ID": _disaster_impact_ids(
+                reported_ids,
+                disaster_df[match_columns].reset_index(drop=True),
+            ),
+            "Source_Event_IDs": event_ids,
+            "Date": initial_date.dt.strftime("%Y-%m-%dT%H:%M:%S"),
+            "Year": initial_date.dt.year,
+            "Month": initial_date.dt.month,
+            "Day": initial_date.dt.day,
+            "Source": sources,
+            "End_Date": disaster_df["end_date"]
+            .reset_index(drop=True)
+            .dt.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+    )
+    kinds = dict(compile_schema(json_schema))
+    for column in match_columns:
+        field = MATCH_FIELDS.get(column, column)
+        if field in kinds:
+            values = disaster_df[column].reset_index(drop=True)
+            unified_df[field] = _as_lists(values) if kinds[field] == "array" else values
+
+    for column, kind in kinds.items():
+        if column not in unified_df.columns:
+            unified_df[column] = None
+        if kind in SCALAR_DTYPES:
+            unified_df[column] = unified_df[column].astype(SCALAR_DTYPES[kind])
+    return unified_df[list(json_schema["properties"])]
+
+
+def _as_lists(values: pd.Series) -> list:
+    """Wrap each value in a list, missing values becoming None."""
+    return [[value] if isinstance(value, str) else None for value in values]
+
+
+def _disaster_impact_ids(
+    reported_ids: pd.DataFrame,
+    match_keys: pd.DataFrame,
+) -> pd.Series:
+    """Derive a stable, unique ID for each combined event.
+
+    The ID hashes the source-qualified event IDs together with the match keys
+    of the event, so the country rows of a split event and equal raw IDs of
+    different sources get distinct IDs. Events that would still share an ID,
+    such as duplicate rows of a source, are numbered in row order.
+
+    Args:
+        reported_ids (pd.DataFrame): The ``source`` and ``event_id`` of each
+        reported event ID, indexed by the row of the combined event.
+        match_keys (pd.DataFrame): The match columns of the combined events.
+
+    Returns:
+        pd.Series: The ID of each combined event, None if it has no event IDs.
+    """
+    qualified = reported_ids["source"] + ":" + reported_ids["event_id"].astype(str)
+    labels = (
+        qualified.groupby(level=0)
+        .agg(lambda ids: "|".join(sorted(ids)))
+        .reindex(match_keys.index)
+    )
+    payloads = labels.str.cat(match_keys.astype(str), sep="|")
+    occurrence = payloads.groupby(payloads).cumcount()
+    payloads = payloads.where(occurrence == 0, payloads + "#" + occurrence.astype(str))
+    ids = payloads.map(
+        lambda payload: "DI-"
+        + hashlib.sha1(payload.encode(), usedforsecurity=False).hexdigest()[:16],
+        na_action="ignore",
+    )
+    return ids.where(labels.notna(), None)
+
+
+def run(
+    sources: list[str] | None = None,
+    prep_dir: str | Path = PREP_DIR,
+    output_path: str | Path = UNIFIED_OUTPUT,
+    *,
+    mode: str = "sequential",
+) -> Path:
+    """Consolidate the prep tables and write the unified table.
+
+    Args:
+        sources (list[str] | None): The names of the registered sources to
+        consolidate, in order. All registered sources if None.
+        prep_dir (str | Path): The directory of the prep tables.
+        output_path (str | Path): The unified table path without suffix.
+        mode (str): The consolidation mode, ``sequential`` or ``graph``.
+
+    Returns:
+        Path: The file or directory written.
+    """
+    adapters = [SOURCE_ADAPTERS[name] for name in sources or SOURCE_ADAPTERS]
+    with Path(UNIFIED_SCHEMA_PATH).open() as schema_file:
+        json_schema = json.load(schema_file)
+
+    disaster_df = consolidate(adapters, prep_dir, mode=mode)
+    unified_df = to_unified_table(disaster_df, adapters, json_schema)
+    return write_intermediate(unified_df, output_path)
+
+
+def main() -> None:
+    """Run the consolidation stage from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sources",
+        nargs="+",
+        choices=list(SOURCE_ADAPTERS),
+        help="Sources to consolidate, in order. The first one seeds the events.",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=CONSOLIDATION_MODES,
+        default="sequential",
+        help="Match the sources in turn, or cluster all records at once.",
+    )
+    args = parser.parse_args()
+    output = run(args.sources, mode=args.mode)
+    logging.info("Wrote the unified table to %s.", output)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,295 @@
+"""Date-window matching of disaster events across sources."""
+
+import numpy as np
+import pandas as pd
+
+# Day numbers are packed with the group code into one int64 sort key.
+DAY_BITS = 32
+DAY_OFFSET = 1 << (DAY_BITS - 1)
+
+
+def _group_codes(df: pd.DataFrame, on: list[str]) -> np.ndarray:
+    """Return codes identifying the key combination of each row.
+
+    Missing keys match each other, as in ``DataFrame.merge``.
+    """
+    codes = np.zeros(len(df), dtype=np.int64)
+    for column in on:
+        column_codes, uniques = pd.factorize(df[column], use_na_sentinel=False)
+        codes = codes * len(uniques) + column_codes
+        codes = pd.factorize(codes)[0]
+    return codes
+
+
+def _day_numbers(dates: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Return the day number of each date and a mask of the valid ones."""
+    days = pd.to_datetime(dates).to_numpy("datetime64[D]")
+    valid = ~np.isnat(days)
+    return np.where(valid, days.view(np.int64), 0), valid
+
+
+def _expand_ranges(first: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenate the ranges ``first[i], ..., first[i] + counts[i] - 1``."""
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(first, counts) + offsets
+
+
+def match_within_window(  # noqa: PLR0913
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    on: list[str],
+    left_start: str,
+    left_end: str,
+    right_date: str,
+    tolerance_days: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Find the row pairs with equal keys and a right date inside a window.
+
+    A left row matches a right row when all ``on`` columns are equal and the
+    right date falls between ``tolerance_days`` days before the left start and
+    ``tolerance_days`` days after the left end. Dates are compared at day
+    resolution.
+
+    Instead of merging on the keys and filtering the cartesian product of each
+    group, the right rows are sorted once by group and day, and the first and
+    last candidates of each left row are found with ``np.searchsorted``, so
+    only matching pairs are materialised.
+
+    Args:
+        left (pd.DataFrame): The rows carrying a date interval.
+        right (pd.DataFrame): The rows carrying a single date.
+        on (list[str]): The columns that must be equal.
+        left_start (str): The column of the interval start in ``left``.
+        left_end (str): The column of the interval end in ``left``.
+        right_date (str): The date column in ``right``.
+        tolerance_days (int): The number of days the window extends the
+        interval on each side.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The positions of the matching left and
+        right rows, ordered by left then right position.
+    """
+    codes = _group_codes(pd.concat([left[on], right[on]], ignore_index=True), on)
+    left_codes, right_codes = codes[: len(left)], codes[len(left) :]
+    start, valid_start = _day_numbers(left[left_start])
+    end, valid_end = _day_numbers(left[left_end])
+    date, valid_date = _day_numbers(right[right_date])
+
+    right_rows = np.flatnonzero(valid_date)
+    right_keys = (right_codes[right_rows] << DAY_BITS) + date[right_rows] + DAY_OFFSET
+    order = np.argsort(right_keys, kind="stable")
+    right_rows, right_keys = right_rows[order], right_keys[order]
+
+    left_rows = np.flatnonzero(valid_start & valid_end)
+    group = left_codes[left_rows] << DAY_BITS
+    first = np.searchsorted(
+        right_keys,
+        group + start[left_rows] - tolerance_days + DAY_OFFSET,
+        side="left",
+    )
+    last = np.searchsorted(
+        right_keys,
+        group + end[left_rows] + tolerance_days + DAY_OFFSET,
+        side="right",
+    )
+    counts = np.maximum(last - first, 0)
+
+    left_positions = np.repeat(left_rows, counts)
+    right_positions = right_rows[_expand_ranges(first, counts)]
+    pair_order = np.lexsort((right_positions, left_positions))
+    return left_positions[pair_order], right_positions[pair_order]
+
+
+def link_within_blocks(  # noqa: PLR0913
+    records: pd.DataFrame,
+    on: list[str],
+    start: str,
+    end: str,
+    tolerance: str,
+    source: str,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Find the pairs of records of different sources describing one event.
+
+    Two records are linked when all ``on`` columns are equal, they come from
+    different sources, and their date intervals are at most the larger of
+    their tolerances apart.
+
+    Candidates come from a blocking index: each record is filed under its key
+    combination and every bucket of ``max(tolerance)`` days that its interval,
+    extended by that tolerance, touches. Records linked by the window share a
+    bucket, so only pairs of different sources within a block are compared
+    and the work grows with the number of records rather than with the
+    product of the sources.
+
+    Args:
+        records (pd.DataFrame): The records of all sources.
+        on (list[str]): The columns that must be equal.
+        start (str): The column of the interval start.
+        end (str): The column of the interval end. Missing ends are taken to
+        be the start.
+        tolerance (str): The column of the tolerance in days of each record.
+        source (str): The column naming the source of each record.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The positions of the linked records,
+        each pair once with the smaller position first.
+    """
+    codes = _group_codes(records, on)
+    start_days, valid = _day_numbers(records[start])
+    end_days, valid_end = _day_numbers(records[end])
+    end_days = np.where(valid_end, np.maximum(end_days, start_days), start_days)
+    tolerances = records[tolerance].to_numpy(np.int64)
+    sources = pd.factorize(records[source])[0]
+    bucket_days = max(int(tolerances.max(initial=0)), 1)
+
+    rows = np.flatnonzero(valid)
+    first_bucket = start_days[rows] // bucket_days
+    last_bucket = (end_days[rows] + tolerances.max(initial=0)) // bucket_days
+    counts = last_bucket - first_bucket + 1
+    entry_rows = np.repeat(rows, counts)
+    entry_keys = (np.repeat(codes[rows], counts) << DAY_BITS) + (
+        _expand_ranges(first_bucket, counts) + DAY_OFFSET
+    )
+    entry_sources = sources[entry_rows]
+    order = np.lexsort((entry_sources, entry_keys))
+    entry_rows = entry_rows[order]
+    entry_keys, entry_sources = entry_keys[order], entry_sources[order]
+
+    # Pair each entry with the entries of the later sources of its block, so
+    # records of the same source are never compared.
+    block_end = np.searchsorted(entry_keys, entry_keys, side="right")
+    run_start = np.flatnonzero(
+        np.r_[
+            True,
+            (entry_keys[1:] != entry_keys[:-1])
+            | (entry_sources[1:] != entry_sources[:-1]),
+        ],
+    )
+    run_end = np.r_[run_start[1:], len(entry_keys)]
+    next_source = np.repeat(run_end, run_end - run_start)
+    pair_counts = block_end - next_source
+    left = np.repeat(entry_rows, pair_counts)
+    right = entry_rows[_expand_ranges(next_source, pair_counts)]
+
+    window = np.maximum(tolerances[left], tolerances[right])
+    linked = (start_days[right] - window <= end_days[left]) & (
+        start_days[left] - window <= end_days[right]
+    )
+    left, right = left[linked], right[linked]
+    # Records sharing several buckets are paired once per bucket.
+    pairs = np.sort(np.minimum(left, right) * len(records) + np.maximum(left, right))
+    pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]] if len(pairs) else pairs
+    return pairs // len(records), pairs % len(records)
+
+
+def connected_components(
+    size: int,
+    left: np.ndarray,
+    right: np.ndarray,
+) -> np.ndarray:
+    """Label the connected components of a graph with a vectorised union-find.
+
+    Each round hooks the root of every edge end to the smaller of the two
+    roots, then compresses all paths, until the ends of every edge share a
+    root.
+
+    Args:
+        size (int): The number of nodes.
+        left (np.ndarray): The first node of each edge.
+        right (np.ndarray): The second node of each edge.
+
+    Returns:
+        np.ndarray: The smallest node of the component of each node.
+    """
+    parent = np.arange(size)
+    while True:
+        left_root, right_root = parent[left], parent[right]
+        split = left_root != right_root
+        if not split.any():
+            return parent
+        low = np.minimum(left_root[split], right_root[split])
+        high = np.maximum(left_root[split], right_root[split])
+        np.minimum.at(parent, high, low)
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+
+def add_new_source(  # noqa: PLR0913
+    disaster_df: pd.DataFrame,
+    new_source_df: pd.DataFrame,
+    new_id: str,
+    match_col: list[str],
+    date_col: str,
+    delta_day_threshold: int,
+) -> pd.DataFrame:
+    """Match a new source to the events combined so far.
+
+    Events of the new source are matched to combined events of the same
+    ``match_col`` values whose date interval, extended by
+    ``delta_day_threshold`` days, contains the new event date. Matched events
+    take the new source columns and their interval grows to cover the new
+    date. Unmatched events of both sides are kept as they are.
+
+    Args:
+        disaster_df (pd.DataFrame): The combined events, with ``unique_id``,
+        ``initial_date`` and ``end_date`` columns.
+        new_source_df (pd.DataFrame): The events of the new source.
+        new_id (str): The ID column of the new source.
+        match_col (list[str]): The columns that must be equal to match.
+        date_col (str): The event date column of the new source.
+        delta_day_threshold (int): The date tolerance in days.
+
+    Returns:
+        pd.DataFrame: The combined events, with a new ``unique_id``.
+    """
+    left_positions, right_positions = match_within_window(
+        disaster_df,
+        new_source_df,
+        match_col,
+        "initial_date",
+        "end_date",
+        date_col,
+        delta_day_threshold,
+    )
+
+    new_columns = [
+        column for column in new_source_df.columns if column not in match_col
+    ]
+    matched_new = new_source_df[new_columns].iloc[right_positions]
+    matched_new = matched_new.rename(
+        columns={
+            column: f"{column}_new"
+            for column in new_columns
+            if column in disaster_df.columns
+        },
+    ).reset_index(drop=True)
+    merge_df = pd.concat(
+        [disaster_df.iloc[left_positions].reset_index(drop=True), matched_new],
+        axis=1,
+    )
+    # Update initial / end dates based on the new added event
+    merge_df["initial_date"] = merge_df[["initial_date", date_col]].min(axis=1)
+    merge_df["end_date"] = merge_df[["end_date", date_col]].max(axis=1)
+    merge_df = merge_df.drop(
+        columns=["country_name_new", "country_iso3_new", date_col],
+        errors="ignore",
+    )
+
+    matched_ids = disaster_df["unique_id"].iloc[left_positions]
+    left_outer_df = disaster_df[~disaster_df["unique_id"].isin(matched_ids)]
+    new_source_df = new_source_df.assign(
+        initial_date=new_source_df[date_col],
+        end_date=new_source_df[date_col],
+    ).drop(columns=[date_col])
+    matched_new_ids = new_source_df[new_id].iloc[right_positions]
+    right_outer_df = new_source_df[~new_source_df[new_id].isin(matched_new_ids)]
+
+    combined_df = pd.concat(
+        [merge_df, left_outer_df, right_outer_df],
+        ignore_index=True,
+    ).drop(columns="unique_id")
+    combined_df.insert(0, "unique_id", range(len(combined_df)))
+    return combined_df
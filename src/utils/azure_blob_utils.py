@@ -1,20 +1,57 @@
 """Utility functions for interacting with Azure Blob Storage."""
 
+import functools
+import hashlib
+import io
 import json
 import logging
 import os
-from io import BytesIO
+import tempfile
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import NoReturn
+from typing import IO, NoReturn
 
 import pandas as pd
-from azure.storage.blob import BlobClient, BlobServiceClient, ContainerClient
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotModifiedError
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import (
+    BlobClient,
+    BlobServiceClient,
+    ContainerClient,
+    ContentSettings,
+    ExponentialRetry,
+)
 from dotenv import load_dotenv
 
+from src.utils.batch_accumulator import BatchAccumulator
+from src.utils.http_utils import build_session
+
 logging.basicConfig(level=logging.INFO)
 logging.getLogger("azure").setLevel(logging.ERROR)
 load_dotenv()
 
+MAX_CONCURRENCY = 8
+RANGE_CONCURRENCY = 2
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+POOL_SIZE = MAX_CONCURRENCY * RANGE_CONCURRENCY
+RETRY_TOTAL = int(os.getenv("STORAGE_RETRY_TOTAL", "5"))
+RETRY_INITIAL_BACKOFF = int(os.getenv("STORAGE_RETRY_INITIAL_BACKOFF", "2"))
+RETRY_INCREMENT_BASE = int(os.getenv("STORAGE_RETRY_INCREMENT_BASE", "2"))
+BLOB_CACHE_DIR = os.getenv("BLOB_CACHE_DIR", "./.cache/blobs")
+BLOB_CACHE_MAX_BYTES = int(os.getenv("BLOB_CACHE_MAX_BYTES", str(5 * 1024**3)))
+# The cache saves repeated downloads across runs but writes every blob to disk
+# before it is parsed, so it is only used when asked for.
+BLOB_CACHE_ENABLED = os.getenv("BLOB_CACHE_ENABLED", "").lower() in {
+    "1",
+    "true",
+    "yes",
+}
+
 
 def load_env_vars() -> tuple[str, str, str]:
     """Load environment variables for Azure Blob Storage.
@@ -40,6 +77,290 @@ def load_env_vars() -> tuple[str, str, str]:
     return sas_token, container_name, storage_account
 
 
+class StorageSession:
+    """Process-wide Azure Blob Storage clients sharing one pooled transport.
+
+    The clients are built lazily on first use from the environment, and every
+    blob and container client handed out shares the same ``requests`` session,
+    so connections are kept alive and reused across calls and threads.
+    Transient failures are retried by the storage pipeline with exponential
+    backoff.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = POOL_SIZE,
+        retry_total: int = RETRY_TOTAL,
+        initial_backoff: int = RETRY_INITIAL_BACKOFF,
+        increment_base: int = RETRY_INCREMENT_BASE,
+    ) -> None:
+        """Initialise the session without connecting.
+
+        Args:
+            pool_size (int): The number of pooled connections kept open.
+            retry_total (int): The number of retries of a failed request.
+            initial_backoff (int): The delay in seconds before the first retry.
+            increment_base (int): The base of the exponential backoff.
+        """
+        self.pool_size = pool_size
+        self.retry_total = retry_total
+        self.initial_backoff = initial_backoff
+        self.increment_base = increment_base
+        self._service_client: BlobServiceClient | None = None
+        self._container_client: ContainerClient | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def service_client(self) -> BlobServiceClient:
+        """The shared service client, created on first access."""
+        with self._lock:
+            if self._service_client is None:
+                sas_token, container_name, storage_account = load_env_vars()
+                # Retries are left to the storage pipeline, not the HTTP adapter.
+                transport = RequestsTransport(
+                    session=build_session(pool_size=self.pool_size, retries=0),
+                    session_owner=False,
+                )
+                self._service_client = BlobServiceClient(
+                    account_url=f"https://{storage_account}.blob.core.windows.net",
+                    credential=sas_token,
+                    transport=transport,
+                    retry_policy=ExponentialRetry(
+                        initial_backoff=self.initial_backoff,
+                        increment_base=self.increment_base,
+                        retry_total=self.retry_total,
+                    ),
+                    max_single_get_size=DOWNLOAD_CHUNK_SIZE,
+                    max_chunk_get_size=DOWNLOAD_CHUNK_SIZE,
+                )
+                self._container_client = self._service_client.get_container_client(
+                    container_name,
+                )
+            return self._service_client
+
+    @property
+    def container_client(self) -> ContainerClient:
+        """The client of the configured container."""
+        if self._container_client is None:
+            _ = self.service_client
+        return self._container_client
+
+    def blob_client(self, blob_name: str) -> BlobClient:
+        """Return a client for a blob of the configured container.
+
+        Args:
+            blob_name (str): The name of the blob.
+
+        Returns:
+            BlobClient: A client sharing the session transport.
+        """
+        return self.container_client.get_blob_client(blob_name)
+
+
+@functools.cache
+def get_storage_session() -> StorageSession:
+    """Return the process-wide storage session, creating it on first use.
+
+    Returns:
+        StorageSession: The shared storage session.
+    """
+    return StorageSession()
+
+
+class BlobCache:
+    """Local, size-capped LRU cache of downloaded blobs.
+
+    Blob contents are stored under ``objects/`` keyed by the hash of the blob
+    name and its ``ETag``, and ``index/`` remembers the last ``ETag`` seen for
+    each blob name. A cached blob is revalidated with a conditional HEAD
+    request (``If-None-Match``) and only downloaded again when it changed
+    upstream. Least recently used objects are evicted once the cache grows
+    beyond ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int) -> None:
+        """Initialise the cache.
+
+        Args:
+            cache_dir (str): The directory holding the cached blobs.
+            max_bytes (int): The size above which old blobs are evicted.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+        self._lock = threading.Lock()
+
+    def fetch(self, blob_client: BlobClient) -> Path:
+        """Return the local path of a blob, downloading it only if it changed.
+
+        Args:
+            blob_client (BlobClient): The client of the blob to fetch.
+
+        Returns:
+            Path: The cached copy of the blob.
+        """
+        blob_name = blob_client.blob_name
+        etag = self._load_etag(blob_name)
+        if etag is not None and self.object_path(blob_name, etag).exists():
+            try:
+                properties = blob_client.get_blob_properties(
+                    etag=etag,
+                    match_condition=MatchConditions.IfModified,
+                )
+            except ResourceNotModifiedError:
+                path = self.object_path(blob_name, etag)
+                path.touch()
+                self._count("hits")
+                logging.info("Blob cache hit for %s.", blob_name)
+                return path
+        else:
+            properties = blob_client.get_blob_properties()
+
+        path = self.object_path(blob_name, properties.etag)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with tmp_path.open("wb") as fh:
+            blob_client.download_blob(
+                max_concurrency=RANGE_CONCURRENCY,
+                etag=properties.etag,
+                match_condition=MatchConditions.IfNotModified,
+            ).readinto(fh)
+        tmp_path.replace(path)
+        self._save_etag(blob_name, properties.etag)
+        self._count("misses")
+        logging.info("Blob cache miss for %s, downloaded.", blob_name)
+        self.evict(keep=path)
+        return path
+
+    def object_path(self, blob_name: str, etag: str) -> Path:
+        """Return the cache file of a blob version."""
+        key = hashlib.sha256(f"{blob_name}\n{etag}".encode()).hexdigest()
+        return self.cache_dir / "objects" / key[:2] / f"{key}{Path(blob_name).suffix}"
+
+    def evict(self, keep: Path | None = None) -> None:
+        """Remove least recently used blobs until the cache fits ``max_bytes``.
+
+        Args:
+            keep (Path | None): A blob that must not be evicted.
+        """
+        with self._lock:
+            objects = [
+                (path.stat().st_mtime, path.stat().st_size, path)
+                for path in (self.cache_dir / "objects").glob("*/*")
+                if not path.name.endswith(".tmp")
+            ]
+            total = sum(size for _, size, _ in objects)
+            for _, size, path in sorted(objects):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                path.unlink(missing_ok=True)
+                total -= size
+                self.stats["evicted"] += 1
+
+    def _index_path(self, blob_name: str) -> Path:
+        """Return the index file of a blob name."""
+        key = hashlib.sha256(blob_name.encode()).hexdigest()
+        return self.cache_dir / "index" / key
+
+    def _load_etag(self, blob_name: str) -> str | None:
+        """Return the last ETag seen for a blob, if any."""
+        index_path = self._index_path(blob_name)
+        return index_path.read_text() if index_path.exists() else None
+
+    def _save_etag(self, blob_name: str, etag: str) -> None:
+        """Atomically record the ETag of the cached copy of a blob."""
+        index_path = self._index_path(blob_name)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = index_path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_text(etag)
+        tmp_path.replace(index_path)
+
+    def _count(self, key: str) -> None:
+        """Increment a statistics counter."""
+        with self._lock:
+            self.stats[key] += 1
+
+
+BLOB_CACHE = BlobCache(BLOB_CACHE_DIR, BLOB_CACHE_MAX_BYTES)
+
+
+class BlobChunkReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks.
+
+    Chunks are handed to the reader one at a time, so a blob can be parsed
+    while it downloads without ever holding the whole body in memory.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        """Initialise the reader.
+
+        Args:
+            chunks (Iterable[bytes]): The body of the blob, in any chunking.
+        """
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        """Return True, the reader supports ``read``."""
+        return True
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        """Copy the next bytes of the blob into ``buffer``.
+
+        Args:
+            buffer (bytearray | memoryview): The buffer to fill.
+
+        Returns:
+            int: The number of bytes copied, 0 at the end of the blob.
+        """
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+@contextmanager
+def open_blob(blob_client: BlobClient, *, seekable: bool = False) -> Iterator[IO]:
+    """Open a blob as a binary file object, through the cache when enabled.
+
+    With ``BLOB_CACHE_ENABLED`` the local copy is opened. By default the blob
+    is streamed chunk by chunk, or spooled to a temporary file when the reader
+    needs to seek, as ``read_excel`` does. The body is never held as a single
+    ``bytes``.
+
+    Args:
+        blob_client (BlobClient): The client of the blob to read.
+        seekable (bool): Whether the returned file must support ``seek``.
+
+    Yields:
+        IO: A readable binary file object.
+    """
+    if BLOB_CACHE_ENABLED:
+        with BLOB_CACHE.fetch(blob_client).open("rb") as fh:
+            yield fh
+        return
+
+    downloader = blob_client.download_blob(max_concurrency=RANGE_CONCURRENCY)
+    if seekable:
+        with tempfile.TemporaryFile() as fh:
+            downloader.readinto(fh)
+            fh.seek(0)
+            yield fh
+        return
+    with io.BufferedReader(
+        BlobChunkReader(downloader.chunks()),
+        buffer_size=DOWNLOAD_CHUNK_SIZE,
+    ) as fh:
+        yield fh
+
+
 def read_blob_to_dataframe(
     blob_name: str,
     **read_csv_kwargs: dict[str, str | int | float | bool],
@@ -48,7 +369,8 @@ def read_blob_to_dataframe(
 
     Parameters:
     blob_name (str): The name of the blob (file) to read.
-    **read_csv_kwargs: Additional keyword arguments to pass to pandas.read_csv().
+    **read_csv_kwargs: Additional keyword arguments to pass to pandas.read_csv(),
+    e.g. ``engine="pyarrow"``. The blob is parsed as it is streamed.
 
     Returns:
     pd.DataFrame: The data from the blob loaded into a pandas DataFrame.
@@ -60,20 +382,19 @@ def read_blob_to_dataframe(
     Example:
     df = read_blob_to_dataframe('data.csv', delimiter=',')
     """
-    sas_token, container_name, storage_account = load_env_vars()
-    blob_url = f"https://{storage_account}.blob.core.windows.net/{container_name}/{blob_name}?{sas_token}"
-    blob_client = BlobClient.from_blob_url(blob_url)
+    blob_client = get_storage_session().blob_client(blob_name)
 
     def raise_invalid_format() -> NoReturn:
         """Raise a ValueError for unsupported file formats."""
         error_message = "Unsupported file format. Only .csv and .xlsx are supported."
         raise ValueError(error_message)
 
-    blob_data = blob_client.download_blob().content_as_bytes()
     if blob_name.endswith(".csv"):
-        df_csv = pd.read_csv(BytesIO(blob_data), **read_csv_kwargs)
+        with open_blob(blob_client) as source:
+            df_csv = pd.read_csv(source, **read_csv_kwargs)
     elif blob_name.endswith(".xlsx"):
-        df_csv = pd.read_excel(BytesIO(blob_data))
+        with open_blob(blob_client, seekable=True) as source:
+            df_csv = pd.read_excel(source)
     else:
         raise_invalid_format()
 
@@ -92,55 +413,108 @@ def read_blob_to_json(blob_name: str) -> dict:
     Raises:
         Exception: If there is an error reading the blob.
     """
-    sas_token, container_name, storage_account = load_env_vars()
-    blob_url = f"https://{storage_account}.blob.core.windows.net/{container_name}/{blob_name}?{sas_token}"
-    blob_client = BlobClient.from_blob_url(blob_url)
+    blob_client = get_storage_session().blob_client(blob_name)
 
     try:
-        blob_data = blob_client.download_blob().content_as_bytes()
+        with open_blob(blob_client) as source:
+            return json.load(source)
     except Exception as e:
         logging.warning("Error reading JSON blob: %s", e)
         raise
 
-    return json.loads(blob_data.decode("utf-8"))
 
+def iter_blob_chunks(blob_name: str) -> Iterator[bytes]:
+    """Stream a blob from Azure Blob Storage chunk by chunk.
 
-def combine_csvs_from_blob_dir(blob_dir: str) -> pd.DataFrame:
+    Args:
+        blob_name (str): The name of the blob to read.
+
+    Yields:
+        bytes: The next chunk of the blob.
+    """
+    blob_client = get_storage_session().blob_client(blob_name)
+
+    if not BLOB_CACHE_ENABLED:
+        yield from blob_client.download_blob().chunks()
+        return
+    with BLOB_CACHE.fetch(blob_client).open("rb") as fh:
+        while chunk := fh.read(DOWNLOAD_CHUNK_SIZE):
+            yield chunk
+
+
+def combine_csvs_from_blob_dir(
+    blob_dir: str,
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> pd.DataFrame:
     """Combine all CSV files from a specified A B S directory into a single DF.
 
+    The blobs are downloaded and parsed concurrently, each one in ranged chunks
+    of ``DOWNLOAD_CHUNK_SIZE`` bytes. Rows keep the order of the blob listing.
+
     Args:
         blob_dir (str): The directory path in the Azure Blob Storage container.
+        max_concurrency (int): The number of blobs downloaded and parsed at once.
 
     Returns:
         pd.DataFrame: A DataFrame containing the combined data from all CSV files.
     """
-    sas_token, container_name, storage_account = load_env_vars()
-    container_url = (
-        f"https://{storage_account}.blob.core.windows.net/{container_name}?{sas_token}"
-    )
-    container_client = ContainerClient.from_container_url(container_url)
+    container_client = get_storage_session().container_client
 
-    combined_df = pd.DataFrame()
+    blob_names = [
+        blob.name
+        for blob in container_client.list_blobs(name_starts_with=blob_dir)
+        if blob.name.endswith(".csv")
+    ]
 
-    blob_list = container_client.list_blobs(name_starts_with=blob_dir)
+    def read_csv_blob(blob_name: str) -> pd.DataFrame:
+        with open_blob(container_client.get_blob_client(blob_name)) as source:
+            return pd.read_csv(source)
 
-    for blob in blob_list:
-        if blob.name.endswith(".csv"):
-            blob_client = container_client.get_blob_client(blob.name)
-            blob_data = blob_client.download_blob().content_as_bytes()
-            temp_df = pd.read_csv(BytesIO(blob_data))
-            combined_df = pd.concat([combined_df, temp_df], ignore_index=True)
+    accumulator = BatchAccumulator()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        for blob_df in executor.map(read_csv_blob, blob_names):
+            accumulator.write(blob_df)
 
-    return combined_df
+    return accumulator.to_frame()
 
 
-def upload_dir_to_blob(local_dir: str, blob_dir: str) -> NoReturn:
+def file_md5(file_path: Path) -> bytes:
+    """Return the MD5 digest of a local file, read in chunks.
+
+    Args:
+        file_path (Path): The file to hash.
+
+    Returns:
+        bytes: The raw MD5 digest, as stored in a blob's ``content_md5``.
+    """
+    digest = hashlib.md5(usedforsecurity=False)
+    with file_path.open("rb") as fh:
+        while chunk := fh.read(DOWNLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def upload_dir_to_blob(
+    local_dir: str,
+    blob_dir: str,
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> dict[str, int]:
     """Uploads all files from a local directory to an Azure Blob Storage container.
 
+    Files whose MD5 matches the ``content_md5`` of the existing blob are
+    skipped. The remaining files are uploaded concurrently, large files in
+    parallel blocks, and the blob ``content_md5`` is set so the next run can
+    skip them.
+
     Args:
         local_dir (str): The path to the local directory containing files to upload.
         blob_dir (str): The directory path within the blob container
         where files will be uploaded.
+        max_concurrency (int): The number of files uploaded at once.
+
+    Returns:
+        dict[str, int]: The number of uploaded and skipped files and the number
+        of bytes uploaded.
 
     Raises:
         ValueError: If the specified local directory does not exist.
@@ -149,23 +523,54 @@ def upload_dir_to_blob(local_dir: str, blob_dir: str) -> NoReturn:
     Example:
         upload_dir_to_blob("/path/to/local/dir", "target/blob/dir")
     """
-    sas_token, container_name, storage_account = load_env_vars()
-    blob_service_client = BlobServiceClient(
-        account_url=f"https://{storage_account}.blob.core.windows.net",
-        credential=sas_token,
-    )
-    container_client = blob_service_client.get_container_client(container_name)
-
     if not Path(local_dir).is_dir():
         error_message = f"Directory '{local_dir}' does not exist."
         raise ValueError(error_message)
 
+    session = get_storage_session()
+    blob_prefix = f"disaster-impact/{blob_dir}/"
+    remote_md5 = {
+        blob.name: bytes(blob.content_settings.content_md5 or b"")
+        for blob in session.container_client.list_blobs(name_starts_with=blob_prefix)
+    }
+
+    changed = []
+    skipped = 0
     for root, _, files in os.walk(local_dir):
         for file in files:
             file_path = Path(root) / file
             relative_path = os.path.relpath(file_path, local_dir).replace("\\", "/")
-            blob_path = f"disaster-impact/{blob_dir}/{relative_path}"
-
-            with file_path.open("rb") as data:
-                blob_client = container_client.get_blob_client(blob_path)
-                blob_client.upload_blob(data, overwrite=True, timeout=600)
+            blob_path = f"{blob_prefix}{relative_path}"
+            md5 = file_md5(file_path)
+            if remote_md5.get(blob_path) == md5:
+                skipped += 1
+            else:
+                changed.append((file_path, blob_path, md5))
+
+    def upload_file(item: tuple[Path, str, bytes]) -> int:
+        file_path, blob_path, md5 = item
+        with file_path.open("rb") as data:
+            session.blob_client(blob_path).upload_blob(
+                data,
+                overwrite=True,
+                content_settings=ContentSettings(content_md5=bytearray(md5)),
+                max_concurrency=RANGE_CONCURRENCY,
+                timeout=600,
+            )
+        return file_path.stat().st_size
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        uploaded_bytes = sum(executor.map(upload_file, changed))
+    elapsed = time.perf_counter() - start
+
+    logging.info(
+        "Uploaded %d files (%.1f MB in %.1fs, %.1f MB/s) to %s, skipped %d unchanged.",
+        len(changed),
+        uploaded_bytes / 1e6,
+        elapsed,
+        uploaded_bytes / 1e6 / elapsed if elapsed else 0.0,
+        blob_prefix,
+        skipped,
+    )
+    return {"uploaded": len(changed), "skipped": skipped, "bytes": uploaded_bytes}
@@ -0,0 +1,102 @@
+"""Helpers to assemble DataFrames from many batches in linear time."""
+
+from pathlib import Path
+
+import pandas as pd
+
+
+class BatchAccumulator:
+    """Collect record and DataFrame batches and materialise them once.
+
+    Calling ``pd.concat`` inside a loop copies the accumulated frame on every
+    iteration. This class keeps the batches in a list instead and concatenates
+    them in a single pass when ``to_frame`` is called.
+    """
+
+    def __init__(self) -> None:
+        """Initialise an empty accumulator."""
+        self._frames: list[pd.DataFrame] = []
+        self._records: list[dict] = []
+        self._rows = 0
+
+    def __len__(self) -> int:
+        """Return the number of rows collected so far."""
+        return self._rows
+
+    def write(self, batch: list[dict] | pd.DataFrame) -> None:
+        """Add a batch of rows.
+
+        Args:
+            batch (list[dict] | pd.DataFrame): A list of records or a DataFrame.
+        """
+        if isinstance(batch, pd.DataFrame):
+            self._flush_records()
+            self._frames.append(batch)
+        else:
+            self._records.extend(batch)
+        self._rows += len(batch)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return all collected rows as a single DataFrame.
+
+        Returns:
+            pd.DataFrame: The rows in the order they were written, with a fresh
+            ``RangeIndex``. An empty DataFrame if nothing was written.
+        """
+        self._flush_records()
+        if not self._frames:
+            return pd.DataFrame()
+        if len(self._frames) > 1:
+            self._frames = [pd.concat(self._frames, ignore_index=True)]
+        return self._frames[0].reset_index(drop=True)
+
+    def _flush_records(self) -> None:
+        """Turn the pending records into a DataFrame batch."""
+        if self._records:
+            self._frames.append(pd.DataFrame(self._records))
+            self._records = []
+
+
+class PartitionedCsvWriter:
+    """Stream DataFrame batches into one CSV file per partition value.
+
+    Each batch is split on ``partition_col`` and appended to the file of each
+    partition, so only the current batch is held in memory. Files are
+    truncated the first time they are written to by this writer.
+    """
+
+    def __init__(self, output_dir: str, file_template: str = "{}.csv") -> None:
+        """Initialise the writer.
+
+        Args:
+            output_dir (str): The directory the partition files are written to.
+            file_template (str): The file name pattern, formatted with the
+            partition value.
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.file_template = file_template
+        self.counts: dict = {}
+
+    def path_for(self, partition: object) -> Path:
+        """Return the file path of a partition."""
+        return self.output_dir / self.file_template.format(partition)
+
+    def write(self, batch: pd.DataFrame, partition_col: str) -> None:
+        """Append a batch to the files of its partitions.
+
+        Rows whose partition value is missing are dropped.
+
+        Args:
+            batch (pd.DataFrame): The rows to write.
+            partition_col (str): The column holding the partition value.
+        """
+        for partition, group in batch.groupby(partition_col):
+            first_write = partition not in self.counts
+            group.to_csv(
+                self.path_for(partition),
+                mode="w" if first_write else "a",
+                header=first_write,
+                index=False,
+            )
+            self.counts[partition] = self.counts.get(partition, 0) + len(group)
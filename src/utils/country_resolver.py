@@ -0,0 +1,175 @@
+"""Fast resolution of country names to ISO 3166-1 alpha-3 codes."""
+
+import functools
+import logging
+import re
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import pycountry
+
+from src.unified.countires_iso import COUNTRIES
+
+COUNTRY_CSV = "./static_data/country_name_iso3_table.csv"
+ISO3_LENGTH = 3
+
+
+def normalise_country_name(name: str) -> str:
+    """Return the lookup key of a country name.
+
+    Accents, case, punctuation and hyphens are ignored, so ``"Côte-d'Ivoire"``
+    and ``"cote d ivoire"`` share a key.
+
+    Args:
+        name (str): The country name.
+
+    Returns:
+        str: The normalised name.
+    """
+    ascii_name = (
+        unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    )
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", ascii_name.casefold()).split())
+
+
+class CountryResolver:
+    """Resolve country names to ISO3 codes from a precomputed name index.
+
+    The index holds the names of the country table, the pycountry names and
+    codes, and the ``COUNTRIES`` dictionary, earlier sources taking precedence.
+    Names missing from the index can fall back to pycountry's fuzzy search,
+    whose results are cached. Columns are resolved one distinct value at a
+    time.
+    """
+
+    def __init__(self, country_csv: str = COUNTRY_CSV) -> None:
+        """Build the name index.
+
+        Args:
+            country_csv (str): The table with ``country_iso3``,
+            ``ocha_ref_name`` and ``country_name`` columns.
+        """
+        self.index: dict[str, str] = {}
+        country_df = pd.read_csv(country_csv)
+        for column in ("country_name", "ocha_ref_name"):
+            self._add(zip(country_df[column], country_df["country_iso3"], strict=True))
+        for country in pycountry.countries:
+            names = (
+                getattr(country, attribute, None)
+                for attribute in ("name", "official_name", "common_name", "alpha_3")
+            )
+            self._add((name, country.alpha_3) for name in names)
+            self._add([(country.alpha_2, country.alpha_3)])
+        self._add(
+            (name, entry["code"].upper())
+            for name, entry in COUNTRIES.items()
+            if len(entry["code"]) == ISO3_LENGTH
+        )
+        self._fuzzy_cache: dict[str, str | None] = {}
+        self.stats = {"rows": 0, "unique": 0, "exact": 0, "fuzzy": 0, "missing": 0}
+
+    def _add(self, pairs: object) -> None:
+        """Index ``(name, iso3)`` pairs, keeping existing entries.
+
+        Placeholders such as ``"-"`` normalise to an empty key and are skipped.
+        """
+        for name, iso3 in pairs:
+            if isinstance(name, str) and isinstance(iso3, str):
+                key = normalise_country_name(name)
+                if key:
+                    self.index.setdefault(key, iso3)
+
+    def resolve(self, name: object, *, fuzzy: bool = True) -> str | None:
+        """Return the ISO3 code of a country name.
+
+        Args:
+            name (object): The country name. Non-strings, and names without
+            letters or digits such as ``"-"``, resolve to None.
+            fuzzy (bool): Whether to fall back to pycountry's fuzzy search.
+
+        Returns:
+            str | None: The ISO3 code, or None if the name is not recognised.
+        """
+        key = normalise_country_name(name) if isinstance(name, str) else ""
+        if not key:
+            self.stats["missing"] += 1
+            return None
+
+        iso3 = self.index.get(key)
+        if iso3 is not None:
+            self.stats["exact"] += 1
+            return iso3
+
+        if fuzzy:
+            if name not in self._fuzzy_cache:
+                try:
+                    matches = pycountry.countries.search_fuzzy(name)
+                except LookupError:
+                    matches = []
+                self._fuzzy_cache[name] = matches[0].alpha_3 if matches else None
+            iso3 = self._fuzzy_cache[name]
+            if iso3 is not None:
+                self.stats["fuzzy"] += 1
+                return iso3
+
+        self.stats["missing"] += 1
+        return None
+
+    def resolve_column(self, names: pd.Series, *, fuzzy: bool = True) -> pd.Series:
+        """Return the ISO3 code of each country name of a column.
+
+        Each distinct name is resolved once and the codes are broadcast back to
+        the rows.
+
+        Args:
+            names (pd.Series): The country names.
+            fuzzy (bool): Whether to fall back to pycountry's fuzzy search.
+
+        Returns:
+            pd.Series: The ISO3 codes, None where a name is not recognised.
+        """
+        start = time.perf_counter()
+        positions, uniques = pd.factorize(names)
+        resolved = [self.resolve(name, fuzzy=fuzzy) for name in uniques]
+        # Missing names have position -1 and take the trailing None.
+        codes = np.array([*resolved, None], dtype=object)[positions]
+        elapsed = time.perf_counter() - start
+
+        self.stats["rows"] += len(names)
+        self.stats["unique"] += len(uniques)
+        logging.info(
+            "Resolved %d country names (%d distinct) in %.3fs, %.0f rows/s.",
+            len(names),
+            len(uniques),
+            elapsed,
+            len(names) / elapsed if elapsed else 0.0,
+        )
+        return pd.Series(codes, index=names.index, dtype=object)
+
+    def log_stats(self) -> None:
+        """Log the hit rates of the distinct names resolved so far."""
+        lookups = self.stats["exact"] + self.stats["fuzzy"] + self.stats["missing"]
+        logging.info(
+            "Country resolver: %d rows, %d lookups, %.1f%% exact, %.1f%% fuzzy, "
+            "%.1f%% unresolved.",
+            self.stats["rows"],
+            lookups,
+            100 * self.stats["exact"] / lookups if lookups else 0.0,
+            100 * self.stats["fuzzy"] / lookups if lookups else 0.0,
+            100 * self.stats["missing"] / lookups if lookups else 0.0,
+        )
+
+
+@functools.cache
+def get_country_resolver(country_csv: str = COUNTRY_CSV) -> CountryResolver:
+    """Return the process-wide resolver of a country table.
+
+    Args:
+        country_csv (str): The table with the country names and ISO3 codes.
+
+    Returns:
+        CountryResolver: The resolver, built once per process.
+    """
+    return CountryResolver(country_csv)
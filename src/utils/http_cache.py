@@ -0,0 +1,148 @@
+"""On-disk HTTP cache for the scrapers."""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import requests
+
+HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
+
+
+class HttpCache:
+    """Content-addressed, on-disk cache of HTTP GET responses.
+
+    Response bodies are stored once under ``objects/`` keyed by their SHA-256,
+    and ``index/`` maps the hash of each URL to the body hash together with its
+    ``ETag`` and ``Last-Modified`` validators. Entries younger than ``max_age``
+    are served without a request; older ones are revalidated with a
+    conditional GET.
+    """
+
+    def __init__(self, cache_dir: str, max_age: timedelta | None = None) -> None:
+        """Initialise the cache.
+
+        Args:
+            cache_dir (str): The directory holding the cached responses.
+            max_age (timedelta | None): How long an entry is served without
+            revalidation. ``None`` revalidates on every request.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_age = max_age
+        self.stats = {"fresh": 0, "revalidated": 0, "fetched": 0, "failed": 0}
+        self._lock = threading.Lock()
+        (self.cache_dir / "index").mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / "objects").mkdir(parents=True, exist_ok=True)
+
+    def fetch(
+        self,
+        session: requests.Session,
+        url: str,
+        timeout: float,
+        max_age: timedelta | None = None,
+    ) -> tuple[int, bytes]:
+        """GET a URL through the cache.
+
+        Args:
+            session (requests.Session): The session used for network requests.
+            url (str): The URL to fetch.
+            timeout (float): The request timeout in seconds.
+            max_age (timedelta | None): Overrides the cache ``max_age`` for
+            this request.
+
+        Returns:
+            tuple[int, bytes]: The status code and body. Revalidated entries are
+            returned with status 200.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        entry = self._load_entry(url)
+        body = self._load_body(entry) if entry else None
+
+        if body is not None and max_age is not None:
+            age = time.time() - entry["checked_at"]
+            if age < max_age.total_seconds():
+                self._count("fresh")
+                return HTTP_OK, body
+
+        headers = {}
+        if body is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = session.get(url, headers=headers, timeout=timeout)
+        if response.status_code == HTTP_NOT_MODIFIED and body is not None:
+            entry["checked_at"] = time.time()
+            self._save_entry(url, entry)
+            self._count("revalidated")
+            return HTTP_OK, body
+        if response.status_code != HTTP_OK:
+            self._count("failed")
+            return response.status_code, response.content
+
+        self._store(url, response)
+        self._count("fetched")
+        return HTTP_OK, response.content
+
+    def _index_path(self, url: str) -> Path:
+        """Return the index file of a URL."""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / "index" / f"{key}.json"
+
+    def _object_path(self, digest: str) -> Path:
+        """Return the object file of a body digest."""
+        return self.cache_dir / "objects" / digest[:2] / digest
+
+    def _load_entry(self, url: str) -> dict | None:
+        """Load the index entry of a URL, if any."""
+        index_path = self._index_path(url)
+        if not index_path.exists():
+            return None
+        try:
+            with index_path.open() as fh:
+                return json.load(fh)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _load_body(self, entry: dict) -> bytes | None:
+        """Load the body referenced by an index entry, if still present."""
+        object_path = self._object_path(entry["sha256"])
+        return object_path.read_bytes() if object_path.exists() else None
+
+    def _save_entry(self, url: str, entry: dict) -> None:
+        """Atomically write the index entry of a URL."""
+        index_path = self._index_path(url)
+        tmp_path = index_path.with_suffix(f".{threading.get_ident()}.tmp")
+        with tmp_path.open("w") as fh:
+            json.dump(entry, fh)
+        tmp_path.replace(index_path)
+
+    def _store(self, url: str, response: requests.Response) -> None:
+        """Store a response body and point the URL index entry at it."""
+        digest = hashlib.sha256(response.content).hexdigest()
+        object_path = self._object_path(digest)
+        if not object_path.exists():
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = object_path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(response.content)
+            tmp_path.replace(object_path)
+        self._save_entry(
+            url,
+            {
+                "url": url,
+                "sha256": digest,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "checked_at": time.time(),
+            },
+        )
+
+    def _count(self, key: str) -> None:
+        """Increment a statistics counter."""
+        with self._lock:
+            self.stats[key] += 1
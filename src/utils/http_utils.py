@@ -0,0 +1,93 @@
+"""Shared HTTP helpers for the data acquisition scripts."""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def build_session(
+    pool_size: int = 10,
+    retries: int = 3,
+    backoff_factor: float = 0.5,
+    headers: dict[str, str] | None = None,
+) -> requests.Session:
+    """Build a requests session with connection pooling and retry with backoff.
+
+    Args:
+        pool_size (int): The number of pooled connections kept per host.
+        retries (int): The number of retries for failed or throttled requests.
+        backoff_factor (float): The exponential backoff factor between retries.
+        headers (dict[str, str] | None): Default headers sent with every request.
+
+    Returns:
+        requests.Session: A session that reuses connections across requests.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting the request rate per host.
+
+    Each host gets its own bucket holding up to ``burst`` tokens that refill at
+    ``rate`` tokens per second. ``acquire`` blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """Initialise the rate limiter.
+
+        Args:
+            rate (float): The number of requests allowed per second and host.
+            burst (int): The number of requests that may be sent back to back.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str) -> None:
+        """Block until a request to the host of ``url`` is allowed.
+
+        Args:
+            url (str): The URL that is about to be requested.
+        """
+        if self.rate <= 0:
+            return
+        host = urlsplit(url).netloc
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,392 @@
+"""Storage backend for the intermediate data layers (data_mid_1, data_prep)."""
+
+import json
+import os
+import re
+import shutil
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+INTERMEDIATE_FORMAT = os.getenv("INTERMEDIATE_FORMAT", "parquet")
+FORMAT_SUFFIXES = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+DATASET_FORMATS = {"parquet": "parquet", "arrow": "ipc"}
+PARTITION_KEY = "partition_year"
+ORDER_KEY = "row_order"
+DATE_COLUMN = "Date"
+# Dataset discovery skips names starting with "_", so the schema is not data.
+SCHEMA_FILE = "_schema.arrow"
+ARROW_STRINGS_KEY = b"arrow_string_columns"
+ARROW_STRING_DTYPE = pd.StringDtype("pyarrow")
+BATCH_FILE_PATTERN = re.compile(r"part-(\d+)-")
+
+
+def resolve_format(fmt: str | None = None) -> str:
+    """Return the storage format to use, defaulting to ``INTERMEDIATE_FORMAT``.
+
+    Args:
+        fmt (str | None): One of ``csv``, ``parquet`` or ``arrow``.
+
+    Returns:
+        str: The validated format name.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    fmt = (fmt or INTERMEDIATE_FORMAT).lower()
+    if fmt not in FORMAT_SUFFIXES:
+        error_message = (
+            f"Unsupported intermediate format '{fmt}'. "
+            f"Expected one of {sorted(FORMAT_SUFFIXES)}."
+        )
+        raise ValueError(error_message)
+    return fmt
+
+
+def intermediate_path(base_path: str | Path, fmt: str | None = None) -> Path:
+    """Return the location of a table for a format.
+
+    CSV tables are single files. Parquet and Arrow tables are dataset
+    directories partitioned by the year of ``DATE_COLUMN``.
+
+    Args:
+        base_path (str | Path): The table path without suffix, for example
+        ``./data_mid_1/glide/glide_mid1``.
+        fmt (str | None): The storage format.
+
+    Returns:
+        Path: The file or directory holding the table.
+    """
+    base_path = Path(base_path)
+    return base_path.with_name(base_path.name + FORMAT_SUFFIXES[resolve_format(fmt)])
+
+
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    """Convert a DataFrame to Arrow, stringifying mixed-type object columns."""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        stringified = df.copy()
+        for column in stringified.select_dtypes(include="object").columns:
+            stringified[column] = stringified[column].map(str, na_action="ignore")
+        return pa.Table.from_pandas(stringified, preserve_index=False)
+
+
+class IntermediateWriter:
+    """Write a table in batches to the configured intermediate format.
+
+    CSV batches are appended to one file. Parquet and Arrow batches are
+    written as new compressed files of a dataset partitioned by year, so a
+    table can be produced from a stream without holding it in memory. The
+    previous content of the table is replaced on the first write.
+
+    The first batch fixes the schema of the dataset and later batches are
+    cast to it. A column only widens where the first type cannot hold a
+    batch: all-null columns take the first concrete type, and columns whose
+    values cannot be cast become strings. The schema is saved next to the
+    data, together with a ``row_order`` column that restores the input order
+    on read.
+    """
+
+    def __init__(self, base_path: str | Path, fmt: str | None = None) -> None:
+        """Initialise the writer.
+
+        Args:
+            base_path (str | Path): The table path without suffix.
+            fmt (str | None): The storage format.
+        """
+        self.fmt = resolve_format(fmt)
+        self.path = intermediate_path(base_path, self.fmt)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batches = 0
+        self.rows = 0
+        self.schema: pa.Schema | None = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append a batch of rows to the table.
+
+        Args:
+            df (pd.DataFrame): The rows to write.
+        """
+        if self.batches == 0:
+            _remove(self.path)
+
+        if self.fmt == "csv":
+            df.to_csv(
+                self.path,
+                mode="a" if self.batches else "w",
+                header=not self.batches,
+                index=False,
+            )
+        else:
+            table = self._conform(_to_arrow(df), df)
+            table = table.append_column(
+                ORDER_KEY,
+                pa.array(np.arange(self.rows, self.rows + len(df)), type=pa.int64()),
+            )
+            if DATE_COLUMN in df.columns:
+                years = pd.to_datetime(df[DATE_COLUMN], errors="coerce").dt.year
+                table = table.append_column(
+                    PARTITION_KEY,
+                    pa.array(years.astype("Int64"), type=pa.int64()),
+                )
+                partitioning = [PARTITION_KEY]
+            else:
+                partitioning = None
+            ds.write_dataset(
+                table,
+                self.path,
+                format=DATASET_FORMATS[self.fmt],
+                file_options=_file_options(self.fmt),
+                partitioning=partitioning,
+                partitioning_flavor="hive" if partitioning else None,
+                basename_template=f"part-{self.batches}-{{i}}{FORMAT_SUFFIXES[self.fmt]}",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            _save_schema(self.path, self.schema)
+
+        self.batches += 1
+        self.rows += len(df)
+
+    def _conform(self, table: pa.Table, df: pd.DataFrame) -> pa.Table:
+        """Cast a batch to the dataset schema, widening the schema if needed.
+
+        Args:
+            table (pa.Table): The batch converted to Arrow.
+            df (pd.DataFrame): The batch, whose Arrow-backed string columns
+            are recorded so that they are read back with the same dtype.
+
+        Returns:
+            pa.Table: The batch with the columns of the dataset schema types.
+        """
+        schema = self.schema if self.schema is not None else pa.schema([])
+        columns = {}
+        for field in table.schema:
+            column = table.column(field.name)
+            index = schema.get_field_index(field.name)
+            if index == -1:
+                schema = schema.append(field)
+            elif pa.types.is_null(schema.field(index).type):
+                schema = schema.set(index, field)
+            elif field.type != schema.field(index).type:
+                try:
+                    column = column.cast(schema.field(index).type)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    schema = schema.set(index, pa.field(field.name, pa.string()))
+                    column = column.cast(pa.string())
+            columns[field.name] = column
+
+        metadata = dict(schema.metadata or table.schema.metadata or {})
+        arrow_strings = json.loads(metadata.get(ARROW_STRINGS_KEY, b"[]"))
+        arrow_strings += [
+            column
+            for column in df.columns
+            if df[column].dtype == ARROW_STRING_DTYPE and column not in arrow_strings
+        ]
+        metadata[ARROW_STRINGS_KEY] = json.dumps(arrow_strings).encode()
+        self.schema = schema.with_metadata(metadata)
+        return pa.table(columns)
+
+    def discard(self) -> None:
+        """Remove the rows written so far, after the stream failed.
+
+        The previous content of the table was already replaced by the first
+        write, so the table is removed rather than left partial.
+        """
+        _remove(self.path)
+        self.batches = 0
+        self.rows = 0
+        self.schema = None
+
+
+def _file_options(fmt: str) -> ds.FileWriteOptions:
+    """Return the compressed write options of a dataset format."""
+    if fmt == "parquet":
+        return ds.ParquetFileFormat().make_write_options(compression="zstd")
+    return ds.IpcFileFormat().make_write_options(compression="zstd")
+
+
+def _save_schema(path: Path, schema: pa.Schema) -> None:
+    """Atomically write the schema of a dataset directory."""
+    schema_file = path / SCHEMA_FILE
+    tmp_file = schema_file.with_suffix(".tmp")
+    tmp_file.write_bytes(schema.serialize().to_pybytes())
+    tmp_file.replace(schema_file)
+
+
+def _remove(path: Path) -> None:
+    """Remove a table file or dataset directory, if present."""
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def write_intermediate(
+    df: pd.DataFrame,
+    base_path: str | Path,
+    fmt: str | None = None,
+) -> Path:
+    """Write a DataFrame as an intermediate table, replacing any previous one.
+
+    Args:
+        df (pd.DataFrame): The table to write.
+        base_path (str | Path): The table path without suffix.
+        fmt (str | None): The storage format.
+
+    Returns:
+        Path: The file or directory written.
+    """
+    writer = IntermediateWriter(base_path, fmt)
+    writer.write(df)
+    return writer.path
+
+
+def read_intermediate(
+    base_path: str | Path,
+    columns: list[str] | None = None,
+    fmt: str | None = None,
+) -> pd.DataFrame:
+    """Read an intermediate table, optionally only some of its columns.
+
+    Args:
+        base_path (str | Path): The table path without suffix.
+        columns (list[str] | None): The columns to load. All if None.
+        fmt (str | None): The storage format.
+
+    Returns:
+        pd.DataFrame: The table in the order it was written, without the
+        partition column.
+    """
+    fmt = resolve_format(fmt)
+    path = intermediate_path(base_path, fmt)
+    if fmt == "csv":
+        return pd.read_csv(path, usecols=columns)
+
+    dataset, columns = _open_dataset(path, fmt, columns)
+    return _to_pandas(_read_ordered(dataset, columns), dataset.schema)
+
+
+def iter_intermediate(
+    base_path: str | Path,
+    chunk_size: int,
+    columns: list[str] | None = None,
+    fmt: str | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Stream an intermediate table in chunks of at most ``chunk_size`` rows.
+
+    Args:
+        base_path (str | Path): The table path without suffix.
+        chunk_size (int): The maximum number of rows per chunk.
+        columns (list[str] | None): The columns to load. All if None.
+        fmt (str | None): The storage format.
+
+    Yields:
+        pd.DataFrame: The chunks of the table in the order it was written,
+        without the partition column.
+    """
+    fmt = resolve_format(fmt)
+    path = intermediate_path(base_path, fmt)
+    if fmt == "csv":
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+        return
+
+    dataset, columns = _open_dataset(path, fmt, columns)
+    if ORDER_KEY not in dataset.schema.names:
+        for batch in dataset.to_batches(columns=columns, batch_size=chunk_size):
+            if batch.num_rows:
+                yield _to_pandas(pa.Table.from_batches([batch]), dataset.schema)
+        return
+
+    # Each written batch is spread over the year partitions, so the files of
+    # one batch are read and ordered together.
+    files_by_batch: dict[int, list[str]] = {}
+    for file in dataset.files:
+        batch_index = int(BATCH_FILE_PATTERN.match(Path(file).name).group(1))
+        files_by_batch.setdefault(batch_index, []).append(file)
+    for batch_index in sorted(files_by_batch):
+        batch_dataset = ds.dataset(
+            files_by_batch[batch_index],
+            schema=dataset.schema,
+            format=DATASET_FORMATS[fmt],
+        )
+        table = _read_ordered(batch_dataset, columns)
+        for offset in range(0, table.num_rows, chunk_size):
+            yield _to_pandas(table.slice(offset, chunk_size), dataset.schema)
+
+
+def _open_dataset(
+    path: Path,
+    fmt: str,
+    columns: list[str] | None,
+) -> tuple[ds.Dataset, list[str]]:
+    """Open a dataset directory and return it with the columns to read.
+
+    The schema saved by the writer is used, so files are cast to it on read.
+    Tables written without one fall back to the unified file schemas.
+    """
+    schema_file = path / SCHEMA_FILE
+    if schema_file.exists():
+        schema = pa.ipc.read_schema(pa.py_buffer(schema_file.read_bytes()))
+        schema = schema.append(pa.field(ORDER_KEY, pa.int64()))
+    else:
+        dataset = ds.dataset(path, format=DATASET_FORMATS[fmt], partitioning="hive")
+        # Batches may have inferred different types for sparse columns.
+        schema = pa.unify_schemas(
+            [fragment.physical_schema for fragment in dataset.get_fragments()],
+            promote_options="permissive",
+        )
+    dataset = ds.dataset(
+        path,
+        schema=schema,
+        format=DATASET_FORMATS[fmt],
+        partitioning="hive",
+    )
+    if columns is None:
+        columns = [
+            name for name in schema.names if name not in {PARTITION_KEY, ORDER_KEY}
+        ]
+    return dataset, columns
+
+
+def _read_ordered(dataset: ds.Dataset, columns: list[str]) -> pa.Table:
+    """Read columns of a dataset in the order the rows were written."""
+    if ORDER_KEY not in dataset.schema.names:
+        return dataset.to_table(columns=columns)
+    table = dataset.to_table(columns=[*columns, ORDER_KEY])
+    return table.sort_by(ORDER_KEY).drop_columns([ORDER_KEY])
+
+
+def _to_pandas(table: pa.Table, schema: pa.Schema) -> pd.DataFrame:
+    """Convert a table to pandas, restoring the Arrow-backed string columns."""
+    frame = table.replace_schema_metadata(schema.metadata).to_pandas()
+    metadata = schema.metadata or {}
+    for column in json.loads(metadata.get(ARROW_STRINGS_KEY, b"[]")):
+        if column in frame.columns:
+            frame[column] = frame[column].astype(ARROW_STRING_DTYPE)
+    return frame
+
+
+def export_csv(
+    base_path: str | Path,
+    output_file: str | Path,
+    fmt: str | None = None,
+) -> Path:
+    """Export an intermediate table as a CSV file.
+
+    Args:
+        base_path (str | Path): The table path without suffix.
+        output_file (str | Path): The CSV file to write.
+        fmt (str | None): The storage format of the table.
+
+    Returns:
+        Path: The CSV file written.
+    """
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    read_intermediate(base_path, fmt=fmt).to_csv(output_file, index=False)
+    return output_file
@@ -0,0 +1,102 @@
+"""Incremental parsing of large JSON documents."""
+
+import codecs
+import json
+from collections.abc import Iterable, Iterator
+
+WHITESPACE = " \t\n\r"
+
+
+class _TextBuffer:
+    """Decode UTF-8 chunks on demand, keeping only the unread text."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.text = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def read_more(self) -> bool:
+        """Append the next chunk, dropping consumed text. False at the end."""
+        if self.exhausted:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            decoded = self._decoder.decode(b"", final=True)
+        else:
+            decoded = self._decoder.decode(chunk)
+        self.text = self.text[self.pos :] + decoded
+        self.pos = 0
+        return True
+
+    def skip_whitespace(self, pos: int) -> int:
+        """Return the first non-whitespace position from ``pos``."""
+        while pos < len(self.text) and self.text[pos] in WHITESPACE:
+            pos += 1
+        return pos
+
+    def next_char(self) -> str:
+        """Return the next non-whitespace character, reading as needed."""
+        while True:
+            self.pos = self.skip_whitespace(self.pos)
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.read_more():
+                error_message = "Unexpected end of JSON array."
+                raise ValueError(error_message)
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[object]:
+    """Yield the elements of a top-level JSON array one at a time.
+
+    The document is decoded as it is read, so only the element being parsed
+    and the unread remainder of the current chunk are held in memory.
+
+    Args:
+        chunks (Iterable[bytes]): The UTF-8 encoded document, in any chunking.
+
+    Yields:
+        object: The next decoded array element.
+
+    Raises:
+        ValueError: If the document is not a well-formed JSON array.
+    """
+    decoder = json.JSONDecoder()
+    buffer = _TextBuffer(chunks)
+
+    if buffer.next_char() != "[":
+        error_message = "The JSON document is not an array."
+        raise ValueError(error_message)
+    buffer.pos += 1
+
+    while True:
+        char = buffer.next_char()
+        if char == "]":
+            return
+        if char == ",":
+            buffer.pos += 1
+            continue
+
+        try:
+            element, end = decoder.raw_decode(buffer.text, buffer.pos)
+        except json.JSONDecodeError:
+            if buffer.read_more():
+                continue
+            raise
+
+        # A number cut by the end of the buffer (e.g. "1." or "12") decodes to a
+        # shorter value, so only accept an element once its delimiter is read.
+        delimiter = buffer.skip_whitespace(end)
+        if delimiter == len(buffer.text) or buffer.text[delimiter] not in ",]":
+            if buffer.read_more():
+                continue
+            if delimiter == len(buffer.text):
+                error_message = "Unexpected end of JSON array."
+            else:
+                error_message = f"Unexpected {buffer.text[delimiter]!r} in JSON array."
+            raise ValueError(error_message)
+
+        buffer.pos = end
+        yield element
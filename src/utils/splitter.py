@@ -1,42 +1,47 @@
 """splitter.py!
 
-This module provides functions to split data into different components
-for further processing.
+This module splits the multi-country rows of the data_mid_1 tables into one
+row per country and writes them to data_prep. Sources are processed in
+parallel, each streamed in chunks, and can be limited to those whose input
+changed since the last run.
 """
 
-import shutil
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import repeat
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import pycountry
 
-country_csv_path = "./static_data/country_name_iso3_table.csv"
-country_df = pd.read_csv(country_csv_path)
-COUNTRY_MAPPING = country_df.set_index("country_name")["country_iso3"].to_dict()
-
-dataframes = {
-    "glide": pd.read_csv(
-        "./data_mid_1/glide/glide_mid1.csv",
-    ).copy(),
-    "gdacs": pd.read_csv(
-        "./data_mid_1/gdacs/gdacs_mid1.csv",
-    ).copy(),
-    "disaster_charter": pd.read_csv(
-        "./data_mid_1/disaster_charter/disaster_charter_mid1.csv",
-    ).copy(),
-    "emdat": pd.read_csv(
-        "./data_mid_1/emdat/emdat_mid1.csv",
-    ).copy(),
-    "idmc": pd.read_csv(
-        "./data_mid_1/idmc_idu/idus_mid1.csv",
-    ).copy(),
-    "cerf": pd.read_csv(
-        "./data_mid_1/cerf/cerf_mid1.csv",
-    ).copy(),
-    "ifrc": pd.read_csv(
-        "./data_mid_1/ifrc_eme/ifrc_eme_mid1.csv",
-    ).copy(),
+from src.utils.country_resolver import COUNTRY_CSV
+from src.utils.intermediate_io import (
+    IntermediateWriter,
+    intermediate_path,
+    iter_intermediate,
+)
+
+MID1_TABLES = {
+    "glide": "./data_mid_1/glide/glide_mid1",
+    "gdacs": "./data_mid_1/gdacs/gdacs_mid1",
+    "disaster_charter": "./data_mid_1/disaster_charter/disaster_charter_mid1",
+    "emdat": "./data_mid_1/emdat/emdat_mid1",
+    "idmc": "./data_mid_1/idmc_idu/idus_mid1",
+    "cerf": "./data_mid_1/cerf/cerf_mid1",
+    "ifrc": "./data_mid_1/ifrc_eme/ifrc_eme_mid1",
 }
+OUTPUT_DIR = "./data_prep/"
+MANIFEST_NAME = ".splitter_manifest.json"
+CHUNK_SIZE = int(os.getenv("SPLITTER_CHUNK_SIZE", "200000"))
+EXPORT_CSV = os.getenv("EXPORT_CSV", "").lower() in {"1", "true", "yes"}
 
 
 # to read all the dataframes and find their column 'Country'
@@ -58,12 +63,9 @@ def split_and_update_country_rows(
     If a cell has multiple countries (as a string or list),
     the row is split into multiple rows,
     one per country, while preserving all the other column values.
-    Also standardizes the 'Country_Code'
-    to be a list with the ISO3 code in capital
-    letters using the COUNTRIES constant if available,
-    otherwise validates the country name using the pycountry library.
-    If pycountry cannot find the country,
-    an empty list is returned.
+    The whole column is split at once and the rows are repeated with a
+    single ``take``. The 'Country_Code' is then set to the ISO3 code of
+    each country, looked up once per distinct name with ``country_code``.
 
     Parameters:
       df (pd.DataFrame): Input DataFrame.
@@ -75,52 +77,300 @@ def split_and_update_country_rows(
       pd.DataFrame: DataFrame with exploded
       country values and standardized country codes.
     """
-
-    def ensure_list(
-        cell: list | tuple | str,
-    ) -> list:
-        if isinstance(cell, list | tuple):
-            return list(cell)
-        if isinstance(cell, str):
-            cell = cell.strip("[]")
-            return [item.strip(" '\"") for item in cell.split(sep)]
-        return [cell]
-
     if country_col not in df.columns:
         return df
-    df[country_col] = df[country_col].apply(ensure_list)
-    df_exploded = df.explode(country_col).reset_index(drop=True)
-
-    def update_country_code(row: pd.Series) -> str:
-        country_name = row[country_col]
-        iso3 = COUNTRY_MAPPING.get(country_name, "")
-        if not iso3:
-            try:
-                country = pycountry.countries.lookup(country_name)
-                iso3 = country.alpha_3
-            except LookupError:
-                iso3 = ""
-        return iso3
+    counts, countries = _split_country_cells(df[country_col].to_numpy(object), sep)
+    df_exploded = df.take(np.repeat(np.arange(len(df)), counts)).reset_index(drop=True)
+    df_exploded[country_col] = countries
 
     if code_col in df_exploded.columns:
-        df_exploded[code_col] = df_exploded.apply(update_country_code, axis=1)
+        positions, names = pd.factorize(
+            df_exploded[country_col],
+            use_na_sentinel=False,
+        )
+        codes = np.array([country_code(name) for name in names], dtype=object)
+        df_exploded[code_col] = codes[positions]
     return df_exploded
 
 
-output_base_dir = "./data_prep/"
-Path(output_base_dir).mkdir(parents=True, exist_ok=True)
+@functools.cache
+def _country_mapping(country_csv: str = COUNTRY_CSV) -> dict:
+    """Return the exact country name to ISO3 mapping of the country table."""
+    country_df = pd.read_csv(country_csv)
+    return country_df.set_index("country_name")["country_iso3"].to_dict()
+
+
+def country_code(country_name: object) -> object:
+    """Return the ISO3 code of a country name.
+
+    The name is looked up exactly in the country table, then with
+    ``pycountry.countries.lookup``, and an empty string is returned if neither
+    knows it. Names listed without a code in the table give NaN. Unlike the
+    ``CountryResolver``, names are not normalised, so the prep tables keep the
+    codes of the original splitter.
+
+    Args:
+        country_name (object): The country name.
+
+    Returns:
+        object: The ISO3 code, an empty string or NaN.
+    """
+    iso3 = _country_mapping().get(country_name, "")
+    if not iso3:
+        try:
+            iso3 = pycountry.countries.lookup(country_name).alpha_3
+        except LookupError:
+            iso3 = ""
+    return iso3
+
+
+def _split_country_cells(cells: np.ndarray, sep: str) -> tuple[np.ndarray, np.ndarray]:
+    """Split country cells into one value per country, as ``DataFrame.explode``.
+
+    Strings are split in one pass with Arrow kernels, after stripping list
+    brackets and, around each name, spaces and quotes. Lists and tuples give
+    one value per item, or a single NaN if empty. Other cells are kept as is.
+
+    Args:
+        cells (np.ndarray): The object array of country cells.
+        sep (str): Separator used to split country values in a string.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The number of values of each cell, and
+        the object array of all values in row order.
+    """
+    counts = np.ones(len(cells), dtype=np.int64)
+    is_str = np.fromiter(map(isinstance, cells, repeat(str)), bool, len(cells))
+    is_list = np.fromiter(
+        map(isinstance, cells, repeat((list, tuple))),
+        bool,
+        len(cells),
+    )
+
+    parts = pc.split_pattern(
+        pc.utf8_trim(pa.array(cells[is_str], type=pa.string()), "[]"),
+        sep,
+    )
+    str_counts = pc.list_value_length(parts).to_numpy()
+    counts[is_str] = str_counts
+    list_items = [list(cell) or [np.nan] for cell in cells[is_list]]
+    counts[is_list] = [len(items) for items in list_items]
+
+    starts = np.cumsum(counts) - counts
+    values = np.empty(counts.sum(), dtype=object)
+    other = ~(is_str | is_list)
+    values[starts[other]] = cells[other]
+    names = pc.utf8_trim(pc.list_flatten(parts), " '\"")
+    str_starts = np.repeat(starts[is_str], str_counts)
+    offsets = np.arange(len(names)) - np.repeat(
+        np.cumsum(str_counts) - str_counts,
+        str_counts,
+    )
+    values[str_starts + offsets] = names.to_numpy(zero_copy_only=False)
+    for start, items in zip(starts[is_list], list_items, strict=True):
+        values[start : start + len(items)] = items
+    return counts, values
+
+
+def input_fingerprint(base_path: str | Path) -> str | None:
+    """Return a fingerprint of the files of an intermediate table.
+
+    The fingerprint covers the name, size and modification time of every file
+    of the table, so it changes whenever the table is rewritten.
+
+    Args:
+        base_path (str | Path): The table path without suffix.
+
+    Returns:
+        str | None: The fingerprint, or None if the table does not exist.
+    """
+    path = intermediate_path(base_path)
+    if not path.exists():
+        return None
+    files = sorted(path.rglob("*")) if path.is_dir() else [path]
+    digest = hashlib.sha256()
+    for file in files:
+        if file.is_file():
+            stat = file.stat()
+            digest.update(
+                f"{file.relative_to(path.parent)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode(),
+            )
+    return digest.hexdigest()
+
+
+def load_manifest(output_dir: str | Path) -> dict:
+    """Load the input fingerprints recorded by the last run.
 
-for source, df in dataframes.items():
-    normalized_df = split_and_update_country_rows(
-        df,
-        country_col="Country",
-        code_col="Country_Code",
-        sep=",",
+    Args:
+        output_dir (str | Path): The directory of the prep tables.
+
+    Returns:
+        dict: The fingerprint of each source, empty if there was no run.
+    """
+    manifest_file = Path(output_dir) / MANIFEST_NAME
+    if not manifest_file.exists():
+        return {}
+    with manifest_file.open() as fh:
+        return json.load(fh)
+
+
+def save_manifest(output_dir: str | Path, manifest: dict) -> None:
+    """Persist the input fingerprints of the processed sources.
+
+    Args:
+        output_dir (str | Path): The directory of the prep tables.
+        manifest (dict): The fingerprint of each source.
+    """
+    manifest_file = Path(output_dir) / MANIFEST_NAME
+    manifest_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = manifest_file.with_suffix(".tmp")
+    with tmp_file.open("w") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    tmp_file.replace(manifest_file)
+
+
+def split_source(
+    source: str,
+    base_path: str | Path,
+    output_dir: str | Path = OUTPUT_DIR,
+    chunk_size: int = CHUNK_SIZE,
+    *,
+    export_csv: bool = EXPORT_CSV,
+) -> int:
+    """Split the country rows of one source, streaming its table in chunks.
+
+    Args:
+        source (str): The source name, used to name the prep table.
+        base_path (str | Path): The data_mid_1 table path without suffix.
+        output_dir (str | Path): The directory of the prep tables.
+        chunk_size (int): The maximum number of input rows per chunk.
+        export_csv (bool): Whether to also write the prep table as CSV.
+
+    Returns:
+        int: The number of rows written.
+    """
+    output_base = Path(output_dir) / f"{source}_prep"
+    writer = IntermediateWriter(output_base)
+    csv_writer = IntermediateWriter(output_base, "csv") if export_csv else None
+
+    for chunk in iter_intermediate(base_path, chunk_size):
+        normalized_df = split_and_update_country_rows(
+            chunk,
+            country_col="Country",
+            code_col="Country_Code",
+            sep=",",
+        )
+        writer.write(normalized_df)
+        if csv_writer is not None:
+            csv_writer.write(normalized_df)
+
+    logging.info("Split %s into %d rows.", source, writer.rows)
+    return writer.rows
+
+
+def run(
+    tables: dict[str, str] | None = None,
+    output_dir: str | Path = OUTPUT_DIR,
+    *,
+    changed_only: bool = False,
+    max_workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> dict[str, int]:
+    """Split the country rows of the data_mid_1 tables into data_prep.
+
+    Each source is processed in its own worker process, which also exports a
+    CSV copy when ``EXPORT_CSV`` is set. Inputs are left in place so that
+    failed sources can be retried and later runs can skip the sources whose
+    input did not change.
+
+    Args:
+        tables (dict[str, str] | None): The table path of each source to
+        process. All of ``MID1_TABLES`` if None.
+        output_dir (str | Path): The directory of the prep tables.
+        changed_only (bool): Whether to skip sources whose input fingerprint
+        matches the one recorded by the last successful run.
+        max_workers (int | None): The number of worker processes. One per
+        source, up to the number of CPUs, if None.
+        chunk_size (int): The maximum number of input rows per chunk.
+
+    Returns:
+        dict[str, int]: The number of rows written for each processed source.
+
+    Raises:
+        RuntimeError: If any source failed. The others are still recorded.
+    """
+    tables = MID1_TABLES if tables is None else tables
+    manifest = load_manifest(output_dir)
+
+    pending = {}
+    for source, base_path in tables.items():
+        fingerprint = input_fingerprint(base_path)
+        if fingerprint is None:
+            logging.warning("Skipping %s: no table at %s.", source, base_path)
+        elif changed_only and manifest.get(source) == fingerprint:
+            logging.info("Skipping %s: input unchanged.", source)
+        else:
+            pending[source] = fingerprint
+    if not pending:
+        return {}
+
+    workers = max_workers or min(len(pending), os.cpu_count() or 1)
+    results, failed = {}, []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                split_source,
+                source,
+                tables[source],
+                output_dir,
+                chunk_size,
+            ): source
+            for source in pending
+        }
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                results[source] = future.result()
+            except Exception:
+                logging.exception("Failed to split %s.", source)
+                failed.append(source)
+            else:
+                manifest[source] = pending[source]
+
+    save_manifest(output_dir, manifest)
+    if failed:
+        error_message = f"Failed to split sources: {sorted(failed)}"
+        raise RuntimeError(error_message)
+    return results
+
+
+def main() -> None:
+    """Run the splitter stage from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sources",
+        nargs="+",
+        choices=sorted(MID1_TABLES),
+        help="Only process these sources.",
     )
-    output_file = Path(output_base_dir) / f"{source}_prep.csv"
-    normalized_df.to_csv(output_file, index=False)
+    parser.add_argument(
+        "--changed-only",
+        action="store_true",
+        help="Skip sources whose input did not change since the last run.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes.",
+    )
+    args = parser.parse_args()
+
+    tables = MID1_TABLES
+    if args.sources:
+        tables = {source: MID1_TABLES[source] for source in args.sources}
+    run(tables, changed_only=args.changed_only, max_workers=args.workers)
+
 
-# After the loop finishes, delete the entire data_mid_1 directory
-data_mid_1_dir = "./data_mid_1"
-if Path(data_mid_1_dir).exists():
-    shutil.rmtree(data_mid_1_dir)
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
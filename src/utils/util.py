@@ -1,6 +1,14 @@
 """Utility functions for the project."""
 
+import functools
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+
+from src.unified.dictionaries.dictionary_events import EVENT_TYPE_MAPPING
+
+STRING_DTYPE = pd.StringDtype("pyarrow")
 
 
 def map_and_drop_columns(raw_data: pd.DataFrame, dictionary: dict) -> pd.DataFrame:
@@ -18,9 +26,117 @@ def map_and_drop_columns(raw_data: pd.DataFrame, dictionary: dict) -> pd.DataFra
     return raw_data[list(rename_mapping.keys())].rename(columns=rename_mapping)
 
 
+def _cast_kind(column_type: str | list[str] | None) -> str | None:
+    """Return the cast applied to a column of a JSON schema type.
+
+    The first matching kind wins, so ``["array", "null"]`` is an array column.
+    """
+    for kind in ("array", "string", "number", "integer", "null"):
+        if column_type and kind in column_type:
+            return kind
+    return None
+
+
+@functools.cache
+def _compile_schema(
+    properties: tuple[tuple[str, str | tuple[str, ...] | None], ...],
+) -> tuple[tuple[str, str], ...]:
+    """Compile hashable schema properties into ``(column, kind)`` pairs."""
+    plan = ((column, _cast_kind(column_type)) for column, column_type in properties)
+    return tuple((column, kind) for column, kind in plan if kind)
+
+
+def compile_schema(json_schema: dict) -> tuple[tuple[str, str], ...]:
+    """Compile a JSON schema into a casting plan.
+
+    Plans are cached, so compiling the same schema again, for example for each
+    batch of a stream, costs a dictionary walk but no re-planning.
+
+    Args:
+        json_schema (dict): The JSON schema defining the column types.
+
+    Returns:
+        tuple[tuple[str, str], ...]: The ``(column, kind)`` casts to apply, in
+        schema order. ``kind`` is one of ``array``, ``string``, ``number``,
+        ``integer`` or ``null``.
+    """
+    properties = []
+    for column, column_properties in json_schema["properties"].items():
+        column_type = column_properties.get("type")
+        if isinstance(column_type, list):
+            column_type = tuple(column_type)
+        properties.append((column, column_type))
+    return _compile_schema(tuple(properties))
+
+
+def flatten_array_column(column: pd.Series) -> pd.Series:
+    """Join list cells with commas and turn other values into strings.
+
+    Missing values become empty strings, as list columns are stored flattened.
+
+    Args:
+        column (pd.Series): The column to flatten.
+
+    Returns:
+        pd.Series: An Arrow-backed string column.
+    """
+    if column.dtype.kind in "iu":
+        strings = pa.array(column, from_pandas=True).cast(pa.string()).fill_null("")
+        return pd.Series(pd.arrays.ArrowStringArray(strings), index=column.index)
+    if column.dtype != object:
+        flattened = column.astype(str).where(column.notna(), "")
+        return flattened.astype(STRING_DTYPE)
+
+    is_list = column.map(type).eq(list).to_numpy()
+    flattened = np.empty(len(column), dtype=object)
+    flattened[~is_list] = column[~is_list].astype(STRING_DTYPE).fillna("").to_numpy()
+    if is_list.any():
+        lists = column[is_list]
+        joined = lists.str.join(",").to_numpy()
+        # str.join yields NaN for lists holding non-string values.
+        mixed = pd.isna(joined)
+        joined[mixed] = [",".join(map(str, cell)) for cell in lists[mixed]]
+        flattened[is_list] = joined
+    return pd.Series(flattened, index=column.index, dtype=STRING_DTYPE)
+
+
+def cast_integer_column(column: pd.Series) -> pd.Series:
+    """Cast a column to nullable integers.
+
+    Values that are not numbers or not whole become ``pd.NA``.
+
+    Args:
+        column (pd.Series): The column to cast.
+
+    Returns:
+        pd.Series: An ``Int64`` column.
+    """
+    numeric = pd.to_numeric(column, errors="coerce")
+    if numeric.dtype.kind == "f":
+        numeric = numeric.where(numeric.mod(1).eq(0))
+    return numeric.astype("Int64")
+
+
+CASTS = {
+    "array": flatten_array_column,
+    "string": lambda column: column.astype(STRING_DTYPE),
+    "number": lambda column: pd.to_numeric(column, errors="coerce"),
+    "integer": cast_integer_column,
+    "null": lambda column: column.where(column.notna(), None),
+}
+
+
 def change_data_type(cleaned1_data: pd.DataFrame, json_schema: dict) -> pd.DataFrame:
     """Change the data types of columns in a DataFrame based on a JSON schema.
 
+    Array columns are flattened to comma-separated strings, string columns use
+    Arrow-backed strings, and integer columns nullable ``Int64``.
+
+    Missing values of string columns stay ``pd.NA`` instead of becoming the
+    text ``"None"`` or ``"nan"``, so they are written to CSV as empty cells.
+    Integer values that are not whole numbers, such as ``2020.5``, become
+    ``pd.NA`` instead of failing the whole cast.
+
     Args:
         cleaned1_data (pd.DataFrame): The DataFrame with data to be type-casted.
         json_schema (dict): The JSON schema defining
@@ -29,36 +145,95 @@ def change_data_type(cleaned1_data: pd.DataFrame, json_schema: dict) -> pd.DataF
     Returns:
         pd.DataFrame: The DataFrame with columns cast to the specified data types.
     """
-    for column, properties in json_schema["properties"].items():
+    for column, kind in compile_schema(json_schema):
         if column in cleaned1_data.columns:
-            column_type = properties.get("type")
-            if "array" in column_type:
-                cleaned1_data[column] = cleaned1_data[column].apply(
-                    lambda x: ",".join(map(str, x))
-                    if isinstance(x, list)
-                    else (str(x) if pd.notna(x) else ""),
-                )
-            elif "string" in column_type:
-                cleaned1_data[column] = cleaned1_data[column].astype(str)
-            elif "number" in column_type:
-                cleaned1_data[column] = pd.to_numeric(
-                    cleaned1_data[column],
-                    errors="coerce",
-                )
-            elif "integer" in column_type:
-                cleaned1_data[column] = pd.to_numeric(
-                    cleaned1_data[column],
-                    errors="coerce",
-                ).astype("Int64")
-            elif "null" in column_type:
-                cleaned1_data[column] = cleaned1_data[column].where(
-                    cleaned1_data[column].notna(),
-                    None,
-                )
+            cleaned1_data[column] = CASTS[kind](cleaned1_data[column])
     return cleaned1_data
 
 
-def normalize_event_type(df: pd.DataFrame, event_code_csv: str) -> pd.DataFrame:
+class EventCodeRegistry:
+    """Lookup of normalised event codes by event type description.
+
+    The CSV maps event names to codes. Optional aliases map further
+    descriptions to one of those names, for example ``"Typhoon, Floods"`` to
+    ``"Cyclone"``. Descriptions are matched stripped and upper-cased.
+    """
+
+    def __init__(
+        self,
+        event_code_csv: str,
+        aliases: dict[str, str] | None = None,
+    ) -> None:
+        """Load the event code table.
+
+        Args:
+            event_code_csv (str): The CSV with ``event_code`` and ``event_name``
+            columns.
+            aliases (dict[str, str] | None): Descriptions mapped to event names.
+        """
+        event_mapping_df = pd.read_csv(event_code_csv)
+        self.codes = dict(
+            zip(
+                event_mapping_df["event_name"].str.strip().str.upper(),
+                event_mapping_df["event_code"].str.strip(),
+                strict=False,
+            ),
+        )
+        for description, name in (aliases or {}).items():
+            key = description.strip().upper()
+            code = self.codes.get(name.strip().upper())
+            if code is not None:
+                self.codes.setdefault(key, code)
+
+    def lookup(self, event_type: object) -> object:
+        """Return the code of an event type, or the event type if unknown."""
+        return self.codes.get(str(event_type).strip().upper(), event_type)
+
+    def codes_for(self, event_types: pd.Series) -> pd.Series:
+        """Return the code of each event type of a column.
+
+        Only the distinct values are looked up, then broadcast back to the rows.
+
+        Args:
+            event_types (pd.Series): The event type descriptions.
+
+        Returns:
+            pd.Series: The codes, or the original value where none matches.
+        """
+        positions, uniques = pd.factorize(event_types)
+        mapped = np.array([self.lookup(value) for value in uniques], dtype=object)
+        # Missing values have position -1 and take the trailing None.
+        codes = np.append(mapped, None)[positions]
+        return pd.Series(codes, index=event_types.index).fillna(event_types)
+
+
+@functools.cache
+def get_event_code_registry(
+    event_code_csv: str,
+    *,
+    include_event_type_mapping: bool = False,
+) -> EventCodeRegistry:
+    """Return the process-wide registry of an event code table.
+
+    Args:
+        event_code_csv (str): The CSV with ``event_code`` and ``event_name``
+        columns.
+        include_event_type_mapping (bool): Also resolve the descriptions of
+        ``EVENT_TYPE_MAPPING`` to their standardised category.
+
+    Returns:
+        EventCodeRegistry: The registry, loaded once per process.
+    """
+    aliases = EVENT_TYPE_MAPPING if include_event_type_mapping else None
+    return EventCodeRegistry(event_code_csv, aliases)
+
+
+def normalize_event_type(
+    df: pd.DataFrame,
+    event_code_csv: str,
+    *,
+    include_event_type_mapping: bool = False,
+) -> pd.DataFrame:
     """Normalizes the Event_Type.
 
     The CSV file is expected to have two columns with headers:
@@ -74,28 +249,15 @@ def normalize_event_type(df: pd.DataFrame, event_code_csv: str) -> pd.DataFrame:
         df (pd.DataFrame): The input DataFrame containing an 'Event_Type' column.
         event_code_csv (str): The path to the CSV file containing the event code
             mapping.
+        include_event_type_mapping (bool): Also match the descriptions of
+            ``EVENT_TYPE_MAPPING``, such as ``"Typhoon, Floods"``.
 
     Returns:
         pd.DataFrame: The DataFrame with an additional 'Event_Code' column.
     """
-    event_mapping_df = pd.read_csv(event_code_csv)
-    event_mapping_df["event_name"] = (
-        event_mapping_df["event_name"].str.strip().str.upper()
-    )
-    event_mapping_df["event_code"] = event_mapping_df["event_code"].str.strip()
-    mapping = dict(
-        zip(
-            event_mapping_df["event_name"],
-            event_mapping_df["event_code"],
-            strict=False,
-        ),
-    )
-    df["Event_Code"] = (
-        df["Event_Type"]
-        .astype(str)
-        .str.strip()
-        .str.upper()
-        .map(mapping)
-        .fillna(df["Event_Type"])
+    registry = get_event_code_registry(
+        event_code_csv,
+        include_event_type_mapping=include_event_type_mapping,
     )
+    df["Event_Code"] = registry.codes_for(df["Event_Type"])
     return df
@@ -0,0 +1,195 @@
+"""Tests for the Disaster Charter activation detail page parser."""
+
+import csv
+import json
+import logging
+import re
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+import requests
+from bs4 import BeautifulSoup
+
+from src.disaster_charter import data_acquisition_scrape
+from src.disaster_charter.data_acquisition_scrape import (
+    HEADER,
+    LABEL_PATTERNS,
+    collect_rows,
+    parse_detail_page,
+    scrape_detail_page,
+)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+FIXTURE_PAGES = sorted(FIXTURES_DIR.glob("*.html"))
+
+
+def legacy_parse_detail_page(html: bytes) -> dict:
+    """The original parser, scanning the whole tree once per label."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    def pull(regex: str) -> str:
+        pat = re.compile(regex + r":?$", re.IGNORECASE)
+        lbl = soup.find(lambda tag: tag.string and pat.search(tag.string.strip()))
+        if not lbl:
+            return "N/A"
+        val_cell = lbl.find_next("td") if lbl.name == "th" else lbl.find_next()
+        return val_cell.get_text(strip=True) if val_cell else "N/A"
+
+    return {k: pull(rgx) for k, rgx in LABEL_PATTERNS.items()}
+
+
+def test_parse_detail_page_table_layout() -> None:
+    """Test that labels in <th> cells take the value of the next <td>."""
+    html = (FIXTURES_DIR / "activation_flood_nigeria_963.html").read_bytes()
+
+    result = parse_detail_page(html, parser="html.parser")
+
+    assert result == {
+        "type_of_event": "Flood",
+        "location_of_event": "Nigeria",
+        "date_of_activation": "2024-09-12",
+        "time_of_activation": "08:45",
+        "timezone": "UTC+01:00",
+        "charter_requestor": "NEMA on behalf of UNITAR",
+        "activation_id": "963",
+        "project_management": "UNITAR/UNOSAT",
+        "value_adding": "UNITAR/UNOSAT, SERTIT",
+    }
+
+
+@pytest.mark.parametrize("page", FIXTURE_PAGES, ids=lambda page: page.stem)
+def test_parse_detail_page_matches_legacy_parser(page: Path) -> None:
+    """Test that the single-pass parser gives the same fields as the original."""
+    html = page.read_bytes()
+
+    assert parse_detail_page(html, parser="html.parser") == legacy_parse_detail_page(
+        html,
+    )
+
+
+@pytest.mark.parametrize("page", FIXTURE_PAGES, ids=lambda page: page.stem)
+def test_parse_detail_page_lxml_matches_legacy_parser(page: Path) -> None:
+    """Test that the lxml parser used in production gives the same fields."""
+    pytest.importorskip("lxml")
+    html = page.read_bytes()
+
+    assert parse_detail_page(html, parser="lxml") == legacy_parse_detail_page(html)
+
+
+def test_scrape_detail_page_raises_on_failed_response(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a failed detail page raises instead of giving an N/A row."""
+    response = requests.Response()
+    response.status_code = 404
+    response.url = "https://disasterscharter.org/missing"
+    monkeypatch.setattr(
+        data_acquisition_scrape.SESSION,
+        "get",
+        lambda *_, **__: response,
+    )
+    monkeypatch.setattr(
+        data_acquisition_scrape.RATE_LIMITER,
+        "acquire",
+        lambda _url: None,
+    )
+
+    with pytest.raises(requests.HTTPError):
+        scrape_detail_page("missing-activation")
+
+
+@pytest.fixture
+def crawl(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Crawl one year of fake activations into a temporary directory."""
+    monkeypatch.setattr(data_acquisition_scrape, "CSV_PATH", tmp_path / "charter.csv")
+    monkeypatch.setattr(
+        data_acquisition_scrape,
+        "STATE_PATH",
+        tmp_path / ".crawl_state.jsonl",
+    )
+    monkeypatch.setattr(data_acquisition_scrape, "YEAR_FROM", 2024)
+    monkeypatch.setattr(data_acquisition_scrape, "YEAR_TO", 2024)
+    monkeypatch.setattr(
+        data_acquisition_scrape,
+        "list_activations",
+        lambda _yr: [{"slug": f"activation-{i}", "title": "Flood"} for i in (7, 12, 9)],
+    )
+
+    def fake_scrape(slug: str) -> dict:
+        details = dict.fromkeys(LABEL_PATTERNS, "N/A")
+        details["activation_id"] = slug.rsplit("-", 1)[-1]
+        return details
+
+    monkeypatch.setattr(data_acquisition_scrape, "scrape_detail_page", fake_scrape)
+    return tmp_path
+
+
+def read_csv_column(path: Path, column: str) -> list[str]:
+    """Return the values of one column of a CSV file."""
+    with path.open(newline="", encoding="utf-8") as fh:
+        return [row[column] for row in csv.DictReader(fh)]
+
+
+def test_collect_rows_sorts_by_activation_id(crawl: Path) -> None:
+    """Test that rows of this and earlier runs end up sorted by activation ID."""
+    with (crawl / "charter.csv").open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(HEADER)
+        for activation_id, slug in (("N/A", "no-id"), ("10", "activation-10")):
+            row = dict.fromkeys(HEADER, "N/A")
+            row["Activation ID"] = activation_id
+            row["Details Link"] = f"https://disasterscharter.org/{slug}"
+            writer.writerow(row.values())
+
+    assert collect_rows() == 3
+    assert read_csv_column(crawl / "charter.csv", "Activation ID") == [
+        "12",
+        "10",
+        "9",
+        "7",
+        "N/A",
+    ]
+
+
+def test_collect_rows_drops_torn_state_line(crawl: Path) -> None:
+    """Test that a partial checkpoint line is cut instead of appended to."""
+    state_path = crawl / ".crawl_state.jsonl"
+    state_path.write_text('{"slug": "activation-7"}\n{"slug": "activ')
+
+    assert collect_rows() == 2
+    slugs = [json.loads(line)["slug"] for line in state_path.read_text().splitlines()]
+    assert sorted(slugs) == ["activation-12", "activation-7", "activation-9"]
+
+
+@pytest.mark.slow
+def test_benchmark_parse_detail_page() -> None:
+    """Report pages per second of the legacy and single-pass parsers."""
+    pages = [page.read_bytes() for page in FIXTURE_PAGES]
+    rounds = 50
+
+    def pages_per_second(parse: Callable[[bytes], dict]) -> float:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for html in pages:
+                parse(html)
+        return rounds * len(pages) / (time.perf_counter() - start)
+
+    legacy = pages_per_second(legacy_parse_detail_page)
+    single_pass = pages_per_second(
+        lambda html: parse_detail_page(html, parser="html.parser"),
+    )
+    default_parser = pages_per_second(parse_detail_page)
+    logging.getLogger(__name__).warning(
+        "Charter detail pages/s: legacy %.0f, single pass %.0f, default parser %.0f",
+        legacy,
+        single_pass,
+        default_parser,
+    )
+
+    for html in pages:
+        assert parse_detail_page(
+            html,
+            parser="html.parser",
+        ) == legacy_parse_detail_page(html)
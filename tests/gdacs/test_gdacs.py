@@ -0,0 +1,281 @@
+"""Tests for the GDACS acquisition window planner."""
+
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import requests
+
+from src.gdacs import data_acquisition_api
+from src.gdacs.data_acquisition_api import (
+    DELTA_LOOKBACK,
+    START_DATE,
+    IncompleteLaneError,
+    WindowPlanner,
+    fetch_adaptive,
+    harvest,
+    iter_year_lanes,
+    load_sync_state,
+    merge_into_yearly_csvs,
+    save_sync_state,
+    sync,
+)
+from src.utils.batch_accumulator import BatchAccumulator
+
+
+def test_iter_year_lanes() -> None:
+    """Lanes are aligned on calendar years and cover the whole range."""
+    lanes = list(
+        iter_year_lanes(
+            datetime(2000, 6, 1, tzinfo=timezone.utc),
+            datetime(2002, 3, 1, tzinfo=timezone.utc),
+        ),
+    )
+
+    assert [(start.date(), end.date()) for start, end in lanes] == [
+        (date(2000, 6, 1), date(2001, 1, 1)),
+        (date(2001, 1, 1), date(2002, 1, 1)),
+        (date(2002, 1, 1), date(2002, 3, 1)),
+    ]
+
+
+def test_next_interval() -> None:
+    """Windows shrink after dense responses and widen after sparse ones."""
+    planner = WindowPlanner(target_events=50, max_growth=2.0)
+    interval = timedelta(days=30)
+
+    assert planner.next_interval(interval, 50) == interval
+    assert planner.next_interval(interval, 75) == timedelta(days=20)
+    assert planner.next_interval(interval, 0) == timedelta(days=60)
+    assert planner.next_interval(timedelta(days=300), 0) == planner.max_interval
+    assert planner.next_interval(timedelta(days=1), 1000) == planner.min_interval
+
+
+def test_fetch_adaptive_bisects_truncated_windows(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Truncated windows are split until no response hits the limit."""
+    start_date = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    daily_events = 10
+    calls = []
+
+    def fake_fetch_events(
+        window_start: datetime,
+        window_end: datetime,
+        event_type: str,
+        *_: object,
+    ) -> list[dict]:
+        calls.append((window_start, window_end))
+        first_day = (window_start - start_date).days
+        last_day = (window_end - start_date).days
+        return [
+            {"event_id": day * daily_events + i, "event_type": event_type}
+            for day in range(first_day, last_day)
+            for i in range(daily_events)
+        ][:100]
+
+    monkeypatch.setattr(data_acquisition_api, "fetch_events", fake_fetch_events)
+    planner = WindowPlanner(
+        initial_interval=timedelta(days=16),
+        truncation_limit=100,
+        target_events=50,
+    )
+
+    events = fetch_adaptive(
+        start_date,
+        start_date + timedelta(days=32),
+        "FL",
+        planner,
+    )
+
+    assert sorted(event["event_id"] for event in events) == list(range(320))
+    assert all(end - start <= timedelta(days=8) for start, end in calls[-3:])
+
+
+def test_fetch_adaptive_stops_at_failed_window(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A failed window ends the lane without widening the next window."""
+    start_date = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    failed_date = start_date + timedelta(days=10)
+    calls = []
+
+    def fake_fetch_events(
+        window_start: datetime,
+        window_end: datetime,
+        event_type: str,
+        *_: object,
+    ) -> list[dict]:
+        calls.append((window_start, window_end))
+        if window_start == failed_date:
+            error_message = "Service unavailable"
+            raise requests.ConnectionError(error_message)
+        return [{"event_id": len(calls), "event_type": event_type}]
+
+    monkeypatch.setattr(data_acquisition_api, "fetch_events", fake_fetch_events)
+    planner = WindowPlanner(initial_interval=timedelta(days=10))
+
+    with pytest.raises(IncompleteLaneError) as error:
+        fetch_adaptive(start_date, start_date + timedelta(days=60), "FL", planner)
+
+    assert error.value.resume_date == failed_date
+    assert [event["event_id"] for event in error.value.events] == [1]
+    assert calls[-1][0] == failed_date
+
+
+def test_harvest_reports_earliest_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Events before a failure are kept and its start date is reported."""
+    start_date = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    failed_date = datetime(2021, 3, 1, tzinfo=timezone.utc)
+
+    def fake_fetch_events(
+        window_start: datetime,
+        window_end: datetime,
+        event_type: str,
+        *_: object,
+    ) -> list[dict]:
+        if event_type == "FL" and window_start <= failed_date < window_end:
+            error_message = "Invalid JSON"
+            raise requests.exceptions.JSONDecodeError(error_message, "", 0)
+        return [{"event_id": window_start.isoformat(), "event_type": event_type}]
+
+    monkeypatch.setattr(data_acquisition_api, "fetch_events", fake_fetch_events)
+    accumulator = BatchAccumulator()
+    tasks = [
+        (lane_start, lane_end, event_type)
+        for event_type in ("FL", "EQ")
+        for lane_start, lane_end in iter_year_lanes(
+            start_date,
+            datetime(2022, 1, 1, tzinfo=timezone.utc),
+        )
+    ]
+
+    failures = harvest(
+        tasks,
+        accumulator,
+        WindowPlanner(initial_interval=timedelta(days=30)),
+        max_workers=2,
+        requests_per_second=1000,
+    )
+
+    assert list(failures) == ["FL"]
+    assert failures["FL"] <= failed_date
+    events = accumulator.to_frame()
+    flood_dates = pd.to_datetime(events.loc[events["event_type"] == "FL", "event_id"])
+    assert flood_dates.min() == start_date
+    assert (flood_dates < failures["FL"]).all()
+    assert (events["event_type"] == "EQ").any()
+
+
+@pytest.fixture
+def sync_dirs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point the GDACS output and sync state at a temporary directory."""
+    monkeypatch.setattr(data_acquisition_api, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        data_acquisition_api,
+        "SYNC_STATE_DIR",
+        str(tmp_path / ".sync"),
+    )
+    return tmp_path
+
+
+def test_sync_state_round_trip(sync_dirs: Path) -> None:
+    """Test that the saved state is loaded back and missing states are empty."""
+    last_to_date = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+    save_sync_state("EQ", last_to_date, {3, 1})
+
+    assert load_sync_state("EQ") == {
+        "last_to_date": last_to_date.isoformat(),
+        "seen_event_ids": [1, 3],
+    }
+    assert load_sync_state("FL") == {}
+    assert not list((sync_dirs / ".sync").glob("*.tmp"))
+
+
+def test_merge_into_yearly_csvs_rewrites_affected_years(sync_dirs: Path) -> None:
+    """Test that fresh events replace stored ones and other years are kept."""
+    pd.DataFrame(
+        {
+            "event_id": [1, 2],
+            "event_type": ["EQ", "EQ"],
+            "from_date": ["2024-04-20", "2024-04-25"],
+            "alert": ["Green", "Green"],
+        },
+    ).to_csv(sync_dirs / "gdacs_events_2024.csv", index=False)
+    older_file = sync_dirs / "gdacs_events_2023.csv"
+    older_file.write_text("event_id,event_type,from_date,alert\n9,EQ,2023-01-01,Red\n")
+    older_mtime = older_file.stat().st_mtime_ns
+
+    years = merge_into_yearly_csvs(
+        pd.DataFrame(
+            {
+                "event_id": [1, 3, 1],
+                "event_type": ["EQ", "EQ", "FL"],
+                "from_date": ["2024-04-20", "2024-05-02", "2024-05-03"],
+                "alert": ["Orange", "Green", "Green"],
+            },
+        ),
+        str(sync_dirs),
+    )
+
+    merged = pd.read_csv(sync_dirs / "gdacs_events_2024.csv")
+    assert years == [2024]
+    assert older_file.stat().st_mtime_ns == older_mtime
+    assert sorted(
+        zip(merged["event_type"], merged["event_id"], merged["alert"], strict=True),
+    ) == [
+        ("EQ", 1, "Orange"),
+        ("EQ", 2, "Green"),
+        ("EQ", 3, "Green"),
+        ("FL", 1, "Green"),
+    ]
+
+
+def test_sync_resumes_with_lookback_and_keeps_failed_marks(
+    sync_dirs: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test the delta ranges and that failed lanes do not advance the state."""
+    synced_until = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    end_date = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    save_sync_state("EQ", synced_until, {1})
+    save_sync_state("FL", synced_until, set())
+    monkeypatch.setattr(data_acquisition_api, "EVENT_TYPES", ["EQ", "FL", "TC"])
+    tasks = []
+
+    def fake_harvest(
+        lane_tasks: list[tuple[datetime, datetime, str]],
+        writer: BatchAccumulator,
+    ) -> dict[str, datetime]:
+        tasks.extend(lane_tasks)
+        writer.write(
+            [
+                {"event_id": 1, "event_type": "EQ", "from_date": "2024-04-20"},
+                {"event_id": 2, "event_type": "EQ", "from_date": "2024-05-10"},
+            ],
+        )
+        # FL fails in its first lane, inside the lookback, TC in its first one.
+        return {"FL": synced_until - DELTA_LOOKBACK, "TC": START_DATE}
+
+    monkeypatch.setattr(data_acquisition_api, "harvest", fake_harvest)
+
+    sync(end_date)
+    sync(end_date)
+
+    starts = {
+        event_type: min(
+            start for start, _, task_type in tasks if task_type == event_type
+        )
+        for event_type in ("EQ", "FL", "TC")
+    }
+    assert starts["EQ"] == starts["FL"] == synced_until - DELTA_LOOKBACK
+    assert starts["TC"] == START_DATE
+    assert load_sync_state("EQ") == {
+        "last_to_date": end_date.isoformat(),
+        "seen_event_ids": [1, 2],
+    }
+    assert load_sync_state("FL")["last_to_date"] == synced_until.isoformat()
+    assert load_sync_state("TC")["last_to_date"] == START_DATE.isoformat()
+    assert len(pd.read_csv(sync_dirs / "gdacs_events_2024.csv")) == 2
@@ -0,0 +1,123 @@
+"""Tests for the GDACS coordinate and country enrichment."""
+
+import ast
+import re
+
+import numpy as np
+import pandas as pd
+import pycountry
+
+from src.gdacs.data_normalisation_gdacs import enrich_country_data, split_coordinates
+
+
+def legacy_split_coordinates(df: pd.DataFrame) -> pd.DataFrame:
+    """The original row-wise coordinate split."""
+    coordinates = df["coordinates"].apply(
+        lambda x: ast.literal_eval(x)
+        if isinstance(x, str) and x.startswith("[")
+        else x,
+    )
+    df["Latitude"] = coordinates.apply(
+        lambda x: x[1] if isinstance(x, list) and len(x) == 2 else None,
+    )
+    df["Longitude"] = coordinates.apply(
+        lambda x: x[0] if isinstance(x, list) and len(x) == 2 else None,
+    )
+    return df
+
+
+def legacy_enrich_country_data(df: pd.DataFrame) -> pd.DataFrame:
+    """The original row-wise country enrichment."""
+
+    def from_event_name(row: pd.Series) -> str:
+        if pd.isna(row["Country"]) and isinstance(row["Event_Name"], str):
+            match = re.search(r"\bin\s+([A-Za-z0-9\s\(\)-]+)$", row["Event_Name"])
+            if match:
+                return match.group(1).strip()
+        return row["Country"]
+
+    def from_country(row: pd.Series) -> str:
+        if pd.isna(row["Country_Code"]) and isinstance(row["Country"], str):
+            match = re.search(r"\(([^)]*)\)", row["Country"])
+            if match:
+                return match.group(1).strip()
+        return row["Country_Code"]
+
+    def fuzzy_iso3(country_name: str) -> str | None:
+        if country_name and isinstance(country_name, str):
+            try:
+                return pycountry.countries.search_fuzzy(country_name)[0].alpha_3
+            except LookupError:
+                return None
+        return None
+
+    df["Country"] = df.apply(from_event_name, axis=1)
+    df["Country_Code"] = df.apply(from_country, axis=1)
+    df["Country"] = df["Country"].str.replace(r"\s*\([^)]*\)$", "", regex=True)
+    df["Country_Code"] = df.apply(
+        lambda row: row["Country_Code"]
+        if pd.notna(row["Country_Code"])
+        else fuzzy_iso3(row["Country"]),
+        axis=1,
+    )
+    return df
+
+
+def sample_events(rows: int) -> pd.DataFrame:
+    """Build GDACS-like rows as read back from the raw CSV files."""
+    rng = np.random.default_rng(2)
+    pick = rng.integers(0, 4, rows)
+    return pd.DataFrame(
+        {
+            "Event_Name": np.array(
+                ["Flood in Chad", "Earthquake in Peru (PER)", "Drought", None],
+                dtype=object,
+            )[pick],
+            "Country": np.array([None, None, "Nepal", "Kenya (KEN)"], dtype=object)[
+                pick
+            ],
+            "Country_Code": np.array([None, None, None, "KEN"], dtype=object)[pick],
+            "coordinates": np.array(
+                ["[15.2, 12.1]", "[-75, -9.5]", "[]", np.nan],
+                dtype=object,
+            )[pick],
+        },
+    )
+
+
+def test_split_coordinates_matches_legacy() -> None:
+    """Test that numeric parsing gives the values of literal_eval."""
+    events = sample_events(200)
+
+    result = split_coordinates(events.copy())
+    expected = legacy_split_coordinates(events.copy())
+
+    for column in ("Latitude", "Longitude"):
+        np.testing.assert_array_equal(
+            result[column].to_numpy(dtype=float),
+            expected[column].to_numpy(dtype=float),
+        )
+
+
+def test_split_coordinates_accepts_lists() -> None:
+    """Test that coordinates straight from the API JSON are split too."""
+    events = pd.DataFrame({"coordinates": [[1.5, -2.25], [], None]})
+
+    result = split_coordinates(events)
+
+    assert result["Longitude"].tolist()[0] == 1.5
+    assert result["Latitude"].tolist()[0] == -2.25
+    assert result["Latitude"][1:].isna().all()
+
+
+def test_enrich_country_data_matches_legacy() -> None:
+    """Test that the columnar enrichment gives the row-wise result."""
+    events = sample_events(200)
+
+    result = enrich_country_data(events.copy())
+    expected = legacy_enrich_country_data(events.copy())
+
+    for column in ("Country", "Country_Code"):
+        assert result[column].fillna("").tolist() == (
+            expected[column].fillna("").tolist()
+        )
@@ -0,0 +1,180 @@
+"""Tests for the streaming GLIDE report parser."""
+
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from bs4 import BeautifulSoup
+
+from src.glide import data_acquisition_scrape
+from src.glide.data_acquisition_scrape import (
+    combine_year_chunks,
+    iter_html_chunks,
+    iter_table_chunks,
+    parse_html_to_dataframe,
+    parse_html_to_file,
+    scrape_by_year,
+    set_date_fields,
+)
+
+HEADERS = ["GLIDE_number", "Event", "Country", "Date_"]
+
+
+def build_report(n_rows: int) -> str:
+    """Build a GLIDE report page with ``n_rows`` result rows."""
+    header = "".join(f"<th>{h}</th>" for h in HEADERS)
+    rows = "".join(
+        f"<tr><td>FL-2020-{i:06d}-NGA</td><td>Flood</td>"
+        f"<td><a href='#'>Nigeria &amp; Niger</a></td><td> 2020/07/{i % 28 + 1:02d}"
+        "</td></tr>"
+        for i in range(n_rows)
+    )
+    return (
+        "<html><body><table width='100%'><tr><td>Menu</td></tr></table>"
+        "<table cellspacing='1' cellpadding='1' border='1' width='100%'>"
+        f"<tr>{header}</tr>{rows}"
+        "<tr><td colspan='4'>Hits:0</td></tr>"
+        "<tr><td>Hits: 12</td><td></td><td></td><td></td></tr>"
+        "</table></body></html>"
+    )
+
+
+def legacy_parse_html_to_dataframe(html: str) -> pd.DataFrame:
+    """The original BeautifulSoup implementation."""
+    soup = BeautifulSoup(html, "html.parser")
+    data_table = soup.find(
+        "table",
+        {"cellspacing": "1", "cellpadding": "1", "border": "1", "width": "100%"},
+    )
+    headers = [th.text.strip() for th in data_table.find_all("th")]
+    rows = []
+    for tr in data_table.find_all("tr")[1:]:
+        cells = [td.text.strip() for td in tr.find_all("td")]
+        if len(cells) == len(headers) and not any("Hits:" in cell for cell in cells):
+            rows.append(cells)
+    return pd.DataFrame(rows, columns=headers)
+
+
+def test_parse_html_to_dataframe_matches_legacy_parser() -> None:
+    """Test that the streaming parser returns the same table as BeautifulSoup."""
+    html = build_report(25)
+
+    pd.testing.assert_frame_equal(
+        parse_html_to_dataframe(html),
+        legacy_parse_html_to_dataframe(html),
+    )
+
+
+def test_iter_table_chunks_across_feed_boundaries() -> None:
+    """Test that rows split across fed slices are reassembled into chunks."""
+    html = build_report(25)
+
+    chunks = list(iter_table_chunks(iter_html_chunks(html, size=7), chunk_rows=10))
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert list(chunks[0].columns) == HEADERS
+    assert chunks[0].loc[0, "Country"] == "Nigeria & Niger"
+
+
+def test_parse_html_to_file(tmp_path: Path) -> None:
+    """Test that chunks are appended to a single CSV with one header."""
+    output_path = tmp_path / "glide_events.csv"
+
+    total = parse_html_to_file(
+        iter_html_chunks(build_report(25)),
+        str(output_path),
+        chunk_rows=10,
+    )
+
+    result = pd.read_csv(output_path, dtype=str)
+    assert total == len(result) == 25
+    assert list(result.columns) == HEADERS
+
+
+class FakeDriver:
+    """Stand-in for a browser session."""
+
+    def quit(self) -> None:
+        pass
+
+
+def test_scrape_by_year_drops_stale_chunks_of_empty_years(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a year without events removes its chunk of an earlier run."""
+    monkeypatch.setattr(data_acquisition_scrape, "create_driver", FakeDriver)
+    monkeypatch.setattr(
+        data_acquisition_scrape,
+        "request_report",
+        lambda _driver, date_range, **_: build_report(
+            3 if date_range[0].year == 2020 else 0,
+        ),
+    )
+    stale_chunk = tmp_path / "glide_events_2021.csv"
+    parse_html_to_file(iter_html_chunks(build_report(5)), str(stale_chunk))
+
+    assert scrape_by_year([2020, 2021], chunks_dir=str(tmp_path)) == []
+    assert not stale_chunk.exists()
+    assert combine_year_chunks(str(tmp_path), str(tmp_path / "glide.csv")) == 3
+
+
+class FakeField:
+    """Stand-in for a form field, optionally accepting only some values."""
+
+    def __init__(self, options: list[str] | None = None) -> None:
+        self.options = options
+        self.value = ""
+
+    def get_attribute(self, _name: str) -> str:
+        return self.value
+
+
+class FakeFormDriver:
+    """Stand-in for a browser session showing a report form."""
+
+    def __init__(self, fields: dict[str, FakeField]) -> None:
+        self.fields = fields
+
+    def find_elements(self, _by: str, name: str) -> list[FakeField]:
+        return [self.fields[name]] if name in self.fields else []
+
+    def find_element(self, _by: str, name: str) -> FakeField:
+        return self.fields[name]
+
+    def execute_script(self, _script: str, field: FakeField, value: str) -> None:
+        if field.options is None or value in field.options:
+            field.value = value
+
+
+DATE_NAMES = ["fromyear", "frommonth", "fromday", "toyear", "tomonth", "today"]
+YEAR_2020 = (date(2020, 1, 1), date(2020, 12, 31))
+
+
+def test_set_date_fields() -> None:
+    """Test that the date filter is filled from the date range."""
+    driver = FakeFormDriver({name: FakeField() for name in DATE_NAMES})
+
+    set_date_fields(driver, YEAR_2020)
+
+    assert [driver.fields[name].value for name in DATE_NAMES] == [
+        "2020",
+        "1",
+        "1",
+        "2020",
+        "12",
+        "31",
+    ]
+
+
+def test_set_date_fields_rejects_changed_form() -> None:
+    """Test that missing or rejecting date fields raise instead of being ignored."""
+    without_day = FakeFormDriver({name: FakeField() for name in DATE_NAMES[:-1]})
+    with pytest.raises(ValueError, match="today"):
+        set_date_fields(without_day, YEAR_2020)
+
+    padded_months = FakeFormDriver({name: FakeField() for name in DATE_NAMES})
+    padded_months.fields["frommonth"] = FakeField([f"{m:02d}" for m in range(1, 13)])
+    with pytest.raises(ValueError, match="frommonth"):
+        set_date_fields(padded_months, YEAR_2020)
@@ -0,0 +1,249 @@
+"""Tests for the consolidation engine of the unified module."""
+
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.unified.consolidation import (
+    SOURCE_ADAPTERS,
+    UNIFIED_SCHEMA_PATH,
+    SourceAdapter,
+    consolidate,
+    run,
+    to_unified_table,
+)
+from src.utils.intermediate_io import read_intermediate, write_intermediate
+
+PREP_TABLES = {
+    "gdacs": {
+        "Source_Event_IDs": ["1000", "1000", "1001"],
+        "Event_Code": ["FL", "FL", "EQ"],
+        "Country_Code": ["CHN", "IND", "JPN"],
+        "Date": ["2020-07-01", "2020-07-01", "2020-03-01"],
+        "End_Date": ["2020-07-10", "2020-07-10", None],
+    },
+    "glide": {
+        "Source_Event_IDs": ["FL-2020-01-CHN", "EQ-2020-02-PER"],
+        "Event_Code": ["FL", "EQ"],
+        "Country_Code": ["CHN", "PER"],
+        "Date": ["2020-07-15", "2020-03-01"],
+    },
+    "cerf": {
+        "Source_Event_IDs": ["20-RR-CHN-001", "20-RR-JPN-001"],
+        "Event_Code": ["FL", "EQ"],
+        "Country_Code": ["CHN", "JPN"],
+        "Date": ["2020-07-29", "2020-03-20"],
+    },
+}
+
+
+def write_prep_tables(prep_dir: Path) -> None:
+    """Write small prep tables for GDACS, GLIDE and CERF."""
+    for source, table in PREP_TABLES.items():
+        write_intermediate(pd.DataFrame(table), prep_dir / f"{source}_prep")
+
+
+def test_consolidate_matches_sources_within_tolerance(tmp_path: Path) -> None:
+    """Test that events match on hazard, country and the source tolerance."""
+    write_prep_tables(tmp_path)
+    adapters = [SOURCE_ADAPTERS[source] for source in PREP_TABLES]
+
+    disaster_df = consolidate(adapters, tmp_path)
+
+    china = disaster_df[disaster_df["Country_Code"] == "CHN"]
+    assert len(china) == 1
+    assert china[["gdacs_id", "glide_id", "cerf_id"]].iloc[0].tolist() == [
+        "1000",
+        "FL-2020-01-CHN",
+        "20-RR-CHN-001",
+    ]
+    assert china["initial_date"].iloc[0] == pd.Timestamp("2020-07-01")
+    assert china["end_date"].iloc[0] == pd.Timestamp("2020-07-29")
+    # The CERF allocation is 19 days after the Japanese earthquake.
+    assert (disaster_df["Country_Code"] == "JPN").sum() == 2
+    assert len(disaster_df) == 5
+    assert not disaster_df.columns.str.endswith("_row").any()
+
+
+def test_run_writes_unified_schema(tmp_path: Path) -> None:
+    """Test that the unified table follows the unified schema."""
+    write_prep_tables(tmp_path / "prep")
+    schema = json.loads(Path(UNIFIED_SCHEMA_PATH).read_text())
+
+    output = run(list(PREP_TABLES), tmp_path / "prep", tmp_path / "unified")
+    unified_df = read_intermediate(tmp_path / "unified")
+
+    assert output.exists()
+    assert list(unified_df.columns) == list(schema["properties"])
+    china = unified_df[unified_df["Country_Code"].str[0] == "CHN"].iloc[0]
+    assert list(china["Source"]) == ["gdacs", "glide", "cerf"]
+    assert china["Year"] == 2020
+    assert china["End_Date"] == "2020-07-29T00:00:00"
+    assert china["Disaster_Impact_ID"].startswith("DI-")
+    assert unified_df["Disaster_Impact_ID"].is_unique
+
+
+FULLY_MATCHED_TABLES = {
+    "gdacs": {
+        "Source_Event_IDs": ["1000", "1001", "1002"],
+        "Event_Code": ["FL", "EQ", "TC/ST"],
+        "Country_Code": ["CHN", "PER", "PHL"],
+        "Date": ["2020-07-01", "2020-03-01", "2020-11-01"],
+        "End_Date": ["2020-07-10", None, "2020-11-03"],
+    },
+    # Every GLIDE record matches a GDACS event.
+    "glide": {
+        "Source_Event_IDs": ["FL-2020-CHN", "TC-2020-PHL"],
+        "Event_Code": ["FL", "TC/ST"],
+        "Country_Code": ["CHN", "PHL"],
+        "Date": ["2020-07-12", "2020-11-02"],
+    },
+    "cerf": {
+        "Source_Event_IDs": ["20-RR-CHN", "20-UF-KEN"],
+        "Event_Code": ["FL", "DR"],
+        "Country_Code": ["CHN", "KEN"],
+        "Date": ["2020-07-18", "2020-08-01"],
+    },
+    # Every EM-DAT record matches an earlier event.
+    "emdat": {
+        "Source_Event_IDs": ["2020-0001-PER", "2020-0002-KEN"],
+        "Event_Code": ["EQ", "DR"],
+        "Country_Code": ["PER", "KEN"],
+        "Date": ["2020-03-02", "2020-08-03"],
+    },
+}
+
+
+def test_consolidate_keeps_events_in_fully_matched_rounds(tmp_path: Path) -> None:
+    """Test that fully matched rounds neither lose nor add events."""
+    for source, table in FULLY_MATCHED_TABLES.items():
+        write_intermediate(pd.DataFrame(table), tmp_path / f"{source}_prep")
+    adapters = [SOURCE_ADAPTERS[source] for source in FULLY_MATCHED_TABLES]
+
+    disaster_df = consolidate(adapters, tmp_path)
+    unified_df = to_unified_table(
+        disaster_df,
+        adapters,
+        json.loads(Path(UNIFIED_SCHEMA_PATH).read_text()),
+    )
+
+    assert disaster_df["unique_id"].tolist() == [0, 1, 2, 3]
+    assert disaster_df["Event_Code"].notna().all()
+    assert sorted(map(sorted, unified_df["Source_Event_IDs"])) == [
+        ["1000", "20-RR-CHN", "FL-2020-CHN"],
+        ["1001", "2020-0001-PER"],
+        ["1002", "TC-2020-PHL"],
+        ["20-UF-KEN", "2020-0002-KEN"],
+    ]
+
+
+def test_to_unified_table_follows_adapter_match_columns(tmp_path: Path) -> None:
+    """Test that only the configured match columns fill the unified fields."""
+    write_prep_tables(tmp_path)
+    adapters = [
+        SourceAdapter(source, match_columns=("Event_Code",), tolerance_days=14)
+        for source in ("glide", "cerf")
+    ]
+    schema = json.loads(Path(UNIFIED_SCHEMA_PATH).read_text())
+
+    unified_df = to_unified_table(consolidate(adapters, tmp_path), adapters, schema)
+
+    assert unified_df["Event_Type"].map(tuple).tolist() == [("FL",), ("EQ",), ("EQ",)]
+    assert unified_df["Country_Code"].isna().all()
+
+
+def clusters_of(disaster_df: pd.DataFrame) -> set:
+    """Return the source IDs of each event, independently of row order."""
+    id_columns = [column for column in disaster_df if column.endswith("_id")]
+    return {
+        frozenset(
+            (column, event_id)
+            for column in id_columns
+            if isinstance(row[column], list)
+            for event_id in row[column]
+        )
+        for _, row in disaster_df.iterrows()
+    }
+
+
+def test_graph_mode_clusters_independently_of_order(tmp_path: Path) -> None:
+    """Test that the graph mode links all sources regardless of their order."""
+    write_prep_tables(tmp_path)
+    adapters = [SOURCE_ADAPTERS[source] for source in PREP_TABLES]
+
+    disaster_df = consolidate(adapters, tmp_path, mode="graph")
+    reversed_df = consolidate(adapters[::-1], tmp_path, mode="graph")
+
+    assert clusters_of(disaster_df) == clusters_of(reversed_df)
+    assert frozenset(
+        {
+            ("gdacs_id", "1000"),
+            ("glide_id", "FL-2020-01-CHN"),
+            ("cerf_id", "20-RR-CHN-001"),
+        },
+    ) in clusters_of(disaster_df)
+    assert len(disaster_df) == 5
+
+
+def test_run_graph_mode_writes_unified_schema(tmp_path: Path) -> None:
+    """Test that graph consolidation writes one row per cluster."""
+    write_prep_tables(tmp_path / "prep")
+
+    run(list(PREP_TABLES), tmp_path / "prep", tmp_path / "unified", mode="graph")
+    unified_df = read_intermediate(tmp_path / "unified")
+
+    china = unified_df[unified_df["Country_Code"].str[0] == "CHN"].iloc[0]
+    assert list(china["Source_Event_IDs"]) == [
+        "1000",
+        "FL-2020-01-CHN",
+        "20-RR-CHN-001",
+    ]
+    assert china["End_Date"] == "2020-07-29T00:00:00"
+
+
+def test_consolidate_rejects_unknown_mode(tmp_path: Path) -> None:
+    """Test that unsupported modes are reported."""
+    with pytest.raises(ValueError, match="Unsupported consolidation mode"):
+        consolidate([SOURCE_ADAPTERS["gdacs"]], tmp_path, mode="fuzzy")
+
+
+def test_graph_mode_rejects_mixed_match_columns(tmp_path: Path) -> None:
+    """Test that graph consolidation needs one set of match columns."""
+    adapters = [
+        SOURCE_ADAPTERS["gdacs"],
+        SourceAdapter("glide", match_columns=("Event_Code",)),
+    ]
+
+    with pytest.raises(ValueError, match="same match columns"):
+        consolidate(adapters, tmp_path, mode="graph")
+
+
+@pytest.mark.parametrize("mode", ["sequential", "graph"])
+def test_disaster_impact_ids_are_unique(tmp_path: Path, mode: str) -> None:
+    """Test that split countries and equal IDs of two sources get distinct IDs."""
+    write_prep_tables(tmp_path)
+    write_intermediate(
+        pd.DataFrame(
+            {
+                "Source_Event_IDs": ["1000"],
+                "Event_Code": ["EQ"],
+                "Country_Code": ["NPL"],
+                "Date": ["2020-01-01"],
+            },
+        ),
+        tmp_path / "emdat_prep",
+    )
+    adapters = [SOURCE_ADAPTERS[source] for source in ("gdacs", "emdat")]
+    schema = json.loads(Path(UNIFIED_SCHEMA_PATH).read_text())
+
+    unified_df = to_unified_table(
+        consolidate(adapters, tmp_path, mode=mode),
+        adapters,
+        schema,
+    )
+
+    only_1000 = unified_df["Source_Event_IDs"].map(lambda ids: list(ids) == ["1000"])
+    assert only_1000.sum() == 3
+    assert unified_df["Disaster_Impact_ID"].is_unique
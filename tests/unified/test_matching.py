@@ -0,0 +1,364 @@
+"""Tests for the date-window matching of the unified module."""
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.unified.matching import (
+    add_new_source,
+    connected_components,
+    link_within_blocks,
+    match_within_window,
+)
+
+MATCH_COL = ["event_type", "country_iso3"]
+
+
+def legacy_add_new_source(  # noqa: PLR0913
+    disaster_df: pd.DataFrame,
+    new_source_df: pd.DataFrame,
+    new_id: str,
+    match_col: list[str],
+    date_col: str,
+    delta_day_threshold: int,
+) -> pd.DataFrame:
+    """The notebook implementation, filtering the merge of each key group."""
+    merge_df = disaster_df.merge(
+        new_source_df,
+        on=match_col,
+        how="inner",
+        suffixes=("", "_new"),
+    )
+    merge_df["date_match"] = (
+        (merge_df[date_col] - merge_df["initial_date"]).apply(lambda x: x.days)
+        >= -delta_day_threshold
+    ) & (
+        (merge_df[date_col] - merge_df["end_date"]).apply(lambda x: x.days)
+        <= delta_day_threshold
+    )
+    merge_df = merge_df[merge_df["date_match"]].reset_index(drop=True)
+    merge_df["initial_date"] = merge_df[["initial_date", date_col]].min(axis=1)
+    merge_df["end_date"] = merge_df[["end_date", date_col]].max(axis=1)
+    merge_df = merge_df.drop(
+        columns=["country_name_new", "country_iso3_new", date_col, "date_match"],
+        errors="ignore",
+    )
+
+    left_outer_df = disaster_df[
+        ~disaster_df["unique_id"].isin(list(merge_df["unique_id"].unique()))
+    ]
+    new_source_df = new_source_df.copy()
+    new_source_df["initial_date"] = new_source_df[date_col]
+    new_source_df["end_date"] = new_source_df[date_col]
+    new_source_df = new_source_df.drop(columns=[date_col])
+    right_outer_df = new_source_df[
+        ~new_source_df[new_id].isin(list(merge_df[new_id].unique()))
+    ]
+
+    combined_df = pd.concat([merge_df, left_outer_df, right_outer_df])
+    combined_df = combined_df.drop(columns="unique_id").reset_index()
+    return combined_df.rename(columns={"index": "unique_id"})
+
+
+def random_sources(
+    ref_rows: int,
+    new_rows: int,
+    groups: int,
+    seed: int = 0,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Build combined events and a new source over a few key groups."""
+    rng = np.random.default_rng(seed)
+    hazards = np.array(["FL", "EQ", "TC/ST", None], dtype=object)
+    countries = np.array([f"C{i:02d}" for i in range(groups)], dtype=object)
+    initial = pd.Timestamp("2020-01-01") + pd.to_timedelta(
+        rng.integers(0, 365, ref_rows),
+        unit="D",
+    )
+    disaster_df = (
+        pd.DataFrame(
+            {
+                "event_type": hazards[rng.integers(0, 4, ref_rows)],
+                "country_iso3": countries[rng.integers(0, groups, ref_rows)],
+                "country_name": "ref",
+                "initial_date": initial,
+                "end_date": initial
+                + pd.to_timedelta(rng.integers(0, 20, ref_rows), "D"),
+                "gdacs_id": np.arange(ref_rows),
+            },
+        )
+        .rename_axis("unique_id")
+        .reset_index()
+    )
+    dates = pd.Series(
+        pd.Timestamp("2020-01-01")
+        + pd.to_timedelta(rng.integers(-10, 380, new_rows), unit="D"),
+    )
+    dates[rng.random(new_rows) < 0.05] = pd.NaT
+    new_source_df = pd.DataFrame(
+        {
+            "glide_id": [f"G{i}" for i in range(new_rows)],
+            "event_type": hazards[rng.integers(0, 4, new_rows)],
+            "country_iso3": countries[rng.integers(0, groups, new_rows)],
+            "country_name": "new",
+            "event_date": dates,
+        },
+    )
+    return disaster_df, new_source_df
+
+
+def test_match_within_window_bounds() -> None:
+    """Test that the window includes the tolerance on both ends."""
+    left = pd.DataFrame(
+        {
+            "key": ["a", "a", "b"],
+            "start": pd.to_datetime(["2020-01-10", "2020-03-01", "2020-01-10"]),
+            "end": pd.to_datetime(["2020-01-12", None, "2020-01-10"]),
+        },
+    )
+    right = pd.DataFrame(
+        {
+            "key": ["a", "a", "a", "a", "b"],
+            "date": pd.to_datetime(
+                ["2020-01-03", "2020-01-02", "2020-01-19", "2020-01-20", "2020-01-10"],
+            ),
+        },
+    )
+
+    left_positions, right_positions = match_within_window(
+        left,
+        right,
+        ["key"],
+        "start",
+        "end",
+        "date",
+        7,
+    )
+
+    assert left_positions.tolist() == [0, 0, 2]
+    assert right_positions.tolist() == [0, 2, 4]
+
+
+def test_add_new_source_matches_legacy() -> None:
+    """Test that the interval join combines sources as the notebook merge."""
+    disaster_df, new_source_df = random_sources(800, 600, groups=5)
+
+    result = add_new_source(
+        disaster_df,
+        new_source_df,
+        "glide_id",
+        MATCH_COL,
+        "event_date",
+        7,
+    )
+    expected = legacy_add_new_source(
+        disaster_df,
+        new_source_df,
+        "glide_id",
+        MATCH_COL,
+        "event_date",
+        7,
+    )
+
+    # The notebook rebuilt unique_id from the concatenated indexes, which
+    # repeat across the matched, left and right parts.
+    assert result["unique_id"].tolist() == list(range(len(result)))
+    pd.testing.assert_frame_equal(
+        result.drop(columns="unique_id"),
+        expected.drop(columns="unique_id"),
+    )
+
+
+def test_add_new_source_keeps_events_over_rounds() -> None:
+    """Test that rounds, including fully matched ones, neither lose nor add rows."""
+    disaster_df = pd.DataFrame(
+        {
+            "unique_id": [0, 1, 2],
+            "event_type": ["FL", "EQ", "TC/ST"],
+            "country_iso3": ["CHN", "PER", "PHL"],
+            "initial_date": pd.to_datetime(["2020-07-01", "2020-03-01", "2020-11-01"]),
+            "end_date": pd.to_datetime(["2020-07-10", "2020-03-01", "2020-11-03"]),
+            "gdacs_id": ["1", "2", "3"],
+        },
+    )
+    rounds = [
+        # Every record matches.
+        ("glide_id", ["FL", "TC/ST"], ["CHN", "PHL"], ["2020-07-12", "2020-11-02"]),
+        # One record matches, one is new.
+        ("cerf_id", ["FL", "DR"], ["CHN", "KEN"], ["2020-07-18", "2020-08-01"]),
+        # Every record matches again.
+        ("emdat_id", ["EQ", "DR"], ["PER", "KEN"], ["2020-03-02", "2020-08-03"]),
+    ]
+
+    for new_id, hazards, countries, dates in rounds:
+        new_source_df = pd.DataFrame(
+            {
+                new_id: [f"{new_id}-{i}" for i in range(len(dates))],
+                "event_type": hazards,
+                "country_iso3": countries,
+                "event_date": pd.to_datetime(dates),
+            },
+        )
+        disaster_df = add_new_source(
+            disaster_df,
+            new_source_df,
+            new_id,
+            MATCH_COL,
+            "event_date",
+            7,
+        )
+        assert disaster_df["unique_id"].tolist() == list(range(len(disaster_df)))
+
+    assert len(disaster_df) == 4
+    assert disaster_df["event_type"].notna().all()
+    events = disaster_df.set_index("event_type")
+    assert events.loc["FL", ["gdacs_id", "glide_id", "cerf_id"]].tolist() == [
+        "1",
+        "glide_id-0",
+        "cerf_id-0",
+    ]
+    assert events.loc["EQ", ["gdacs_id", "emdat_id"]].tolist() == ["2", "emdat_id-0"]
+    assert events.loc["DR", ["cerf_id", "emdat_id"]].tolist() == [
+        "cerf_id-1",
+        "emdat_id-1",
+    ]
+    assert events.loc["TC/ST", "glide_id"] == "glide_id-1"
+
+
+@pytest.mark.slow
+def test_benchmark_add_new_source() -> None:
+    """Report the merge-and-filter and interval join times on dense groups."""
+    disaster_df, new_source_df = random_sources(5_000, 5_000, groups=10)
+    args = ("glide_id", MATCH_COL, "event_date", 7)
+
+    start = time.perf_counter()
+    expected = legacy_add_new_source(disaster_df, new_source_df, *args)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = add_new_source(disaster_df, new_source_df, *args)
+    interval = time.perf_counter() - start
+
+    logging.getLogger(__name__).warning(
+        "add_new_source on 5k x 5k events: merge %.2fs, interval join %.2fs",
+        legacy,
+        interval,
+    )
+    pd.testing.assert_frame_equal(
+        result.drop(columns="unique_id"),
+        expected.drop(columns="unique_id"),
+    )
+
+
+def random_records(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Build records of three sources, some with an end date."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2020-01-01") + pd.to_timedelta(
+        rng.integers(0, rows // 10 + 30, rows),
+        unit="D",
+    )
+    end = start + pd.to_timedelta(rng.integers(0, 30, rows), unit="D")
+    end = end.where(rng.random(rows) < 0.3)
+    return pd.DataFrame(
+        {
+            "source": np.array(["gdacs", "glide", "cerf"])[rng.integers(0, 3, rows)],
+            "event_type": np.array(["FL", "EQ"])[rng.integers(0, 2, rows)],
+            "country_iso3": np.array(["CHN", "PER", "NPL"])[rng.integers(0, 3, rows)],
+            "initial_date": start,
+            "end_date": end,
+            "tolerance_days": np.array([7, 14])[rng.integers(0, 2, rows)],
+        },
+    )
+
+
+def test_link_within_blocks_matches_all_pairs() -> None:
+    """Test that blocking finds the same links as comparing every pair."""
+    records = random_records(400)
+
+    left, right = link_within_blocks(
+        records,
+        MATCH_COL,
+        "initial_date",
+        "end_date",
+        "tolerance_days",
+        "source",
+    )
+
+    column = {name: records[name].to_numpy()[:, None] for name in records}
+    row = {name: records[name].to_numpy()[None, :] for name in records}
+    end = records["end_date"].fillna(records["initial_date"]).to_numpy()
+    window = (
+        pd.to_timedelta(
+            np.maximum(column["tolerance_days"], row["tolerance_days"]).ravel(),
+            unit="D",
+        )
+        .to_numpy()
+        .reshape(len(records), len(records))
+    )
+    linked = (
+        (column["source"] != row["source"])
+        & (column["event_type"] == row["event_type"])
+        & (column["country_iso3"] == row["country_iso3"])
+        & (row["initial_date"] - window <= end[:, None])
+        & (column["initial_date"] - window <= end[None, :])
+    )
+    expected = set(zip(*np.nonzero(np.triu(linked, k=1)), strict=True))
+    assert set(zip(left.tolist(), right.tolist(), strict=True)) == {
+        (int(i), int(j)) for i, j in expected
+    }
+    assert expected
+
+
+def test_link_within_blocks_skips_same_source_pairs() -> None:
+    """Test that records of one source are never linked to each other."""
+    records = random_records(200).assign(source="idmc")
+
+    left, _ = link_within_blocks(
+        records,
+        MATCH_COL,
+        "initial_date",
+        "end_date",
+        "tolerance_days",
+        "source",
+    )
+
+    assert len(left) == 0
+
+
+def test_connected_components() -> None:
+    """Test that chained links form one component labelled by its first node."""
+    labels = connected_components(
+        7,
+        np.array([5, 1, 3, 6]),
+        np.array([3, 2, 1, 6]),
+    )
+
+    assert labels.tolist() == [0, 1, 1, 1, 4, 1, 6]
+
+
+@pytest.mark.slow
+def test_benchmark_link_within_blocks_scaling() -> None:
+    """Report the linking and clustering time as the records grow."""
+    timings, links = [], []
+    for rows in (100_000, 400_000):
+        records = random_records(rows)
+        start = time.perf_counter()
+        left, right = link_within_blocks(
+            records,
+            MATCH_COL,
+            "initial_date",
+            "end_date",
+            "tolerance_days",
+            "source",
+        )
+        connected_components(len(records), left, right)
+        timings.append(time.perf_counter() - start)
+        links.append(len(left))
+
+    logging.getLogger(__name__).warning(
+        "Graph clustering: 100k records %.2fs, 400k records %.2fs",
+        *timings,
+    )
+    assert all(links)
@@ -0,0 +1,35 @@
+"""Tests for the batch_accumulator module."""
+
+from pathlib import Path
+
+import pandas as pd
+
+from src.utils.batch_accumulator import BatchAccumulator, PartitionedCsvWriter
+
+
+def test_batch_accumulator_keeps_write_order() -> None:
+    """Test that records and frames are materialised in the order written."""
+    accumulator = BatchAccumulator()
+    accumulator.write([{"a": 1}, {"a": 2}])
+    accumulator.write(pd.DataFrame({"a": [3]}, index=[10]))
+    accumulator.write([{"a": 4}])
+
+    expected = pd.DataFrame({"a": [1, 2, 3, 4]})
+
+    assert len(accumulator) == len(expected)
+    pd.testing.assert_frame_equal(accumulator.to_frame(), expected)
+
+
+def test_partitioned_csv_writer(tmp_path: Path) -> None:
+    """Test that batches are appended to one file per partition."""
+    writer = PartitionedCsvWriter(str(tmp_path), "events_{}.csv")
+    writer.write(pd.DataFrame({"year": [2000, 2001], "v": [1, 2]}), "year")
+    writer.write(pd.DataFrame({"year": [2000], "v": [3]}), "year")
+
+    result = pd.read_csv(tmp_path / "events_2000.csv")
+
+    pd.testing.assert_frame_equal(
+        result,
+        pd.DataFrame({"year": [2000, 2000], "v": [1, 3]}),
+    )
+    assert writer.counts == {2000: 2, 2001: 1}
@@ -0,0 +1,104 @@
+"""Tests for the BlobCache of the azure_blob_utils module."""
+
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotModifiedError
+
+from src.utils import azure_blob_utils
+from src.utils.azure_blob_utils import BlobCache, open_blob
+
+
+class FakeDownloader:
+    """Stand-in for a StorageStreamDownloader."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    def readinto(self, stream: object) -> int:
+        stream.write(self.data)
+        return len(self.data)
+
+    def chunks(self) -> list[bytes]:
+        return [self.data[:2], self.data[2:]]
+
+
+class FakeBlobClient:
+    """In-memory blob honouring conditional property requests."""
+
+    def __init__(self, blob_name: str, data: bytes, etag: str) -> None:
+        self.blob_name = blob_name
+        self.data = data
+        self.etag = etag
+        self.downloads = 0
+
+    def get_blob_properties(
+        self,
+        etag: str | None = None,
+        match_condition: MatchConditions | None = None,
+    ) -> SimpleNamespace:
+        if match_condition == MatchConditions.IfModified and etag == self.etag:
+            raise ResourceNotModifiedError
+        return SimpleNamespace(etag=self.etag)
+
+    def download_blob(self, **_: object) -> FakeDownloader:
+        self.downloads += 1
+        return FakeDownloader(self.data)
+
+
+def test_blob_cache_revalidates_by_etag(tmp_path: Path) -> None:
+    """Test that unchanged blobs are served locally and changed ones refetched."""
+    cache = BlobCache(str(tmp_path), max_bytes=1024)
+    blob = FakeBlobClient("raw/data.csv", b"a\n1\n", '"v1"')
+
+    first = cache.fetch(blob)
+    second = cache.fetch(blob)
+
+    assert first == second
+    assert first.read_bytes() == b"a\n1\n"
+    assert blob.downloads == 1
+    assert cache.stats["hits"] == 1
+
+    blob.data, blob.etag = b"a\n2\n", '"v2"'
+    third = cache.fetch(blob)
+
+    assert third != first
+    assert third.read_bytes() == b"a\n2\n"
+    assert blob.downloads == 2
+
+
+def test_blob_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    """Test that the oldest blobs are evicted once the size cap is exceeded."""
+    cache = BlobCache(str(tmp_path), max_bytes=10)
+    old = cache.fetch(FakeBlobClient("old.csv", b"x" * 6, '"1"'))
+    os.utime(old, (0, 0))
+    new = cache.fetch(FakeBlobClient("new.csv", b"y" * 6, '"1"'))
+
+    assert not old.exists()
+    assert new.exists()
+    assert cache.stats["evicted"] == 1
+
+
+def test_open_blob_streams_without_cache(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that blobs are streamed, not written to disk, unless caching is on."""
+    cache = BlobCache(str(tmp_path), max_bytes=1024)
+    monkeypatch.setattr(azure_blob_utils, "BLOB_CACHE", cache)
+    monkeypatch.setattr(azure_blob_utils, "BLOB_CACHE_ENABLED", False)
+    blob = FakeBlobClient("raw/data.csv", b"a\n1\n", '"v1"')
+
+    with open_blob(blob) as fh:
+        assert fh.read() == b"a\n1\n"
+
+    assert not any(tmp_path.iterdir())
+
+    monkeypatch.setattr(azure_blob_utils, "BLOB_CACHE_ENABLED", True)
+    with open_blob(blob) as fh:
+        assert fh.read() == b"a\n1\n"
+
+    assert cache.stats["misses"] == 1
@@ -0,0 +1,30 @@
+"""Tests for the BlobChunkReader of the azure_blob_utils module."""
+
+import io
+
+import pandas as pd
+import pytest
+
+from src.utils.azure_blob_utils import BlobChunkReader
+
+CSV = b"id,name,value\n1,Flood,1.5\n2,\xc3\x89ruption,\n3,Storm,-2\n"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1024])
+def test_blob_chunk_reader_parses_like_bytes(chunk_size: int) -> None:
+    """Test that a chunked stream parses exactly like the whole body."""
+    chunks = (CSV[i : i + chunk_size] for i in range(0, len(CSV), chunk_size))
+    with io.BufferedReader(BlobChunkReader(chunks), buffer_size=4) as source:
+        result = pd.read_csv(source)
+
+    pd.testing.assert_frame_equal(result, pd.read_csv(io.BytesIO(CSV)))
+
+
+def test_blob_chunk_reader_read_sizes() -> None:
+    """Test that reads span chunk boundaries and stop at the end."""
+    reader = BlobChunkReader([b"abc", b"", b"defg"])
+
+    assert reader.read(2) == b"ab"
+    assert reader.read(4) == b"c"
+    assert reader.read() == b"defg"
+    assert reader.read(1) == b""
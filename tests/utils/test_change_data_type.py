@@ -0,0 +1,162 @@
+"""Tests for the schema-driven change_data_type."""
+
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.util import change_data_type, compile_schema
+
+GLIDE_SCHEMA = json.loads(Path("./src/glide/glide_schema.json").read_text())
+SCHEMA = {
+    "properties": {
+        "Country": {"type": ["array", "null"]},
+        "Event_ID": {"type": "array"},
+        "Date": {"type": ["string", "null"]},
+        "Magnitude": {"type": ["number", "null"]},
+        "Year": {"type": ["integer", "null"]},
+    },
+}
+
+
+def legacy_change_data_type(cleaned1_data: pd.DataFrame, json_schema: dict) -> dict:
+    """The original implementation, casting arrays and strings cell by cell."""
+    for column, properties in json_schema["properties"].items():
+        if column in cleaned1_data.columns:
+            column_type = properties.get("type")
+            if "array" in column_type:
+                cleaned1_data[column] = cleaned1_data[column].apply(
+                    lambda x: ",".join(map(str, x))
+                    if isinstance(x, list)
+                    else (str(x) if pd.notna(x) else ""),
+                )
+            elif "string" in column_type:
+                cleaned1_data[column] = cleaned1_data[column].astype(str)
+            elif "number" in column_type:
+                cleaned1_data[column] = pd.to_numeric(
+                    cleaned1_data[column],
+                    errors="coerce",
+                )
+            elif "integer" in column_type:
+                cleaned1_data[column] = pd.to_numeric(
+                    cleaned1_data[column],
+                    errors="coerce",
+                ).astype("Int64")
+    return cleaned1_data
+
+
+def sample_frame(rows: int) -> pd.DataFrame:
+    """Build a frame mixing lists, scalars and missing values."""
+    rng = np.random.default_rng(0)
+    countries = np.array(["Chad", "Peru", "Nepal", None], dtype=object)
+    country = countries[rng.integers(0, 4, rows)]
+    list_rows = rng.random(rows) < 0.3
+    for row in np.flatnonzero(list_rows):
+        country[row] = ["Chad", "Niger"]
+    return pd.DataFrame(
+        {
+            "Country": country,
+            "Event_ID": rng.integers(0, 10_000, rows),
+            "Date": np.where(rng.random(rows) < 0.1, None, "2020-05-01"),
+            "Magnitude": np.where(rng.random(rows) < 0.1, "n/a", "6.1"),
+            "Year": np.where(rng.random(rows) < 0.1, np.nan, 2020.0),
+        },
+        index=rng.integers(0, 10, rows),
+    )
+
+
+def test_compile_schema_plan() -> None:
+    """Test that schemas compile to ordered casts and plans are reused."""
+    plan = compile_schema(SCHEMA)
+
+    assert plan == (
+        ("Country", "array"),
+        ("Event_ID", "array"),
+        ("Date", "string"),
+        ("Magnitude", "number"),
+        ("Year", "integer"),
+    )
+    assert compile_schema(json.loads(json.dumps(SCHEMA))) is plan
+    assert ("Year", "integer") in compile_schema(GLIDE_SCHEMA)
+
+
+def test_change_data_type_matches_legacy() -> None:
+    """Test that casts match the original, with missing strings kept as NA."""
+    frame = sample_frame(2_000)
+    country = frame["Country"].to_numpy()
+    for row, cell in enumerate([[1, None], [], ["Chad"]]):
+        country[row] = cell
+    frame["Country"] = country
+
+    result = change_data_type(frame.copy(), SCHEMA)
+    expected = legacy_change_data_type(frame.copy(), SCHEMA)
+
+    assert list(result["Country"][:3]) == ["1,None", "", "Chad"]
+    for column in ("Country", "Event_ID"):
+        assert list(result[column]) == list(expected[column])
+    pd.testing.assert_series_equal(result["Magnitude"], expected["Magnitude"])
+    pd.testing.assert_series_equal(result["Year"], expected["Year"])
+    missing = frame["Date"].isna().to_numpy()
+    assert result["Date"][missing].isna().all()
+    assert list(result["Date"][~missing]) == list(expected["Date"][~missing])
+
+
+def test_array_cast_of_nullable_integers() -> None:
+    """Test that missing nullable integers flatten to empty strings."""
+    frame = pd.DataFrame({"Event_ID": pd.array([7, None, 12], dtype="Int64")})
+
+    result = change_data_type(frame.copy(), SCHEMA)
+    expected = legacy_change_data_type(frame.copy(), SCHEMA)
+
+    assert list(result["Event_ID"]) == ["7", "", "12"]
+    assert result["Event_ID"][1] == expected["Event_ID"][1]
+
+
+def test_string_cast_keeps_missing_values() -> None:
+    """Test that missing strings stay NA where the original wrote their text."""
+    frame = pd.DataFrame({"Date": ["2020-05-01", None, np.nan]})
+
+    result = change_data_type(frame.copy(), SCHEMA)
+    expected = legacy_change_data_type(frame.copy(), SCHEMA)
+
+    assert expected["Date"].tolist() == ["2020-05-01", "None", "nan"]
+    assert result["Date"].dtype == pd.StringDtype("pyarrow")
+    assert result["Date"].tolist() == ["2020-05-01", pd.NA, pd.NA]
+
+
+def test_integer_cast_drops_non_whole_values() -> None:
+    """Test that fractional or non-numeric integers become NA."""
+    frame = pd.DataFrame({"Year": [2020.0, 2020.5, "x", None]})
+
+    result = change_data_type(frame.copy(), SCHEMA)
+
+    assert result["Year"].tolist() == [2020, pd.NA, pd.NA, pd.NA]
+    with pytest.raises(TypeError):
+        legacy_change_data_type(frame.copy(), SCHEMA)
+
+
+@pytest.mark.slow
+def test_benchmark_change_data_type() -> None:
+    """Report the legacy and compiled casting times on a million rows."""
+    frame = sample_frame(1_000_000)
+
+    start = time.perf_counter()
+    expected = legacy_change_data_type(frame.copy(), SCHEMA)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = change_data_type(frame.copy(), SCHEMA)
+    compiled = time.perf_counter() - start
+
+    logging.getLogger(__name__).warning(
+        "change_data_type on 1M rows: legacy %.2fs, compiled plan %.2fs",
+        legacy,
+        compiled,
+    )
+    for column in ("Country", "Event_ID"):
+        assert list(result[column]) == list(expected[column])
+    pd.testing.assert_series_equal(result["Year"], expected["Year"])
@@ -0,0 +1,49 @@
+"""Tests for the country_resolver module."""
+
+import pandas as pd
+
+from src.utils.country_resolver import CountryResolver, normalise_country_name
+
+
+def test_normalise_country_name() -> None:
+    """Test that accents, case, punctuation and hyphens are ignored."""
+    assert normalise_country_name("Côte-d'Ivoire ") == "cote d ivoire"
+    assert normalise_country_name("Bosnia-and-Herzegovina") == (
+        normalise_country_name("bosnia and herzegovina")
+    )
+
+
+def test_exact_index_sources() -> None:
+    """Test names from the country table, pycountry and COUNTRIES."""
+    resolver = CountryResolver()
+
+    assert resolver.resolve("Chad", fuzzy=False) == "TCD"
+    assert resolver.resolve("Congo, The Democratic Republic of the") == "COD"
+    assert resolver.resolve("Central-African-Republic", fuzzy=False) == "CAF"
+    assert resolver.resolve("USA", fuzzy=False) == "USA"
+    assert resolver.resolve("Florida", fuzzy=False) is None
+    assert resolver.resolve(None) is None
+
+
+def test_placeholder_names_are_missing() -> None:
+    """Test that "-" placeholders of the country table do not resolve."""
+    resolver = CountryResolver()
+
+    assert "" not in resolver.index
+    for name in ("-", "--", "?", "...", " "):
+        assert resolver.resolve(name) is None
+    assert resolver.resolve("Timor-Leste", fuzzy=False) == "TLS"
+
+
+def test_resolve_column_looks_up_distinct_names_once() -> None:
+    """Test that each distinct name is resolved once and fuzzy hits cached."""
+    resolver = CountryResolver()
+    names = pd.Series(["Chad", "Nowhere", None, "Chad", "Nowhere"] * 100)
+
+    result = resolver.resolve_column(names)
+
+    assert result.tolist()[:5] == ["TCD", None, None, "TCD", None]
+    assert resolver.stats["rows"] == len(names)
+    assert resolver.stats["unique"] == 2
+    assert resolver.stats["exact"] == 1
+    assert resolver.stats["missing"] == 1
@@ -0,0 +1,94 @@
+"""Tests for the on-disk HTTP cache."""
+
+from datetime import timedelta
+from pathlib import Path
+
+import requests
+
+from src.utils.http_cache import HttpCache
+
+URL = "https://example.org/allocation/1"
+
+
+class FakeSession:
+    """A session returning queued responses and recording request headers."""
+
+    def __init__(self, *responses: requests.Response) -> None:
+        self.responses = list(responses)
+        self.requests: list[dict] = []
+
+    def get(self, url: str, headers: dict, timeout: float) -> requests.Response:
+        self.requests.append({"url": url, "headers": headers, "timeout": timeout})
+        return self.responses.pop(0)
+
+
+def make_response(
+    status_code: int,
+    body: bytes = b"",
+    **headers: str,
+) -> requests.Response:
+    """Build a response with the given status, body and headers."""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body  # noqa: SLF001
+    response.headers.update(headers)
+    return response
+
+
+def test_fetch_miss_stores_response(tmp_path: Path) -> None:
+    """Test that an uncached URL is fetched and stored."""
+    cache = HttpCache(str(tmp_path))
+    session = FakeSession(make_response(200, b"<html>v1</html>", ETag='"v1"'))
+
+    assert cache.fetch(session, URL, timeout=5) == (200, b"<html>v1</html>")
+    assert session.requests[0]["headers"] == {}
+    assert cache.stats["fetched"] == 1
+    assert len(list((tmp_path / "objects").rglob("*"))) == 2
+
+
+def test_fetch_hit_skips_request(tmp_path: Path) -> None:
+    """Test that a fresh entry is served without a request."""
+    cache = HttpCache(str(tmp_path), max_age=timedelta(days=1))
+    session = FakeSession(make_response(200, b"<html>v1</html>"))
+    cache.fetch(session, URL, timeout=5)
+
+    assert cache.fetch(session, URL, timeout=5) == (200, b"<html>v1</html>")
+    assert len(session.requests) == 1
+    assert cache.stats["fresh"] == 1
+
+
+def test_fetch_revalidates_with_validators(tmp_path: Path) -> None:
+    """Test that a stale entry is revalidated and a 304 serves the cached body."""
+    cache = HttpCache(str(tmp_path))
+    session = FakeSession(
+        make_response(
+            200,
+            b"<html>v1</html>",
+            ETag='"v1"',
+            **{"Last-Modified": "Wed, 01 May 2024 00:00:00 GMT"},
+        ),
+        make_response(304),
+    )
+    cache.fetch(session, URL, timeout=5)
+
+    assert cache.fetch(session, URL, timeout=5) == (200, b"<html>v1</html>")
+    assert session.requests[1]["headers"] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Wed, 01 May 2024 00:00:00 GMT",
+    }
+    assert cache.stats["revalidated"] == 1
+
+
+def test_fetch_failure_keeps_cached_body(tmp_path: Path) -> None:
+    """Test that an error response is returned but not stored."""
+    cache = HttpCache(str(tmp_path))
+    session = FakeSession(
+        make_response(200, b"<html>v1</html>"),
+        make_response(503, b"busy"),
+        make_response(304),
+    )
+    cache.fetch(session, URL, timeout=5)
+
+    assert cache.fetch(session, URL, timeout=5) == (503, b"busy")
+    assert cache.fetch(session, URL, timeout=5) == (200, b"<html>v1</html>")
+    assert cache.stats["failed"] == 1
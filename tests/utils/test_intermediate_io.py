@@ -0,0 +1,125 @@
+"""Tests for the intermediate_io module."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.utils.intermediate_io import (
+    IntermediateWriter,
+    intermediate_path,
+    iter_intermediate,
+    read_intermediate,
+    write_intermediate,
+)
+
+FRAME = pd.DataFrame(
+    {
+        "Event_ID": ["a", "b", "c"],
+        "Country": ["Chad,Niger", "Peru", None],
+        "Date": pd.to_datetime(["2020-01-05", "2021-03-01", None]),
+        "Affected": pd.array([10, None, 3], dtype="Int64"),
+    },
+)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_columnar_round_trip_keeps_dtypes(tmp_path: Path, fmt: str) -> None:
+    """Test that columnar tables keep dtypes and are partitioned by year."""
+    path = write_intermediate(FRAME, tmp_path / "glide" / "glide_mid1", fmt)
+    result = read_intermediate(tmp_path / "glide" / "glide_mid1", fmt=fmt)
+
+    assert path == intermediate_path(tmp_path / "glide" / "glide_mid1", fmt)
+    assert (path / "partition_year=2020").is_dir()
+    result = result.sort_values("Event_ID").reset_index(drop=True)
+    pd.testing.assert_frame_equal(result, FRAME, check_dtype=False)
+    assert result["Date"].dtype.kind == "M"
+    assert str(result["Affected"].dtype) == "Int64"
+
+
+def test_writer_batches_and_column_selection(tmp_path: Path) -> None:
+    """Test that batches are appended and only requested columns are read."""
+    writer = IntermediateWriter(tmp_path / "idus_mid1", "parquet")
+    writer.write(FRAME.iloc[:2])
+    writer.write(FRAME.iloc[2:].assign(Country=None))
+    result = read_intermediate(tmp_path / "idus_mid1", ["Event_ID"], "parquet")
+
+    assert writer.rows == len(FRAME)
+    assert list(result.columns) == ["Event_ID"]
+    assert sorted(result["Event_ID"]) == ["a", "b", "c"]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "csv"])
+def test_writer_discard_removes_partial_table(tmp_path: Path, fmt: str) -> None:
+    """Test that a discarded stream leaves no partial table behind."""
+    writer = IntermediateWriter(tmp_path / "idus_mid1", fmt)
+    writer.write(FRAME)
+    writer.discard()
+
+    assert not intermediate_path(tmp_path / "idus_mid1", fmt).exists()
+    assert writer.rows == 0
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_rows_are_read_in_written_order(tmp_path: Path, fmt: str) -> None:
+    """Test that rows spread over year partitions come back in input order."""
+    frame = pd.DataFrame(
+        {
+            "Event_ID": [1, 2, 3, 4, 5, 6],
+            "Date": pd.to_datetime(
+                ["2021-01-01", None, "2020-01-01", "2021-06-01", "2019-01-01", None],
+            ),
+        },
+    )
+    writer = IntermediateWriter(tmp_path / "gdacs_mid1", fmt)
+    writer.write(frame.iloc[:4])
+    writer.write(frame.iloc[4:])
+
+    result = read_intermediate(tmp_path / "gdacs_mid1", fmt=fmt)
+    chunks = list(iter_intermediate(tmp_path / "gdacs_mid1", 3, fmt=fmt))
+
+    assert result["Event_ID"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert [chunk["Event_ID"].tolist() for chunk in chunks] == [[1, 2, 3], [4], [5, 6]]
+
+
+def test_mixed_type_batches_share_the_first_schema(tmp_path: Path) -> None:
+    """Test that batches inferring other types are cast to the first schema."""
+    writer = IntermediateWriter(tmp_path / "idus_mid1", "parquet")
+    writer.write(pd.DataFrame({"Count": [1, 2], "Note": [None, None]}))
+    writer.write(pd.DataFrame({"Count": [3.0, None], "Note": [7, 8]}))
+    writer.write(pd.DataFrame({"Count": [4, "many"], "Note": [None, 9]}))
+
+    result = read_intermediate(tmp_path / "idus_mid1", fmt="parquet")
+
+    assert result["Count"].tolist() == ["1", "2", "3", None, "4", "many"]
+    assert result["Note"].tolist()[2:4] == [7, 8]
+    assert pd.isna(result["Note"][0])
+
+
+def test_arrow_string_columns_keep_their_dtype(tmp_path: Path) -> None:
+    """Test that Arrow-backed string columns are read back as such."""
+    frame = pd.DataFrame(
+        {
+            "Country": pd.array(["Chad", None], dtype="string[pyarrow]"),
+            "Event": pd.array(["Flood", "Storm"], dtype="string[python]"),
+        },
+    )
+    write_intermediate(frame, tmp_path / "cerf_mid1", "parquet")
+
+    result = read_intermediate(tmp_path / "cerf_mid1", fmt="parquet")
+
+    pd.testing.assert_frame_equal(result, frame)
+
+
+def test_csv_format_is_a_single_file(tmp_path: Path) -> None:
+    """Test that the CSV format still writes a plain CSV file."""
+    path = write_intermediate(FRAME, tmp_path / "cerf_mid1", "csv")
+
+    assert path == tmp_path / "cerf_mid1.csv"
+    assert list(pd.read_csv(path).columns) == list(FRAME.columns)
+
+
+def test_unknown_format_raises(tmp_path: Path) -> None:
+    """Test that unsupported formats are rejected."""
+    with pytest.raises(ValueError, match="Unsupported intermediate format"):
+        write_intermediate(FRAME, tmp_path / "x", "xlsx")
@@ -0,0 +1,30 @@
+"""Tests for the json_stream module."""
+
+import json
+
+import pytest
+
+from src.utils.json_stream import iter_json_array
+
+RECORDS = [
+    {"id": 1, "name": "Flood; Chad", "figure": 1.5e-3, "codes": ["a", "]"]},
+    {"id": 2, "name": "Séisme", "figure": -12, "codes": []},
+    12345678901,
+    None,
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1024])
+def test_iter_json_array_any_chunking(chunk_size: int) -> None:
+    """Test that elements are decoded whatever the chunk boundaries."""
+    raw = json.dumps(RECORDS, ensure_ascii=False).encode("utf-8")
+    chunks = [raw[i : i + chunk_size] for i in range(0, len(raw), chunk_size)]
+
+    assert list(iter_json_array(chunks)) == RECORDS
+
+
+@pytest.mark.parametrize("raw", [b"{}", b"[1, 2", b"[1 2]"])
+def test_iter_json_array_rejects_malformed_documents(raw: bytes) -> None:
+    """Test that non-array and truncated documents raise ValueError."""
+    with pytest.raises(ValueError, match="JSON"):
+        list(iter_json_array([raw]))
@@ -0,0 +1,73 @@
+"""Tests for the event code registry and normalize_event_type."""
+
+import numpy as np
+import pandas as pd
+
+from src.utils.util import get_event_code_registry, normalize_event_type
+
+EVENT_CODE_CSV = "./static_data/event_code_table.csv"
+
+
+def legacy_normalize_event_type(df: pd.DataFrame, event_code_csv: str) -> pd.Series:
+    """The original implementation, normalising every row."""
+    event_mapping_df = pd.read_csv(event_code_csv)
+    mapping = dict(
+        zip(
+            event_mapping_df["event_name"].str.strip().str.upper(),
+            event_mapping_df["event_code"].str.strip(),
+            strict=False,
+        ),
+    )
+    return (
+        df["Event_Type"]
+        .astype(str)
+        .str.strip()
+        .str.upper()
+        .map(mapping)
+        .fillna(df["Event_Type"])
+    )
+
+
+def test_normalize_event_type_matches_legacy() -> None:
+    """Test that per-category lookups give the per-row result."""
+    rng = np.random.default_rng(1)
+    values = np.array(
+        [" flood", "Earthquake ", "Typhoon, Floods", "unknown", np.nan, "FL", ""],
+        dtype=object,
+    )
+    frame = pd.DataFrame(
+        {"Event_Type": values[rng.integers(0, len(values), 500)]},
+        index=rng.integers(0, 5, 500),
+    )
+
+    result = normalize_event_type(frame.copy(), EVENT_CODE_CSV)
+
+    pd.testing.assert_series_equal(
+        result["Event_Code"],
+        legacy_normalize_event_type(frame, EVENT_CODE_CSV),
+        check_names=False,
+    )
+
+
+def test_event_type_mapping_aliases() -> None:
+    """Test that EVENT_TYPE_MAPPING descriptions resolve to their code."""
+    frame = pd.DataFrame({"Event_Type": ["Typhoon, Floods", "Earthquke", "Tornado"]})
+
+    result = normalize_event_type(
+        frame,
+        EVENT_CODE_CSV,
+        include_event_type_mapping=True,
+    )
+
+    assert result["Event_Code"].tolist() == ["TC", "EQ", "Tornado"]
+
+
+def test_registry_is_loaded_once() -> None:
+    """Test that the registry is memoised per table and option."""
+    registry = get_event_code_registry(EVENT_CODE_CSV)
+
+    assert get_event_code_registry(EVENT_CODE_CSV) is registry
+    assert (
+        get_event_code_registry(EVENT_CODE_CSV, include_event_type_mapping=True)
+        is not registry
+    )
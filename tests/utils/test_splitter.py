@@ -0,0 +1,213 @@
+"""Tests for the splitter stage."""
+
+import importlib
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pycountry
+import pytest
+
+from src.utils.country_resolver import COUNTRY_CSV
+from src.utils.intermediate_io import read_intermediate, write_intermediate
+from src.utils.splitter import (
+    input_fingerprint,
+    load_manifest,
+    run,
+    split_and_update_country_rows,
+)
+
+
+def mid1_frame() -> pd.DataFrame:
+    """Build a small data_mid_1 table with multi-country rows."""
+    return pd.DataFrame(
+        {
+            "Event_ID": ["a", "b", "c"],
+            "Country": ["Chad,Niger", "Peru", "Atlantis"],
+            "Country_Code": ["", "", ""],
+            "Date": ["2020-01-01", "2021-06-01", "2021-07-01"],
+        },
+    )
+
+
+def test_import_has_no_side_effects() -> None:
+    """Test that importing the module reads and removes nothing."""
+    module = importlib.reload(importlib.import_module("src.utils.splitter"))
+
+    assert not hasattr(module, "dataframes")
+
+
+def test_split_and_update_country_rows() -> None:
+    """Test that multi-country rows are split and their codes resolved."""
+    result = split_and_update_country_rows(mid1_frame())
+
+    assert result["Event_ID"].tolist() == ["a", "a", "b", "c"]
+    assert result["Country"].tolist() == ["Chad", "Niger", "Peru", "Atlantis"]
+    assert result["Country_Code"].tolist() == ["TCD", "NER", "PER", ""]
+
+
+def test_run_streams_sources_and_keeps_inputs(tmp_path: Path) -> None:
+    """Test that sources are split in chunks and their inputs are kept."""
+    tables = {
+        source: str(tmp_path / "data_mid_1" / source / f"{source}_mid1")
+        for source in ("first", "second")
+    }
+    for base_path in tables.values():
+        write_intermediate(mid1_frame(), base_path)
+    output_dir = tmp_path / "data_prep"
+
+    results = run(tables, output_dir, max_workers=2, chunk_size=2)
+
+    assert results == {"first": 4, "second": 4}
+    prep = read_intermediate(output_dir / "first_prep")
+    assert sorted(prep["Country_Code"]) == ["", "NER", "PER", "TCD"]
+    assert all(input_fingerprint(path) for path in tables.values())
+    assert load_manifest(output_dir) == {
+        source: input_fingerprint(path) for source, path in tables.items()
+    }
+
+
+def test_run_changed_only_skips_unchanged_sources(tmp_path: Path) -> None:
+    """Test that only sources whose input changed are processed again."""
+    tables = {
+        source: str(tmp_path / source / f"{source}_mid1")
+        for source in ("first", "second")
+    }
+    for base_path in tables.values():
+        write_intermediate(mid1_frame(), base_path)
+    output_dir = tmp_path / "data_prep"
+    run(tables, output_dir, max_workers=1)
+
+    write_intermediate(mid1_frame().head(1), tables["second"])
+    results = run(tables, output_dir, changed_only=True, max_workers=1)
+
+    assert results == {"second": 2}
+    assert run(tables, output_dir, changed_only=True) == {}
+
+
+def legacy_split_and_update_country_rows(
+    df: pd.DataFrame,
+    country_col: str = "Country",
+    code_col: str = "Country_Code",
+    sep: str = ",",
+) -> pd.DataFrame:
+    """The original implementation, parsing and resolving each cell in Python."""
+    country_df = pd.read_csv(COUNTRY_CSV)
+    country_mapping = country_df.set_index("country_name")["country_iso3"].to_dict()
+
+    def ensure_list(cell: list | tuple | str) -> list:
+        if isinstance(cell, list | tuple):
+            return list(cell)
+        if isinstance(cell, str):
+            cell = cell.strip("[]")
+            return [item.strip(" '\"") for item in cell.split(sep)]
+        return [cell]
+
+    df[country_col] = df[country_col].apply(ensure_list)
+    df_exploded = df.explode(country_col).reset_index(drop=True)
+
+    def update_country_code(row: pd.Series) -> str:
+        country_name = row[country_col]
+        iso3 = country_mapping.get(country_name, "")
+        if not iso3:
+            try:
+                country = pycountry.countries.lookup(country_name)
+                iso3 = country.alpha_3
+            except LookupError:
+                iso3 = ""
+        return iso3
+
+    df_exploded[code_col] = df_exploded.apply(update_country_code, axis=1)
+    return df_exploded
+
+
+def prep_frame(rows: int) -> pd.DataFrame:
+    """Build a prep-like frame, mostly single countries with some lists."""
+    rng = np.random.default_rng(0)
+    cells = np.array(
+        [
+            "Chad",
+            "Peru",
+            "Chad, Niger",
+            "['Nepal', 'India']",
+            "",
+            None,
+            np.nan,
+            "Côte d'Ivoire,Mali,Atlantis",
+        ],
+        dtype=object,
+    )
+    return pd.DataFrame(
+        {
+            "Event_ID": np.arange(rows),
+            "Country": cells[rng.choice(8, rows, p=[0.4, 0.3, 0.1, 0.1] + [0.025] * 4)],
+            "Country_Code": "",
+            "Date": "2020-01-01",
+        },
+        index=rng.integers(0, 10, rows),
+    )
+
+
+def test_split_matches_legacy() -> None:
+    """Test that the columnar split gives the original output."""
+    frame = prep_frame(5_000)
+    country = frame["Country"].to_numpy()
+    for row, cell in enumerate([["Chad", "Mali"], [], ("Peru",), 7]):
+        country[row] = cell
+    frame["Country"] = country
+
+    result = split_and_update_country_rows(frame.copy())
+    expected = legacy_split_and_update_country_rows(frame.copy())
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert result["Country"][[0, 1, 3]].tolist() == ["Chad", "Mali", "Peru"]
+    assert pd.isna(result["Country"][2])
+
+
+def test_split_keeps_original_codes_where_resolver_differs() -> None:
+    """Test names the normalising CountryResolver would resolve differently."""
+    frame = pd.DataFrame(
+        {
+            "Country": [
+                "BURMA, ALASKA",
+                "Bosnia-and-Herzegovina",
+                "Côte-d'Ivoire",
+                "Azores Islands (Portugal)",
+                "-",
+                "CHAD",
+            ],
+            "Country_Code": "",
+        },
+    )
+
+    result = split_and_update_country_rows(frame.copy())
+    expected = legacy_split_and_update_country_rows(frame.copy())
+
+    pd.testing.assert_frame_equal(result, expected)
+    codes = result["Country_Code"].tolist()
+    assert codes[:4] == ["", "", "", ""]
+    assert pd.isna(codes[4])
+    assert codes[5:] == ["", "TCD"]
+
+
+@pytest.mark.slow
+def test_benchmark_split_and_update_country_rows() -> None:
+    """Report the legacy and columnar split times on a million rows."""
+    frame = prep_frame(1_000_000)
+
+    start = time.perf_counter()
+    expected = legacy_split_and_update_country_rows(frame.copy())
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = split_and_update_country_rows(frame.copy())
+    columnar = time.perf_counter() - start
+
+    logging.getLogger(__name__).warning(
+        "split_and_update_country_rows on 1M rows: legacy %.2fs, columnar %.2fs",
+        legacy,
+        columnar,
+    )
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,31 @@
+"""Tests for the StorageSession of the azure_blob_utils module."""
+
+import pytest
+
+from src.utils.azure_blob_utils import StorageSession
+
+
+def http_session_of(client: object) -> object:
+    """Return the requests session at the bottom of a client's pipeline."""
+    transport = client._pipeline._transport  # noqa: SLF001
+    while not hasattr(transport, "session"):
+        transport = transport._transport  # noqa: SLF001
+    return transport.session
+
+
+def test_storage_session_shares_transport(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that all blob clients reuse the session's pooled HTTP session."""
+    monkeypatch.setenv("STORAGE_SAS_TOKEN_", "sv=2022&sig=abc")
+    monkeypatch.setenv("CONTAINER_NAME", "container")
+    monkeypatch.setenv("STORAGE_ACCOUNT", "account")
+
+    session = StorageSession(pool_size=4)
+    first = session.blob_client("raw/a.csv")
+    second = session.blob_client("raw/b.csv")
+
+    assert first.url.startswith("https://account.blob.core.windows.net/container/")
+    assert session.container_client.container_name == "container"
+    http_session = http_session_of(session.service_client)
+    assert http_session.adapters["https://"]._pool_maxsize == 4  # noqa: SLF001
+    assert http_session_of(first) is http_session
+    assert http_session_of(second) is http_session
@@ -0,0 +1,72 @@
+"""Tests for the delta-aware upload_dir_to_blob."""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils import azure_blob_utils
+from src.utils.azure_blob_utils import file_md5, upload_dir_to_blob
+
+
+class FakeContainer:
+    """In-memory container recording uploads."""
+
+    def __init__(self) -> None:
+        self.blobs: dict[str, tuple[bytes, bytes]] = {}
+
+    def list_blobs(self, name_starts_with: str) -> list[SimpleNamespace]:
+        return [
+            SimpleNamespace(
+                name=name,
+                content_settings=SimpleNamespace(content_md5=md5),
+            )
+            for name, (_, md5) in self.blobs.items()
+            if name.startswith(name_starts_with)
+        ]
+
+
+class FakeBlobClient:
+    """Blob client writing into a FakeContainer."""
+
+    def __init__(self, container: FakeContainer, blob_name: str) -> None:
+        self.container = container
+        self.blob_name = blob_name
+
+    def upload_blob(self, data: object, **kwargs: object) -> None:
+        md5 = bytes(kwargs["content_settings"].content_md5)
+        self.container.blobs[self.blob_name] = (data.read(), md5)
+
+
+class FakeSession:
+    """StorageSession stand-in backed by a FakeContainer."""
+
+    def __init__(self) -> None:
+        self.container_client = FakeContainer()
+
+    def blob_client(self, blob_name: str) -> FakeBlobClient:
+        return FakeBlobClient(self.container_client, blob_name)
+
+
+def test_upload_dir_to_blob_skips_unchanged(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that only new or modified files are uploaded again."""
+    session = FakeSession()
+    monkeypatch.setattr(azure_blob_utils, "get_storage_session", lambda: session)
+    (tmp_path / "glide").mkdir()
+    (tmp_path / "glide" / "a.csv").write_text("a\n1\n")
+    (tmp_path / "b.csv").write_text("b\n1\n")
+
+    first = upload_dir_to_blob(str(tmp_path), "prep")
+    (tmp_path / "b.csv").write_text("b\n2\n")
+    second = upload_dir_to_blob(str(tmp_path), "prep")
+
+    assert first["uploaded"] == 2
+    assert second == {"uploaded": 1, "skipped": 1, "bytes": 4}
+    assert session.container_client.blobs["disaster-impact/prep/b.csv"] == (
+        b"b\n2\n",
+        file_md5(tmp_path / "b.csv"),
+    )
+    assert "disaster-impact/prep/glide/a.csv" in session.container_client.blobs